@@ -14,13 +14,24 @@
 """Emulating the way Hadoop handles input files, decompressing compressed
 files based on their file extension.
 
+``.gz`` and ``.bz2`` files are always supported, as are ``.xz`` files on
+Python 3. ``.lz4`` and ``.zst`` files are supported if the :py:mod:`lz4`
+and :py:mod:`zstandard` modules are installed; otherwise, files with those
+extensions are treated as uncompressed, as they were before mrjob could
+read them. ``.lz4`` files may be in either LZ4 frame format (what the
+:command:`lz4` command writes) or the block format that Hadoop's
+``Lz4Codec`` writes.
+
 This module also functions as a :command:`cat` substitute that can handle
 compressed files. It it used by :py:mod:`local <mrjob.local>` mode and can
 function without the rest of the mrjob library.
 """
 import gzip
+import io
+import struct
 import sys
 import zlib
+from itertools import chain
 
 try:
     import bz2
@@ -28,9 +39,43 @@ try:
 except ImportError:
     bz2 = None
 
+try:
+    import lzma
+    lzma  # quiet "redefinition of unused ..." warning from pyflakes
+except ImportError:
+    lzma = None
 
-def bunzip2_stream(fileobj, bufsize=1024):
-    """Decompress gzipped data on the fly.
+try:
+    import lz4.block
+    import lz4.frame
+    lz4  # quiet "redefinition of unused ..." warning from pyflakes
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+    zstandard  # quiet "redefinition of unused ..." warning from pyflakes
+except ImportError:
+    zstandard = None
+
+#: Default number of bytes to read at a time from compressed (or otherwise
+#: not line-oriented) files
+DEFAULT_BUFSIZE = 1024 * 1024
+
+# LZ4 frame format files start with this (0x184D2204, little-endian)
+_LZ4_FRAME_MAGIC = b'\x04\x22\x4d\x18'
+
+# map from file extension to the name of the module needed to decompress it
+_MODULE_FOR_EXT = {
+    '.bz2': 'bz2',
+    '.lz4': 'lz4',
+    '.xz': 'lzma',
+    '.zst': 'zstandard',
+}
+
+
+def bunzip2_stream(fileobj, bufsize=DEFAULT_BUFSIZE):
+    """Decompress bzip2-compressed data on the fly.
 
     :param fileobj: object supporting ``read()``
     :param bufsize: number of bytes to read from *fileobj* at a time.
@@ -40,24 +85,16 @@ def bunzip2_stream(fileobj, bufsize=1024):
         This yields decompressed chunks; it does *not* split on lines. To get
         lines, wrap this in :py:func:`to_lines`.
     """
-    if bz2 is None:
-        raise Exception(
-            'bz2 module was not successfully imported (likely not installed).')
+    _check_module_for('.bz2')
 
-    d = bz2.BZ2Decompressor()
+    return _decompress_stream(fileobj, bz2.BZ2Decompressor, bufsize)
 
-    for chunk in to_chunks(fileobj):
-        part = d.decompress(chunk)
-        if part:
-            yield part
 
-
-def gunzip_stream(fileobj, bufsize=1024):
+def gunzip_stream(fileobj, bufsize=DEFAULT_BUFSIZE):
     """Decompress gzipped data on the fly.
 
     :param fileobj: object supporting ``read()``
-    :param bufsize: number of bytes to read from *fileobj* at a time. The
-                    default is the same as in :py:mod:`gzip`.
+    :param bufsize: number of bytes to read from *fileobj* at a time.
 
     .. warning::
 
@@ -69,39 +106,258 @@ def gunzip_stream(fileobj, bufsize=1024):
     # we need this flag to read gzip rather than raw zlib, but it's not
     # actually defined in zlib, so we define it here.
     READ_GZIP_DATA = 16
-    d = zlib.decompressobj(READ_GZIP_DATA | zlib.MAX_WBITS)
-    for chunk in to_chunks(fileobj, bufsize):
-        data = d.decompress(chunk)
-        if data:
-            yield data
 
+    def decompressor():
+        return zlib.decompressobj(READ_GZIP_DATA | zlib.MAX_WBITS)
+
+    return _decompress_stream(fileobj, decompressor, bufsize)
+
+
+def _unxz_stream(fileobj, bufsize=DEFAULT_BUFSIZE):
+    _check_module_for('.xz')
+
+    return _decompress_stream(fileobj, lzma.LZMADecompressor, bufsize)
+
+
+def _unlz4_stream(fileobj, bufsize=DEFAULT_BUFSIZE):
+    _check_module_for('.lz4')
+
+    if hasattr(fileobj, 'read'):
+        chunks = to_chunks(fileobj, bufsize)
+    else:
+        chunks = iter(fileobj)
+
+    # peek at the start of the file to see which format it's in
+    start = b''
+    for chunk in chunks:
+        start += chunk
+        if len(start) >= len(_LZ4_FRAME_MAGIC):
+            break
+
+    if start.startswith(_LZ4_FRAME_MAGIC):
+        decompressor = lz4.frame.LZ4FrameDecompressor
+    else:
+        decompressor = _HadoopLZ4Decompressor
+
+    return _decompress_stream(chain([start], chunks), decompressor, bufsize)
+
+
+def _unzstd_stream(fileobj, bufsize=DEFAULT_BUFSIZE):
+    _check_module_for('.zst')
+
+    def decompressor():
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    return _decompress_stream(fileobj, decompressor, bufsize)
+
+
+class _HadoopLZ4Decompressor(object):
+    """Decompress the block format that Hadoop's ``Lz4Codec`` writes.
+
+    Each block starts with its uncompressed size (a 4-byte big-endian
+    integer), followed by one or more chunks of raw LZ4 data, each
+    preceded by its compressed size, until the block's uncompressed size
+    is reached.
+    """
+    def __init__(self):
+        self._buf = bytearray()
+        # uncompressed bytes left in the current block
+        self._block_left = 0
+
+    def decompress(self, data):
+        buf = self._buf
+        buf.extend(data)
+
+        results = []
+
+        while len(buf) >= 4:
+            size = struct.unpack('>I', bytes(buf[:4]))[0]
+
+            if not self._block_left:
+                # start of a new block
+                self._block_left = size
+                del buf[:4]
+                continue
+
+            if len(buf) < 4 + size:
+                break  # wait for the rest of the chunk
+
+            result = lz4.block.decompress(
+                bytes(buf[4:4 + size]), uncompressed_size=self._block_left)
+            del buf[:4 + size]
+
+            self._block_left -= min(len(result), self._block_left)
+            results.append(result)
 
-def decompress(readable, path, bufsize=1024):
+        return b''.join(results)
+
+
+def _decompress_stream(fileobj, decompressor, bufsize):
+    """Decompress data from *fileobj* with objects returned by
+    *decompressor()*, yielding chunks of bytes.
+
+    If a decompressor reaches the end of its stream (and has an ``eof``
+    attribute to tell us so), start over with a new one, so that we can
+    read concatenated streams, like multi-member gzip files. Null bytes
+    between streams are ignored.
+    """
+    d = decompressor()
+
+    if hasattr(fileobj, 'read'):
+        chunks = to_chunks(fileobj, bufsize)
+    else:
+        # already a stream of bytes (e.g. downloaded in parallel)
+        chunks = fileobj
+
+    for chunk in chunks:
+        while chunk:
+            data = d.decompress(chunk)
+            if data:
+                yield data
+
+            if getattr(d, 'eof', False):
+                # lz4 sets unused_data to None if there isn't any
+                chunk = (d.unused_data or b'').lstrip(b'\0')
+                d = decompressor()
+            else:
+                break
+
+
+# decompress a stream based on its file extension
+_STREAM_FUNC_FOR_EXT = {
+    '.bz2': bunzip2_stream,
+    '.gz': gunzip_stream,
+}
+
+# only treat files as compressed if we can read them; otherwise pass them
+# through as-is
+if lzma is not None:
+    _STREAM_FUNC_FOR_EXT['.xz'] = _unxz_stream
+
+if lz4 is not None:
+    _STREAM_FUNC_FOR_EXT['.lz4'] = _unlz4_stream
+
+if zstandard is not None:
+    _STREAM_FUNC_FOR_EXT['.zst'] = _unzstd_stream
+
+
+def decompress(readable, path, bufsize=DEFAULT_BUFSIZE):
     """Take a *readable* which supports the ``.read()`` method correponding to
     the given path and returns an iterator that yields chunks of bytes,
     possibly decompressing based on *path*.
 
     if *readable* appears to be a fileobj, pass it through as-is.
+
+    *readable* may also be an iterable of ``bytes`` (for example, a file
+    downloaded in several parts), in which case we decompress the chunks
+    in order.
+
+    :param bufsize: number of bytes to read from *readable* at a time (if
+                    it's compressed or not a fileobj)
     """
-    if path.endswith('.gz'):
-        return gunzip_stream(readable)
-    elif path.endswith('.bz2'):
-        if bz2 is None:
-            raise Exception('bz2 module was not successfully imported'
-                            ' (likely not installed).')
-
-        return bunzip2_stream(readable)
+    stream_func = _STREAM_FUNC_FOR_EXT.get(_compression_ext(path))
+
+    if stream_func:
+        return stream_func(readable, bufsize=bufsize)
     elif hasattr(readable, '__iter__'):
         return readable
     else:
         # not a real readable (e.g. boto3 StreamingBody)
         return to_chunks(readable, bufsize=bufsize)
 
+
+def open_input(path, bufsize=DEFAULT_BUFSIZE):
+    """Open the (possibly compressed) file at *path* for reading, and
+    return a file object that yields lines (including trailing newlines)
+    when iterated over.
+
+    Unlike ``to_lines(decompress(...))``, this splits lines in C, reading
+    *bufsize* bytes at a time, and reads every member of a multi-member
+    ``.gz`` file.
+    """
+    ext = _compression_ext(path)
+
+    if not ext:
+        return open(path, 'rb', bufsize)
+    elif ext == '.gz':
+        f = gzip.GzipFile(path, 'rb')
+    elif ext == '.bz2':
+        _check_module_for(ext)
+        f = bz2.BZ2File(path, 'rb')
+    else:
+        _check_module_for(ext)
+        fileobj = open(path, 'rb')
+        f = _ChunkReader(decompress(fileobj, path, bufsize), fileobj)
+
+    # decompressors read small chunks and split lines in Python; buffering
+    # them lets io split lines for us. (Python 2's BZ2File can't be
+    # wrapped, but it already splits lines in C.)
+    if hasattr(f, 'readinto'):
+        return io.BufferedReader(f, bufsize)
+    else:
+        return f
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read-only raw stream over an iterator of chunks of bytes, so that
+    :py:class:`io.BufferedReader` can split them into lines. Closes
+    *fileobj* when closed."""
+
+    def __init__(self, chunks, fileobj):
+        self._chunks = iter(chunks)
+        self._fileobj = fileobj
+        self._chunk = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._chunk:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk = memoryview(chunk)
+
+        n = min(len(b), len(self._chunk))
+        b[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._fileobj.close()
+
+        super(_ChunkReader, self).close()
+
+
 def is_compressed(path):
-    return path.endswith('.bz2') or path.endswith('.gz')
+    """Does *path* have the extension of a compression format we can
+    read?"""
+    return bool(_compression_ext(path))
+
+
+def _compression_ext(path):
+    """Return the file extension of *path* (e.g. ``'.gz'``) if it's
+    one we can decompress, or ``None``."""
+    for ext in _STREAM_FUNC_FOR_EXT:
+        if path.endswith(ext):
+            return ext
+
+    return None
+
+
+def _check_module_for(ext):
+    """Raise an exception if we don't have the module we need to decompress
+    files with the extension *ext*."""
+    module_name = _MODULE_FOR_EXT.get(ext)
+
+    if module_name and globals()[module_name] is None:
+        raise Exception('%s module was not successfully imported'
+                        ' (likely not installed).' % module_name)
 
 
-def to_chunks(readable, bufsize=1024):
+def to_chunks(readable, bufsize=DEFAULT_BUFSIZE):
     """Convert *readable*, which is any object supporting ``read()``
     (e.g. fileobjs) to a stream of non-empty ``bytes``.
     """
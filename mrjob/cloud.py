@@ -15,9 +15,13 @@
 import logging
 import os
 import pipes
+import threading
+import time
+from datetime import timedelta
 from os.path import basename
 
 from mrjob.bin import MRJobBinRunner
+from mrjob.conf import combine_dicts
 from mrjob.setup import WorkingDirManager
 from mrjob.setup import parse_setup_cmd
 from mrjob.util import cmd_line
@@ -25,6 +29,16 @@ from mrjob.util import file_ext
 
 log = logging.getLogger(__name__)
 
+# how many times to try uploading each file before giving up
+_UPLOAD_MAX_TRIES = 3
+
+# how many seconds to wait before trying a failed upload again. Doubles
+# after each failure
+_UPLOAD_BACKOFF = 1.0
+
+# refresh cached files older than this, so that their last-modified
+# time shows they're still in use (see the cloud_upload_cache option)
+_UPLOAD_CACHE_REFRESH_AGE = timedelta(days=1)
 
 # map archive file extensions to the command used to unarchive them
 _EXT_TO_UNARCHIVE_CMD = {
@@ -46,6 +60,8 @@ class HadoopInTheCloudJobRunner(MRJobBinRunner):
         'check_cluster_every',
         'cloud_fs_sync_secs',
         'cloud_tmp_dir',
+        'cloud_upload_cache',
+        'cloud_upload_threads',
         'cluster_id',
         'core_instance_type',
         'extra_cluster_params',
@@ -92,6 +108,14 @@ class HadoopInTheCloudJobRunner(MRJobBinRunner):
 
     ### Options ###
 
+    def _default_opts(self):
+        return combine_dicts(
+            super(HadoopInTheCloudJobRunner, self)._default_opts(),
+            dict(
+                cloud_upload_threads=8,
+            ),
+        )
+
     def _combine_opts(self, opt_list):
         """Propagate *instance_type* to other instance type opts, if not
         already set.
@@ -329,6 +353,139 @@ class HadoopInTheCloudJobRunner(MRJobBinRunner):
 
         return out
 
+    ### Uploading files ###
+
+    def _upload_local_files(self, upload):
+        """Upload the files tracked by ``self._upload_mgr``, up to
+        :mrjob-opt:`cloud_upload_threads` at a time.
+
+        *upload* is a function that takes a local path and a URI, and
+        uploads one file. It may be called from several threads at once.
+        Failed uploads are retried. Files that are already in the
+        upload directory with the same MD5 sum are skipped.
+
+        If :mrjob-opt:`cloud_upload_cache` is set, URIs contain the file's
+        MD5 sum, so we just check whether each file is already there. Files
+        that are more than a day old are refreshed in place rather than
+        uploaded again.
+        """
+        if self._opts['cloud_upload_cache']:
+            to_upload = self._files_missing_from_upload_cache()
+        else:
+            to_upload = self._files_missing_from_upload_dir()
+
+        num_done = [0]  # a list so that threads can update it
+        lock = threading.Lock()
+
+        def upload_with_retries(path, uri):
+            log.debug('  %s -> %s' % (path, uri))
+
+            backoff = _UPLOAD_BACKOFF
+
+            for tries in range(1, _UPLOAD_MAX_TRIES + 1):
+                try:
+                    upload(path, uri)
+                    break
+                except Exception as ex:
+                    if tries == _UPLOAD_MAX_TRIES:
+                        raise
+
+                    log.warning(
+                        '  error uploading %s, trying again in %.1f'
+                        ' seconds: %s' % (path, backoff, ex))
+                    time.sleep(backoff)
+                    backoff *= 2
+
+            with lock:
+                num_done[0] += 1
+                log.info('  uploaded %s (%d of %d)' % (
+                    path, num_done[0], len(to_upload)))
+
+        _run_in_threads(upload_with_retries, to_upload,
+                        self._opts['cloud_upload_threads'] or 1)
+
+    def _files_missing_from_upload_dir(self):
+        """Return a list of (path, uri) for files tracked by
+        ``self._upload_mgr`` that aren't already uploaded. Helper
+        for :py:meth:`_upload_local_files`."""
+        # one request to see what's already there, rather than one per file
+        existing_uris = set(self.fs.ls(self._upload_mgr.prefix))
+
+        to_upload = []
+        for path, uri in sorted(self._upload_mgr.path_to_uri().items()):
+            if uri in existing_uris:
+                if self.fs.md5sum(uri) == self.fs.md5sum(path):
+                    log.debug('  %s already uploaded' % uri)
+                    continue
+
+                # some filesystems (e.g. GCS) won't overwrite files
+                self.fs.rm(uri)
+
+            to_upload.append((path, uri))
+
+        return to_upload
+
+    def _files_missing_from_upload_cache(self):
+        """Like :py:meth:`_files_missing_from_upload_dir`, but for
+        content-addressed URIs (see :mrjob-opt:`cloud_upload_cache`).
+
+        Cached files that are more than a day old are refreshed in place
+        (see :py:meth:`_refresh_uploaded_file`), so that
+        :command:`mrjob s3-tmpwatch` (or a lifecycle rule) only deletes
+        files that no job has used lately. We never delete cached files;
+        other jobs may be using them.
+
+        Local files with the same name and contents share a URI, so we
+        only return each URI once.
+
+        Files are checked (and refreshed) up to
+        :mrjob-opt:`cloud_upload_threads` at a time.
+        """
+        # local files with the same name and contents share a URI
+        uri_to_path = {}
+        for path, uri in sorted(self._upload_mgr.path_to_uri().items()):
+            uri_to_path.setdefault(uri, path)
+
+        to_upload = []
+        lock = threading.Lock()
+
+        def check(path, uri):
+            age = self._uploaded_file_age(uri)
+
+            if age is None:
+                with lock:
+                    to_upload.append((path, uri))
+            elif age < _UPLOAD_CACHE_REFRESH_AGE:
+                log.debug('  %s already uploaded' % uri)
+            else:
+                log.debug('  refreshing %s' % uri)
+                self._refresh_uploaded_file(uri)
+
+        to_check = sorted((path, uri) for uri, path in uri_to_path.items())
+
+        _run_in_threads(check, to_check,
+                        self._opts['cloud_upload_threads'] or 1)
+
+        return sorted(to_upload)
+
+    def _uploaded_file_age(self, uri):
+        """Return how long ago the file at *uri* was uploaded, as a
+        :py:class:`~datetime.timedelta`, or ``None`` if it doesn't exist.
+
+        Used by :py:meth:`_files_missing_from_upload_cache`. May be called
+        from several threads at once.
+        """
+        raise NotImplementedError
+
+    def _refresh_uploaded_file(self, uri):
+        """Reset the age of the file at *uri* to zero, without making it
+        unavailable, even briefly, to other jobs.
+
+        Used by :py:meth:`_files_missing_from_upload_cache`. May be called
+        from several threads at once.
+        """
+        raise NotImplementedError
+
     ### Launching Clusters ###
 
     def _add_extra_cluster_params(self, params):
@@ -339,3 +496,44 @@ class HadoopInTheCloudJobRunner(MRJobBinRunner):
         params = {k: v for k, v in params.items() if v is not None}
 
         return params
+
+
+def _run_in_threads(func, args_list, num_threads):
+    """Call ``func(*args)`` for each tuple in *args_list*, using up to
+    *num_threads* threads.
+
+    If any call raises an exception, we stop starting new calls, wait
+    for the ones in progress, and then re-raise the first exception.
+    """
+    args_iter = iter(args_list)
+    errors = []
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                if errors:
+                    return
+                try:
+                    args = next(args_iter)
+                except StopIteration:
+                    return
+
+            try:
+                func(*args)
+            except Exception as ex:
+                with lock:
+                    errors.append(ex)
+                return
+
+    threads = [threading.Thread(target=work)
+               for _ in range(min(num_threads, len(args_list)))]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
@@ -20,6 +20,8 @@ import os.path
 import time
 import re
 import subprocess
+import threading
+from datetime import datetime
 
 try:
     from oauth2client.client import GoogleCredentials
@@ -273,8 +275,13 @@ class DataprocJobRunner(HadoopInTheCloudJobRunner):
 
         # manage local files that we want to upload to GCS. We'll add them
         # to this manager just before we need them.
-        fs_files_dir = self._job_tmpdir + 'files/'
-        self._upload_mgr = UploadDirManager(fs_files_dir)
+        if self._opts['cloud_upload_cache']:
+            # outside the job's tmp dir, so it isn't cleaned up
+            self._upload_mgr = UploadDirManager(
+                self._cloud_tmp_dir + 'cache/', content_addressed=True)
+        else:
+            fs_files_dir = self._job_tmpdir + 'files/'
+            self._upload_mgr = UploadDirManager(fs_files_dir)
 
         # when did our particular task start?
         self._dataproc_job_start = None
@@ -444,14 +451,58 @@ class DataprocJobRunner(HadoopInTheCloudJobRunner):
 
         log.info('Copying non-input files into %s' % self._upload_mgr.prefix)
 
-        for path, gcs_uri in self._upload_mgr.path_to_uri().items():
-            log.debug('uploading %s -> %s' % (path, gcs_uri))
+        # httplib2 isn't thread-safe, so each upload thread gets its own
+        # filesystem (and API client)
+        thread_local = threading.local()
+
+        def upload(path, gcs_uri):
+            if not hasattr(thread_local, 'fs'):
+                thread_local.fs = GCSFilesystem()
+
+            # GCSFilesystem.put() won't overwrite files. If another job
+            # uploaded this file to the cache since we checked (even
+            # while we were trying), it has the same contents
+            if (self._opts['cloud_upload_cache'] and
+                    thread_local.fs.exists(gcs_uri)):
+                log.debug('  %s was uploaded by another job' % gcs_uri)
+                return
 
             # TODO - mtai @ davidmarin - Implement put function for other FSs
-            self.fs.put(path, gcs_uri)
+            thread_local.fs.put(path, gcs_uri)
+
+        self._upload_local_files(upload)
 
         self._wait_for_fs_sync()
 
+    def _uploaded_file_age(self, gcs_uri):
+        for item in self.fs._ls_detailed(gcs_uri):
+            if item['_uri'] == gcs_uri:
+                # e.g. 2017-06-20T21:26:48.318Z (always UTC)
+                created = datetime.strptime(
+                    item['timeCreated'].rstrip('Z').split('.')[0],
+                    '%Y-%m-%dT%H:%M:%S')
+                return datetime.utcnow() - created
+
+        return None
+
+    def _refresh_uploaded_file(self, gcs_uri):
+        # rewriting an object onto itself makes a new generation of it,
+        # with a new creation time, which is what lifecycle rules look at
+        bucket_name, object_name = parse_gcs_uri(gcs_uri)
+        objects = self.fs.api_client.objects()
+
+        rewrite_kwargs = dict(
+            sourceBucket=bucket_name, sourceObject=object_name,
+            destinationBucket=bucket_name, destinationObject=object_name,
+            body={})
+
+        # big objects may take several requests
+        while True:
+            resp = objects.rewrite(**rewrite_kwargs).execute()
+            if resp.get('done'):
+                break
+            rewrite_kwargs['rewriteToken'] = resp['rewriteToken']
+
     def _create_fs_tmp_bucket(self, bucket_name, location=None):
         """Create a temp bucket if missing
 
@@ -23,6 +23,7 @@ import random
 import re
 import signal
 import socket
+import threading
 import time
 from collections import defaultdict
 from datetime import datetime
@@ -83,6 +84,7 @@ from mrjob.logs.step import _ls_emr_step_stderr_logs
 from mrjob.logs.step import _ls_emr_step_syslogs
 from mrjob.parse import is_s3_uri
 from mrjob.parse import is_uri
+from mrjob.parse import parse_s3_uri
 from mrjob.parse import _parse_progress_from_job_tracker
 from mrjob.parse import _parse_progress_from_resource_manager
 from mrjob.pool import _est_time_to_hour
@@ -225,6 +227,9 @@ _INSTANCE_ROLES = ('MASTER', 'CORE', 'TASK')
 # use to disable multipart uploading
 _HUGE_PART_THRESHOLD = 2 ** 256
 
+# S3 can't copy objects bigger than this (5 GiB) in a single request
+_MAX_SINGLE_COPY_SIZE = 5 * 1024 * 1024 * 1024
+
 # don't make mins_to_end_of_hour less than this, or it'll break
 # idle termination
 _MIN_MINS_TO_END_OF_HOUR = 1
@@ -406,8 +411,14 @@ class EMRJobRunner(HadoopInTheCloudJobRunner, LogInterpretationMixin):
 
         # manage local files that we want to upload to S3. We'll add them
         # to this manager just before we need them.
-        s3_files_dir = self._cloud_tmp_dir + 'files/'
-        self._upload_mgr = UploadDirManager(s3_files_dir)
+        if self._opts['cloud_upload_cache']:
+            # outside the job's tmp dir, so it isn't cleaned up
+            self._upload_mgr = UploadDirManager(
+                self._opts['cloud_tmp_dir'] + 'cache/',
+                content_addressed=True)
+        else:
+            s3_files_dir = self._cloud_tmp_dir + 'files/'
+            self._upload_mgr = UploadDirManager(s3_files_dir)
 
         # master node setup script (handled later by
         # _add_master_node_setup_files_for_upload())
@@ -859,15 +870,60 @@ class EMRJobRunner(HadoopInTheCloudJobRunner, LogInterpretationMixin):
 
         log.info('Copying local files to %s...' % self._upload_mgr.prefix)
 
-        for path, s3_uri in self._upload_mgr.path_to_uri().items():
-            log.debug('  %s -> %s' % (path, s3_uri))
-            self._upload_contents(s3_uri, path)
+        # boto3 resources aren't thread-safe, so each upload thread gets
+        # its own bucket. Create them one at a time, because boto3's
+        # default session isn't thread-safe either
+        bucket_name, _ = parse_s3_uri(self._upload_mgr.prefix)
+        thread_local = threading.local()
+        lock = threading.Lock()
+
+        def upload(path, s3_uri):
+            if not hasattr(thread_local, 'bucket'):
+                with lock:
+                    thread_local.bucket = self.fs.get_bucket(bucket_name)
+
+            _, key_name = parse_s3_uri(s3_uri)
+            self._upload_to_s3_key(thread_local.bucket.Object(key_name), path)
+
+        self._upload_local_files(upload)
+
+    def _uploaded_file_age(self, s3_uri):
+        for uri, key in self.fs._ls(s3_uri):
+            if uri == s3_uri:
+                return _boto3_now() - key.last_modified
+
+        return None
+
+    def _refresh_uploaded_file(self, s3_uri):
+        # copying a key onto itself updates its last-modified time
+        s3_key = self.fs._get_s3_key(s3_uri)
+        copy_source = dict(Bucket=s3_key.bucket_name, Key=s3_key.key)
+
+        # copying replaces the key's metadata, so pass in what it has now
+        head = s3_key.meta.client.head_object(**copy_source)
+        metadata = dict(Metadata=head.get('Metadata') or {})
+        if head.get('ContentType'):
+            metadata['ContentType'] = head['ContentType']
+
+        if head['ContentLength'] <= _MAX_SINGLE_COPY_SIZE:
+            # S3 only lets us copy a key onto itself if we say we're
+            # replacing its metadata
+            s3_key.copy_from(CopySource=copy_source,
+                             MetadataDirective='REPLACE',
+                             **metadata)
+        else:
+            # too big to copy in one request, so let boto3 do a
+            # multipart copy
+            s3_key.copy(copy_source, ExtraArgs=metadata)
 
     def _upload_contents(self, s3_uri, path):
         """Uploads the file at the given path to S3, possibly using
         multipart upload."""
-        s3_key = self.fs._get_s3_key(s3_uri)
+        self._upload_to_s3_key(self.fs._get_s3_key(s3_uri), path)
 
+    def _upload_to_s3_key(self, s3_key, path):
+        """Upload the file at the given path to *s3_key* (a boto3
+        s3.Object), possibly using multipart upload."""
         # use _HUGE_PART_THRESHOLD to disable multipart uploading
         # (could use put() directly, but that would be another code path)
         part_size = self._get_upload_part_size() or _HUGE_PART_THRESHOLD
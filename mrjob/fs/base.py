@@ -15,6 +15,7 @@ import logging
 import os.path
 import posixpath
 
+from mrjob.cat import DEFAULT_BUFSIZE
 from mrjob.parse import is_uri
 from mrjob.parse import urlparse
 
@@ -42,18 +43,20 @@ class Filesystem(object):
         """Can we handle this path at all?"""
         False
 
-    def cat(self, path_glob):
+    def cat(self, path_glob, bufsize=DEFAULT_BUFSIZE):
         """cat all files matching **path_glob**, decompressing if necessary
 
         This yields bytes, which don't necessarily correspond to lines
         (see #1544). If multiple files are catted, yields ``b''`` between
         each file.
+
+        :param bufsize: number of bytes to read from each file at a time
         """
         for i, filename in enumerate(self.ls(path_glob)):
             if i > 0:
                 yield b''  # mark end of previous file
 
-            for line in self._cat_file(filename):
+            for line in self._cat_file(filename, bufsize=bufsize):
                 yield line
 
     def du(self, path_glob):
@@ -73,9 +76,10 @@ class Filesystem(object):
         """
         raise NotImplementedError
 
-    def _cat_file(self, path):
+    def _cat_file(self, path, bufsize=DEFAULT_BUFSIZE):
         """Yield the contents of the file at *path* as a series of ``bytes``,
-        not necessarily respecting line boundaries."""
+        not necessarily respecting line boundaries, reading *bufsize* bytes
+        at a time."""
         raise NotImplementedError
 
     def exists(self, path_glob):
@@ -125,3 +129,11 @@ class Filesystem(object):
     def md5sum(self, path_glob):
         """Generate the md5 sum of the file at ``path``"""
         raise NotImplementedError
+
+
+def _byte_ranges(start, end, part_size):
+    """Split the bytes from *start* up to (but not including) *end* into
+    a list of ``(start, end)`` tuples no more than *part_size* bytes
+    long. Used to download large files in parallel."""
+    return [(part_start, min(part_start + part_size, end))
+            for part_start in range(start, end, part_size)]
@@ -14,6 +14,7 @@
 # limitations under the License.
 import logging
 
+from mrjob.cat import DEFAULT_BUFSIZE
 from mrjob.fs.base import Filesystem
 
 
@@ -72,8 +73,8 @@ class CompositeFilesystem(Filesystem):
     def ls(self, path_glob):
         return self._do_action('ls', path_glob)
 
-    def _cat_file(self, path):
-        for line in self._do_action('_cat_file', path):
+    def _cat_file(self, path, bufsize=DEFAULT_BUFSIZE):
+        for line in self._do_action('_cat_file', path, bufsize=bufsize):
             yield line
 
     def mkdir(self, path):
@@ -15,14 +15,20 @@
 import fnmatch
 import logging
 import mimetypes
+import threading
 
+from mrjob.cat import DEFAULT_BUFSIZE
 from mrjob.cat import decompress
 from mrjob.fs.base import Filesystem
+from mrjob.fs.base import _byte_ranges
 from mrjob.parse import urlparse
 from mrjob.py2 import PY2
+from mrjob.py2 import to_unicode
 from mrjob.runner import GLOB_RE
+from mrjob.runner import _cat_files_in_parallel
 
 try:
+    import httplib2
     from oauth2client.client import GoogleCredentials
     from googleapiclient import discovery
     from googleapiclient import errors as google_errors
@@ -30,6 +36,7 @@ try:
 except ImportError:
     # don't require googleapiclient; MRJobs don't actually need it when running
     # inside hadoop streaming
+    httplib2 = None
     GoogleCredentials = None
     discovery = None
     google_errors = None
@@ -47,6 +54,10 @@ _GCS_API_ENDPOINT = 'storage'
 _GCS_API_VERSION = 'v1'
 
 _BINARY_MIMETYPE = 'application/octet-stream'
+
+# download objects bigger than this in parts, in parallel
+_DEFAULT_DOWNLOAD_PART_SIZE = 16 * 1024 * 1024  # 16 MB
+_DEFAULT_DOWNLOAD_THREADS = 4
 _LS_FIELDS_TO_RETURN = 'nextPageToken,items(name,size,timeCreated,md5Hash)'
 
 if PY2:
@@ -89,18 +100,45 @@ class GCSFilesystem(Filesystem):
     :py:class:`~mrjob.fs.ssh.SSHFilesystem` and
     :py:class:`~mrjob.fs.local.LocalFilesystem`.
     """
-    def __init__(self):
+    def __init__(self, download_part_size=_DEFAULT_DOWNLOAD_PART_SIZE,
+                 download_threads=_DEFAULT_DOWNLOAD_THREADS):
+        """
+        :param download_part_size: when reading objects bigger than this
+                                   many bytes, download them in parts this
+                                   big, several at a time
+        :param download_threads: how many parts of an object to download at
+                                 once. Set this (or *download_part_size*)
+                                 to 0 to always download objects in one
+                                 piece
+        """
+        # httplib2 isn't thread-safe, so only the thread that created this
+        # filesystem uses self._api_client; other threads (e.g. from
+        # cat_output()) get their own
         self._api_client = None
+        self._owner_thread = threading.current_thread()
+        self._thread_local = threading.local()
+
+        self._download_part_size = download_part_size
+        self._download_threads = download_threads
 
     @property
     def api_client(self):
+        if threading.current_thread() is not self._owner_thread:
+            if not getattr(self._thread_local, 'api_client', None):
+                self._thread_local.api_client = self._make_api_client()
+
+            return self._thread_local.api_client
+
         if not self._api_client:
-            credentials = GoogleCredentials.get_application_default()
-            self._api_client = discovery.build(
-                _GCS_API_ENDPOINT, _GCS_API_VERSION, credentials=credentials)
+            self._api_client = self._make_api_client()
 
         return self._api_client
 
+    def _make_api_client(self):
+        credentials = GoogleCredentials.get_application_default()
+        return discovery.build(
+            _GCS_API_ENDPOINT, _GCS_API_VERSION, credentials=credentials)
+
     def can_handle_path(self, path):
         return is_gcs_uri(path)
 
@@ -176,9 +214,10 @@ class GCSFilesystem(Filesystem):
                 "path for md5 sum doesn't resolve to single object" + path)
 
         item = object_list[0]
-        return _base64_to_hex(item['md5Hash'])
+        # return str, like the other filesystems
+        return to_unicode(_base64_to_hex(item['md5Hash']))
 
-    def _cat_file(self, gcs_uri):
+    def _cat_file(self, gcs_uri, bufsize=DEFAULT_BUFSIZE):
         tmp_fd, tmp_path = tempfile.mkstemp()
 
         with os.fdopen(tmp_fd, 'w+b') as tmp_fileobj:
@@ -186,7 +225,7 @@ class GCSFilesystem(Filesystem):
 
             tmp_fileobj.seek(0)
 
-            for chunk in decompress(tmp_fileobj, gcs_uri):
+            for chunk in decompress(tmp_fileobj, gcs_uri, bufsize=bufsize):
                 yield chunk
 
     def mkdir(self, dest):
@@ -231,10 +270,17 @@ class GCSFilesystem(Filesystem):
     def _download_io(self, src_uri, io_obj):
         bucket_name, object_name = parse_gcs_uri(src_uri)
 
+        in_parts = bool(self._download_threads > 1 and
+                        self._download_part_size)
+
         # Chunked file download
         req = self.api_client.objects().get_media(
             bucket=bucket_name, object=object_name)
-        downloader = google_http.MediaIoBaseDownload(io_obj, req)
+        if in_parts:
+            downloader = google_http.MediaIoBaseDownload(
+                io_obj, req, chunksize=self._download_part_size)
+        else:
+            downloader = google_http.MediaIoBaseDownload(io_obj, req)
 
         done = False
         while not done:
@@ -251,9 +297,48 @@ class GCSFilesystem(Filesystem):
             if status:
                 log.debug("Download %d%%." % int(status.progress() * 100))
 
+            if in_parts and not done:
+                # now that we know how big the object is, download the
+                # rest of it several parts at a time
+                self._download_io_in_parts(
+                    src_uri, io_obj,
+                    status.resumable_progress, status.total_size)
+                break
+
         log.debug("Download Complete for %s", src_uri)
         return io_obj
 
+    def _download_io_in_parts(self, src_uri, io_obj, start, end):
+        """Download bytes *start* up to *end* of the object at *src_uri*,
+        several parts at a time, and write them to *io_obj* in order."""
+        byte_ranges = _byte_ranges(start, end, self._download_part_size)
+
+        def cat_range(byte_range):
+            yield self._download_range(src_uri, *byte_range)
+
+        for chunk in _cat_files_in_parallel(
+                cat_range, byte_ranges, self._download_threads,
+                self._download_part_size * self._download_threads):
+            io_obj.write(chunk)
+
+    def _download_range(self, src_uri, start, end):
+        """Return bytes *start* up to *end* of the object at *src_uri*."""
+        bucket_name, object_name = parse_gcs_uri(src_uri)
+
+        req = self.api_client.objects().get_media(
+            bucket=bucket_name, object=object_name)
+        req.headers['range'] = 'bytes=%d-%d' % (start, end - 1)
+
+        # httplib2 isn't thread-safe, so each part gets its own connection
+        credentials = GoogleCredentials.get_application_default()
+        data = req.execute(http=credentials.authorize(httplib2.Http()))
+
+        if len(data) != end - start:
+            raise IOError('Expected %d bytes from %s, got %d' % (
+                end - start, src_uri, len(data)))
+
+        return data
+
     def _upload_io(self, io_obj, dest_uri, metadata=False):
         bucket, name = parse_gcs_uri(dest_uri)
         if self.exists(dest_uri):
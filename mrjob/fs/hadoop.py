@@ -21,6 +21,7 @@ from subprocess import Popen
 from subprocess import PIPE
 from subprocess import CalledProcessError
 
+from mrjob.cat import DEFAULT_BUFSIZE
 from mrjob.cat import decompress
 from mrjob.compat import uses_yarn
 from mrjob.fs.base import Filesystem
@@ -250,14 +251,14 @@ class HadoopFilesystem(Filesystem):
             else:
                 yield hdfs_prefix + path
 
-    def _cat_file(self, filename):
+    def _cat_file(self, filename, bufsize=DEFAULT_BUFSIZE):
         # stream from HDFS
         cat_args = self.get_hadoop_bin() + ['fs', '-cat', filename]
         log.debug('> %s' % cmd_line(cat_args))
 
         cat_proc = Popen(cat_args, stdout=PIPE, stderr=PIPE)
 
-        for chunk in decompress(cat_proc.stdout, filename):
+        for chunk in decompress(cat_proc.stdout, filename, bufsize=bufsize):
             yield chunk
 
         # this does someties happen; see #1396
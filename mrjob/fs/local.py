@@ -16,6 +16,7 @@ import logging
 import os
 import shutil
 
+from mrjob.cat import DEFAULT_BUFSIZE
 from mrjob.cat import decompress
 from mrjob.fs.base import Filesystem
 from mrjob.parse import is_uri
@@ -43,9 +44,9 @@ class LocalFilesystem(Filesystem):
             else:
                 yield path
 
-    def _cat_file(self, filename):
+    def _cat_file(self, filename, bufsize=DEFAULT_BUFSIZE):
         with open(filename, 'rb') as f:
-            for chunk in decompress(f, filename):
+            for chunk in decompress(f, filename, bufsize=bufsize):
                 yield chunk
 
     def mkdir(self, path):
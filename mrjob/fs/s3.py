@@ -17,6 +17,7 @@ Also the place for common code used to establish and wrap AWS connections."""
 import fnmatch
 import logging
 import socket
+import threading
 
 try:
     import botocore.client
@@ -31,20 +32,32 @@ except ImportError:
     boto3 = None
 
 from mrjob.aws import _S3_REGION_WITH_NO_LOCATION_CONSTRAINT
+from mrjob.cat import DEFAULT_BUFSIZE
 from mrjob.cat import decompress
 from mrjob.fs.base import Filesystem
+from mrjob.fs.base import _byte_ranges
 from mrjob.parse import is_uri
 from mrjob.parse import is_s3_uri
 from mrjob.parse import parse_s3_uri
 from mrjob.parse import urlparse
 from mrjob.retry import RetryWrapper
 from mrjob.runner import GLOB_RE
+from mrjob.runner import _cat_files_in_parallel
 
 
 log = logging.getLogger(__name__)
 
 _CHUNK_SIZE = 8192
 
+# download objects bigger than this in parts, in parallel
+_DEFAULT_DOWNLOAD_PART_SIZE = 16 * 1024 * 1024  # 16 MB
+_DEFAULT_DOWNLOAD_THREADS = 4
+
+# boto3's default session isn't thread-safe, so only create one client or
+# resource from it at a time. (Each client or resource we create is then
+# used by just one thread, except for clients, which are thread-safe.)
+_BOTO3_LOCK = threading.Lock()
+
 # if EMR throttles us, how long to wait (in seconds) before trying again?
 _EMR_BACKOFF = 20
 _EMR_BACKOFF_MULTIPLIER = 1.5
@@ -100,6 +113,19 @@ def _is_retriable_client_error(ex):
         return False
 
 
+def _read_exactly(body, num_bytes, bufsize=DEFAULT_BUFSIZE):
+    """Yield chunks of bytes from the readable *body*, stopping after
+    *num_bytes* bytes. Raise :py:class:`IOError` if *body* runs out
+    first."""
+    while num_bytes > 0:
+        chunk = body.read(min(bufsize, num_bytes))
+        if not chunk:
+            raise IOError('Download ended %d bytes early' % num_bytes)
+
+        num_bytes -= len(chunk)
+        yield chunk
+
+
 def _wrap_aws_client(raw_client):
     """Wrap a given boto3 Client object so that it can retry when
     throttled."""
@@ -118,7 +144,9 @@ class S3Filesystem(Filesystem):
     """
 
     def __init__(self, aws_access_key_id=None, aws_secret_access_key=None,
-                 aws_session_token=None, s3_endpoint=None, s3_region=None):
+                 aws_session_token=None, s3_endpoint=None, s3_region=None,
+                 download_part_size=_DEFAULT_DOWNLOAD_PART_SIZE,
+                 download_threads=_DEFAULT_DOWNLOAD_THREADS):
         """
         :param aws_access_key_id: Your AWS access key ID
         :param aws_secret_access_key: Your AWS secret access key
@@ -127,6 +155,12 @@ class S3Filesystem(Filesystem):
         :param s3_endpoint: If set, always use this endpoint
         :param s3_region: Region name corresponding to s3_endpoint. Only used
                           if *s3_endpoint* is set
+        :param download_part_size: when reading keys bigger than this many
+                                   bytes, download them in parts this big,
+                                   several at a time
+        :param download_threads: how many parts of a key to download at
+                                 once. Set this (or *download_part_size*)
+                                 to 0 to always download keys in one piece
         """
         super(S3Filesystem, self).__init__()
         self._s3_endpoint_url = _endpoint_url(s3_endpoint)
@@ -134,6 +168,8 @@ class S3Filesystem(Filesystem):
         self._aws_access_key_id = aws_access_key_id
         self._aws_secret_access_key = aws_secret_access_key
         self._aws_session_token = aws_session_token
+        self._download_part_size = download_part_size
+        self._download_threads = download_threads
 
     def can_handle_path(self, path):
         return is_s3_uri(path)
@@ -205,12 +241,57 @@ class S3Filesystem(Filesystem):
         k = self._get_s3_key(path)
         return k.e_tag.strip('"')
 
-    def _cat_file(self, filename):
+    def _cat_file(self, filename, bufsize=DEFAULT_BUFSIZE):
         # stream lines from the s3 key
         s3_key = self._get_s3_key(filename)
-        body = s3_key.get()['Body']
+        resp = s3_key.get()
+        body = resp['Body']
 
-        return decompress(body, filename)
+        if (self._download_threads > 1 and self._download_part_size and
+                resp['ContentLength'] > self._download_part_size):
+            body = self._cat_key_in_parts(s3_key, resp)
+
+        return decompress(body, filename, bufsize=bufsize)
+
+    def _cat_key_in_parts(self, s3_key, resp):
+        """Yield the contents of *s3_key* as chunks of bytes, downloading
+        several byte ranges of it at once.
+
+        *resp* is the response from ``s3_key.get()``; we read the first
+        part from its body rather than making another request.
+        """
+        part_size = self._download_part_size
+        num_threads = self._download_threads
+
+        byte_ranges = _byte_ranges(0, resp['ContentLength'], part_size)
+
+        # resources aren't thread-safe, but clients are
+        client = s3_key.meta.client
+
+        def cat_range(byte_range):
+            start, end = byte_range
+
+            if start == 0:
+                body = resp['Body']
+            else:
+                body = client.get_object(
+                    Bucket=s3_key.bucket_name,
+                    Key=s3_key.key,
+                    # fail rather than mix parts of different versions
+                    IfMatch=resp['ETag'],
+                    Range='bytes=%d-%d' % (start, end - 1))['Body']
+
+            try:
+                for chunk in _read_exactly(body, end - start):
+                    yield chunk
+            finally:
+                # don't download the rest of the key with the first part
+                body.close()
+
+        for chunk in _cat_files_in_parallel(
+                cat_range, byte_ranges, num_threads, part_size * num_threads):
+            if chunk:  # skip b'' between parts
+                yield chunk
 
     def mkdir(self, dest):
         """Make a directory. This does nothing on S3 because there are
@@ -281,7 +362,8 @@ class S3Filesystem(Filesystem):
         log.debug('creating S3 resource (%s)' % (
             kwargs['endpoint_url'] or kwargs['region_name'] or 'default'))
 
-        s3_resource = boto3.resource('s3', **kwargs)
+        with _BOTO3_LOCK:
+            s3_resource = boto3.resource('s3', **kwargs)
         s3_resource.meta.client = _wrap_aws_client(s3_resource.meta.client)
 
         return s3_resource
@@ -303,7 +385,10 @@ class S3Filesystem(Filesystem):
         log.debug('creating S3 client (%s)' % (
             kwargs['endpoint_url'] or kwargs['region_name'] or 'default'))
 
-        return _wrap_aws_client(boto3.client('s3', **kwargs))
+        with _BOTO3_LOCK:
+            s3_client = boto3.client('s3', **kwargs)
+
+        return _wrap_aws_client(s3_client)
 
     def _client_kwargs(self, region_name):
         """Keyword args for creating resources or clients."""
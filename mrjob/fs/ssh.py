@@ -18,6 +18,7 @@ import re
 from subprocess import Popen
 from subprocess import PIPE
 
+from mrjob.cat import DEFAULT_BUFSIZE
 from mrjob.cat import decompress
 from mrjob.fs.base import Filesystem
 from mrjob.py2 import to_unicode
@@ -195,14 +196,14 @@ class SSHFilesystem(Filesystem):
     def md5sum(self, path):
         raise IOError()  # not implemented
 
-    def _cat_file(self, filename):
+    def _cat_file(self, filename, bufsize=DEFAULT_BUFSIZE):
         m = _SSH_URI_RE.match(filename)
         addr = m.group('hostname')
         path = m.group('filesystem_path')
 
         p = self._ssh_launch(addr, ['cat', path])
 
-        for chunk in decompress(p.stdout, path):
+        for chunk in decompress(p.stdout, path, bufsize=bufsize):
             yield chunk
 
         self._ssh_finish_run(p)
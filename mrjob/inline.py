@@ -17,7 +17,10 @@
 """Run an MRJob inline by running all mappers and reducers through the same
 process. Useful for debugging."""
 import logging
+import multiprocessing
 import os
+import pickle
+import traceback
 
 from mrjob.job import MRJob
 #from mrjob.parse import parse_mr_job_stderr
@@ -27,6 +30,11 @@ from mrjob.util import save_cwd
 
 log = logging.getLogger(__name__)
 
+# functions for tasks and the runner that created them, inherited by forked
+# worker processes (see InlineMRJobRunner._run_multiple())
+_forked_funcs = None
+_forked_runner = None
+
 
 class InlineMRJobRunner(SimMRJobRunner):
     """Runs an :py:class:`~mrjob.job.MRJob` in the same process, so it's easy
@@ -42,6 +50,9 @@ class InlineMRJobRunner(SimMRJobRunner):
     To more accurately simulate your environment prior to running on
     Hadoop/EMR, use ``-r local`` (see
     :py:class:`~mrjob.local.LocalMRJobRunner`).
+
+    If you set :mrjob-opt:`num_cores` to more than 1, tasks run in
+    parallel, in forked copies of the current process.
     """
     alias = 'inline'
 
@@ -49,11 +60,12 @@ class InlineMRJobRunner(SimMRJobRunner):
         """:py:class:`~mrjob.inline.InlineMRJobRunner` takes the same keyword
         args as :py:class:`~mrjob.runner.MRJobRunner`. However, please note
         that
-        *hadoop_input_format*, *hadoop_output_format*, and *partitioner*
-        are ignored
+        *hadoop_input_format* and *hadoop_output_format* are ignored
         because they require Java. If you need to test these, consider
         starting up a standalone Hadoop instance and running your job with
-        ``-r hadoop``."""
+        ``-r hadoop``. *partitioner* is simulated if it's
+        ``HashPartitioner`` or ``KeyFieldBasedPartitioner`` (otherwise we
+        use ``HashPartitioner``)."""
         super(InlineMRJobRunner, self).__init__(**kwargs)
         # if we run python -m mrjob.job, mrjob_cls is __main__.MRJob
         # which is identical to (but not a subclass of) mrjob.job.MRJob
@@ -68,6 +80,7 @@ class InlineMRJobRunner(SimMRJobRunner):
 
         # used to explain exceptions
         self._error_while_reading_from = None
+        self._error_traceback = None
 
         if self._opts['py_files']:
             log.warning("inline runner doesn't import py_files")
@@ -103,6 +116,56 @@ class InlineMRJobRunner(SimMRJobRunner):
 
         return invoke_task
 
+    def _run_multiple(self, funcs, num_processes=None):
+        """Run *funcs* one at a time in this process, or if
+        :mrjob-opt:`num_cores` is more than 1, in parallel in forked
+        copies of this process.
+
+        Forked workers inherit the (unpickleable) task functions and the
+        job class from this process, rather than re-importing anything.
+        If a task raises an exception, we re-raise it here.
+        """
+        num_processes = num_processes or self._opts['num_cores'] or 1
+
+        if num_processes <= 1 or not hasattr(os, 'fork'):
+            return super(InlineMRJobRunner, self)._run_multiple(funcs)
+
+        global _forked_funcs
+        global _forked_runner
+
+        funcs = list(funcs)
+
+        # workers are forked when the pool is created
+        _forked_funcs = funcs
+        _forked_runner = self
+
+        try:
+            pool = _fork_pool(num_processes)
+        finally:
+            _forked_funcs = None
+            _forked_runner = None
+
+        try:
+            results = [
+                pool.apply_async(_call_forked_func, (func_num,))
+                for func_num in range(len(funcs))
+            ]
+
+            for result in results:
+                error = result.get()
+
+                if error:
+                    ex, self._error_traceback, \
+                        self._error_while_reading_from = error
+                    raise ex
+
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
     def _log_cause_of_error(self, ex):
         """Just tell what file we were reading from (since they'll see
         the stacktrace from the actual exception)"""
@@ -110,7 +173,41 @@ class InlineMRJobRunner(SimMRJobRunner):
             log.error('Error while reading from %s:\n' %
                       self._error_while_reading_from)
 
+        # the stacktrace from a forked process
+        if self._error_traceback:
+            log.error(self._error_traceback)
+
     def _load_steps(self):
         """Get step descriptions without calling a subprocess."""
         job_args = ['--steps'] + self._mr_job_extra_args(local=True)
         return self._mrjob_cls(args=job_args)._steps_desc()
+
+
+def _fork_pool(processes):
+    """Make a :py:class:`~multiprocessing.Pool` whose workers are forked
+    from the current process."""
+    if hasattr(multiprocessing, 'get_context'):
+        return multiprocessing.get_context('fork').Pool(processes=processes)
+    else:
+        return multiprocessing.Pool(processes=processes)  # Python 2
+
+
+def _call_forked_func(func_num):
+    """Call the function at index *func_num* in :py:data:`_forked_funcs`
+    (inside a forked worker).
+
+    If it raises an exception, return a tuple of the exception (if it can be
+    pickled), its formatted traceback, and which file the task was reading
+    from. Otherwise, return ``None``.
+    """
+    try:
+        _forked_funcs[func_num]()
+    except Exception as ex:
+        tb = traceback.format_exc()
+
+        try:
+            pickle.dumps(ex)
+        except Exception:
+            ex = Exception(repr(ex))
+
+        return ex, tb, _forked_runner._error_while_reading_from
@@ -22,9 +22,11 @@ import json
 import logging
 import os.path
 import sys
+import time
+from collections import OrderedDict
 
 # don't use relative imports, to allow this script to be invoked as __main__
-from mrjob.cat import decompress
+from mrjob.cat import open_input
 from mrjob.conf import combine_dicts
 from mrjob.conf import combine_lists
 from mrjob.launch import MRJobLauncher
@@ -32,6 +34,8 @@ from mrjob.launch import _im_func
 from mrjob.launch import _READ_ARGS_FROM_SYS_ARGV
 from mrjob.options import _add_step_args
 from mrjob.options import _print_help_for_steps
+from mrjob.protocol import AutoJSONProtocol
+from mrjob.protocol import AutoJSONValueProtocol
 from mrjob.protocol import JSONProtocol
 from mrjob.protocol import RawValueProtocol
 from mrjob.py2 import integer_types
@@ -78,6 +82,12 @@ class MRJob(MRJobLauncher):
 
         self._warned_about_parse_output_line = False
 
+        # while running a task, map from (group, counter) to the amount
+        # to increment it by (see increment_counter())
+        self._pending_counters = None
+        self._num_pending_increments = 0
+        self._counters_flushed_at = None
+
     @classmethod
     def _usage(cls):
         return "usage: %(prog)s [options] [input files]"
@@ -135,6 +145,80 @@ class MRJob(MRJobLauncher):
         """
         raise NotImplementedError
 
+    def mapper_batch(self, pairs):
+        """Re-define this instead of :py:meth:`mapper` to handle many
+        input records at a time.
+
+        Yields zero or more tuples of ``(out_key, out_value)``.
+
+        :param pairs: a list of up to :py:attr:`BATCH_SIZE`
+                      ``(key, value)`` tuples, decoded from input just like
+                      the arguments to :py:meth:`mapper`.
+
+        This is useful if you can process a whole batch of records at once
+        more efficiently than one at a time; for example, by updating a
+        :py:class:`~collections.Counter` or loading values into a NumPy
+        array.
+        """
+        raise NotImplementedError
+
+    def reducer_batch(self, key, value_chunks):
+        """Re-define this instead of :py:meth:`reducer` to receive a key's
+        values in lists rather than one at a time.
+
+        Yields one or more tuples of ``(out_key, out_value)``
+
+        :param key: A key which was yielded by the mapper
+        :param value_chunks: A generator which yields lists of up to
+                             :py:attr:`BATCH_SIZE` values. Together, they
+                             contain every value yielded by the mapper
+                             for ``key``.
+        """
+        raise NotImplementedError
+
+    def combiner_batch(self, key, value_chunks):
+        """Re-define this instead of :py:meth:`combiner` to receive a key's
+        values in lists rather than one at a time.
+
+        Yields one or more tuples of ``(out_key, out_value)``
+
+        :param key: A key which was yielded by the mapper
+        :param value_chunks: A generator which yields lists of up to
+                             :py:attr:`BATCH_SIZE` values. Together, they
+                             contain every value yielded by one mapper
+                             task/node for ``key``.
+        """
+        raise NotImplementedError
+
+    def mapper_combine(self, value1, value2):
+        """Re-define this to combine values for the same key inside the
+        mapper, before they're written out. This must be associative (the
+        order in which values are combined isn't defined). For example::
+
+            def mapper_combine(self, count1, count2):
+                return count1 + count2
+
+        Returns a single value.
+
+        The mapper keeps one combined value for each of the last
+        :py:attr:`MAPPER_COMBINE_SIZE` keys it has yielded; when it gets a
+        new key beyond that, it writes out the combined value for the
+        least recently used key. Everything else is written out after
+        :py:meth:`mapper_final`.
+
+        Lists and dicts (e.g. keys decoded from JSON) are combined too; we
+        look them up by an equivalent hashable value. Keys are only
+        combined if they have the same types, so ``1`` and ``True`` stay
+        separate. Keys that still can't be hashed (e.g. instances of
+        unhashable classes) are written out uncombined.
+
+        This is a memory-safe way to do "in-mapper combining"; it
+        increments ``hits`` and ``early flushes`` counters in the
+        ``In-mapper combining`` group so you can tell how well it's
+        working.
+        """
+        raise NotImplementedError
+
     def mapper_init(self):
         """Re-define this to define an action to run before the mapper
         processes any input.
@@ -362,6 +446,11 @@ class MRJob(MRJobLauncher):
 
         Commas in ``counter`` or ``group`` will be automatically replaced
         with semicolons (commas confuse Hadoop streaming).
+
+        While running a task, increments are added up in memory and only
+        written out every :py:attr:`COUNTER_FLUSH_COUNT` increments or
+        :py:attr:`COUNTER_FLUSH_INTERVAL` seconds, and when the task
+        finishes.
         """
         # don't allow people to pass in floats
         if not isinstance(amount, integer_types):
@@ -381,12 +470,49 @@ class MRJob(MRJobLauncher):
         group = group.replace(',', ';')
         counter = counter.replace(',', ';')
 
-        line = 'reporter:counter:%s,%s,%d\n' % (group, counter, amount)
-        if not isinstance(line, bytes):
-            line = line.encode('utf_8')
-
-        self.stderr.write(line)
-        self.stderr.flush()
+        if self._pending_counters is None:
+            # not running a task
+            self.stderr.write(_counter_line(group, counter, amount))
+            self.stderr.flush()
+            return
+
+        key = (group, counter)
+        self._pending_counters[key] = (
+            self._pending_counters.get(key, 0) + amount)
+        self._num_pending_increments += 1
+
+        if (self._num_pending_increments >= self.COUNTER_FLUSH_COUNT or
+                time.time() - self._counters_flushed_at >=
+                self.COUNTER_FLUSH_INTERVAL):
+            self._flush_counters()
+
+    def _start_aggregating_counters(self):
+        """Make :py:meth:`increment_counter` add up increments in memory,
+        rather than writing each one to stderr."""
+        self._pending_counters = {}
+        self._num_pending_increments = 0
+        self._counters_flushed_at = time.time()
+
+    def _stop_aggregating_counters(self):
+        """Write out pending counter increments, and go back to writing
+        each one as it happens."""
+        self._flush_counters()
+        self._pending_counters = None
+
+    def _flush_counters(self):
+        """Write all pending counter increments to stderr, one line
+        per counter."""
+        if self._pending_counters:
+            self.stderr.write(b''.join(
+                _counter_line(group, counter, amount)
+                for (group, counter), amount
+                in sorted(self._pending_counters.items())))
+            self.stderr.flush()
+
+            self._pending_counters.clear()
+
+        self._num_pending_increments = 0
+        self._counters_flushed_at = time.time()
 
     def set_status(self, msg):
         """Set the job status in hadoop streaming by printing to stderr.
@@ -472,10 +598,11 @@ class MRJob(MRJobLauncher):
             return super(MRJob, self)._runner_class()
 
     def _runner_kwargs(self):
-        """If we're building an inline runner, include mrjob_cls in kwargs."""
+        """If we're building an inline or local runner, include mrjob_cls
+        in kwargs."""
         kwargs = super(MRJob, self)._runner_kwargs()
 
-        if self._runner_class().alias == 'inline':
+        if self._runner_class().alias in ('inline', 'local'):
             kwargs = dict(mrjob_cls=self.__class__, **kwargs)
 
         return kwargs
@@ -502,24 +629,93 @@ class MRJob(MRJobLauncher):
         step = self._get_step(step_num, MRStep)
 
         mapper = step['mapper']
+        mapper_batch = step['mapper_batch']
+        mapper_combine = step['mapper_combine']
         mapper_init = step['mapper_init']
         mapper_final = step['mapper_final']
 
         # pick input and output protocol
-        read_lines, write_line = self._wrap_protocols(step_num, 'mapper')
+        read_lines, write_line, flush = self._wrap_protocols(
+            step_num, 'mapper')
+
+        if mapper_combine:
+            write_line, flush_combined = self._combine_in_mapper(
+                write_line, mapper_combine)
 
-        if mapper_init:
-            for out_key, out_value in mapper_init() or ():
-                write_line(out_key, out_value)
+        self._start_aggregating_counters()
 
-        # run the mapper on each line
-        for key, value in read_lines():
-            for out_key, out_value in mapper(key, value) or ():
-                write_line(out_key, out_value)
+        try:
+            if mapper_init:
+                for out_key, out_value in mapper_init() or ():
+                    write_line(out_key, out_value)
+
+            if mapper_batch:
+                # run the mapper on batches of lines
+                for pairs in _batches(read_lines(), self.BATCH_SIZE):
+                    for out_key, out_value in mapper_batch(pairs) or ():
+                        write_line(out_key, out_value)
+            else:
+                # run the mapper on each line
+                for key, value in read_lines():
+                    for out_key, out_value in mapper(key, value) or ():
+                        write_line(out_key, out_value)
+
+            if mapper_final:
+                for out_key, out_value in mapper_final() or ():
+                    write_line(out_key, out_value)
+
+            if mapper_combine:
+                flush_combined()
+        finally:
+            flush()
+            self._stop_aggregating_counters()
+
+    def _combine_in_mapper(self, write_line, combine):
+        """Wrap *write_line()* so that it combines values for the same key
+        with *combine()* (see :py:meth:`mapper_combine`).
+
+        Returns a tuple of ``(combine_line, flush_combined)``, where
+        ``flush_combined()`` writes out all remaining values and
+        increments counters.
+        """
+        max_keys = self.MAPPER_COMBINE_SIZE
+
+        # map from a hashable version of each key to (key, value), least
+        # recently used key first
+        combined = OrderedDict()
+
+        # can't use nonlocal in Python 2
+        stats = dict(hits=0, early_flushes=0)
+
+        def combine_line(key, value):
+            lookup_key = _hashable_key(key)
+            try:
+                seen = lookup_key in combined
+            except TypeError:  # some object we can't hash
+                write_line(key, value)
+                return
 
-        if mapper_final:
-            for out_key, out_value in mapper_final() or ():
-                write_line(out_key, out_value)
+            if seen:
+                value = combine(combined.pop(lookup_key)[1], value)
+                stats['hits'] += 1
+
+            combined[lookup_key] = (key, value)
+
+            if len(combined) > max_keys:
+                write_line(*combined.popitem(last=False)[1])
+                stats['early_flushes'] += 1
+
+        def flush_combined():
+            while combined:
+                write_line(*combined.popitem(last=False)[1])
+
+            self.increment_counter(
+                'In-mapper combining', 'hits', stats['hits'])
+            self.increment_counter(
+                'In-mapper combining', 'early flushes',
+                stats['early_flushes'])
+
+        return combine_line, flush_combined
 
     def run_reducer(self, step_num=0):
         """Run the reducer for the given step.
@@ -538,31 +734,42 @@ class MRJob(MRJobLauncher):
         step = self._get_step(step_num, MRStep)
 
         reducer = step['reducer']
+        reducer_batch = step['reducer_batch']
         reducer_init = step['reducer_init']
         reducer_final = step['reducer_final']
         if reducer is None:
             raise ValueError('No reducer in step %d' % step_num)
 
         # pick input and output protocol
-        read_lines, write_line = self._wrap_protocols(step_num, 'reducer')
+        read_lines, write_line, flush = self._wrap_protocols(
+            step_num, 'reducer')
 
-        if reducer_init:
-            for out_key, out_value in reducer_init() or ():
-                write_line(out_key, out_value)
+        self._start_aggregating_counters()
 
-        # group all values of the same key together, and pass to the reducer
-        #
-        # be careful to use generators for everything, to allow for
-        # very large groupings of values
-        for key, kv_pairs in itertools.groupby(read_lines(),
-                                               key=lambda k_v: k_v[0]):
-            values = (v for k, v in kv_pairs)
-            for out_key, out_value in reducer(key, values) or ():
-                write_line(out_key, out_value)
-
-        if reducer_final:
-            for out_key, out_value in reducer_final() or ():
-                write_line(out_key, out_value)
+        try:
+            if reducer_init:
+                for out_key, out_value in reducer_init() or ():
+                    write_line(out_key, out_value)
+
+            # group all values of the same key together, and pass to the
+            # reducer
+            for key, values in self._group_by_key(
+                    step_num, 'reducer', read_lines):
+                if reducer_batch:
+                    output = reducer_batch(
+                        key, _batches(values, self.BATCH_SIZE))
+                else:
+                    output = reducer(key, values)
+
+                for out_key, out_value in output or ():
+                    write_line(out_key, out_value)
+
+            if reducer_final:
+                for out_key, out_value in reducer_final() or ():
+                    write_line(out_key, out_value)
+        finally:
+            flush()
+            self._stop_aggregating_counters()
 
     def run_combiner(self, step_num=0):
         """Run the combiner for the given step.
@@ -581,31 +788,42 @@ class MRJob(MRJobLauncher):
         step = self._get_step(step_num, MRStep)
 
         combiner = step['combiner']
+        combiner_batch = step['combiner_batch']
         combiner_init = step['combiner_init']
         combiner_final = step['combiner_final']
         if combiner is None:
             raise ValueError('No combiner in step %d' % step_num)
 
         # pick input and output protocol
-        read_lines, write_line = self._wrap_protocols(step_num, 'combiner')
-
-        if combiner_init:
-            for out_key, out_value in combiner_init() or ():
-                write_line(out_key, out_value)
+        read_lines, write_line, flush = self._wrap_protocols(
+            step_num, 'combiner')
 
-        # group all values of the same key together, and pass to the combiner
-        #
-        # be careful to use generators for everything, to allow for
-        # very large groupings of values
-        for key, kv_pairs in itertools.groupby(read_lines(),
-                                               key=lambda k_v1: k_v1[0]):
-            values = (v for k, v in kv_pairs)
-            for out_key, out_value in combiner(key, values) or ():
-                write_line(out_key, out_value)
+        self._start_aggregating_counters()
 
-        if combiner_final:
-            for out_key, out_value in combiner_final() or ():
-                write_line(out_key, out_value)
+        try:
+            if combiner_init:
+                for out_key, out_value in combiner_init() or ():
+                    write_line(out_key, out_value)
+
+            # group all values of the same key together, and pass to the
+            # combiner
+            for key, values in self._group_by_key(
+                    step_num, 'combiner', read_lines):
+                if combiner_batch:
+                    output = combiner_batch(
+                        key, _batches(values, self.BATCH_SIZE))
+                else:
+                    output = combiner(key, values)
+
+                for out_key, out_value in output or ():
+                    write_line(out_key, out_value)
+
+            if combiner_final:
+                for out_key, out_value in combiner_final() or ():
+                    write_line(out_key, out_value)
+        finally:
+            flush()
+            self._stop_aggregating_counters()
 
     def run_spark(self, step_num):
         """Run the Spark code for the given step.
@@ -643,11 +861,49 @@ class MRJob(MRJobLauncher):
         self.stdout.write(b'\n')
 
     def _steps_desc(self):
+        json_backend = self._json_backend()
+
         step_descs = []
         for step_num, step in enumerate(self.steps()):
-            step_descs.append(step.description(step_num))
+            step_desc = step.description(step_num)
+
+            # tell the runner which JSON library every task should use
+            if json_backend and step_desc['type'] == 'streaming':
+                step_desc['json_backend'] = json_backend
+
+            step_descs.append(step_desc)
         return step_descs
 
+    def _json_backend(self):
+        """If this job uses :py:class:`~mrjob.protocol.AutoJSONProtocol`
+        or :py:class:`~mrjob.protocol.AutoJSONValueProtocol`, the name of
+        the JSON library they should use (from :option:`--json-backend`,
+        or picked now). Otherwise, ``None``."""
+        protocols = [self.input_protocol(),
+                     self.internal_protocol(),
+                     self.output_protocol()]
+
+        for p in protocols:
+            if isinstance(p, (AutoJSONProtocol, AutoJSONValueProtocol)):
+                return self.options.json_backend or p.backend
+
+        return None
+
+    def _use_json_backend(self, protocol):
+        """If *protocol* is an :py:class:`~mrjob.protocol.AutoJSONProtocol`
+        or :py:class:`~mrjob.protocol.AutoJSONValueProtocol`, make sure it
+        uses the JSON library the runner told us to with
+        :option:`--json-backend`."""
+        json_backend = self.options.json_backend
+
+        if (json_backend and
+                isinstance(protocol,
+                           (AutoJSONProtocol, AutoJSONValueProtocol)) and
+                protocol.backend != json_backend):
+            return protocol.__class__(backend=json_backend)
+        else:
+            return protocol
+
     @classmethod
     def mr_job_script(cls):
         """Path of this script. This returns the file containing
@@ -676,8 +932,8 @@ class MRJob(MRJobLauncher):
                 for line in self.stdin:
                     yield line
             else:
-                with open(path, 'rb') as f:
-                    for line in to_lines(decompress(f, path)):
+                with open_input(path) as f:
+                    for line in f:
                         yield line
 
     def _wrap_protocols(self, step_num, step_type):
@@ -686,12 +942,15 @@ class MRJob(MRJobLauncher):
         trigger a counter rather than an exception unless --strict-protocols
         is set.
 
-        Returns a tuple of ``(read_lines, write_line)``
+        Returns a tuple of ``(read_lines, write_line, flush)``
 
         ``read_lines()`` is a function that reads lines from input, decodes
             them, and yields key, value pairs.
         ``write_line()`` is a function that takes key and value as args,
             encodes them, and writes a line to output.
+        ``flush()`` is a function that writes any output that
+            ``write_line()`` is still holding on to (see
+            :py:attr:`OUTPUT_BUFFER_SIZE`).
 
         :param step_num: which step to run (e.g. 0)
         :param step_type: ``'mapper'``, ``'reducer'``, or ``'combiner'`` from
@@ -701,14 +960,94 @@ class MRJob(MRJobLauncher):
 
         def read_lines():
             for line in self._read_input():
-                key, value = read(line.rstrip(b'\r\n'))
-                yield key, value
+                yield read(line.rstrip(b'\r\n'))
+
+        buffer_size = self.OUTPUT_BUFFER_SIZE
+
+        if not buffer_size:
+            def write_line(key, value):
+                self.stdout.write(write(key, value) + b'\n')
+
+            def flush():
+                pass
+
+            return read_lines, write_line, flush
+
+        # encoded lines waiting to be written to stdout. Counters and status
+        # messages go to stderr, which is a separate stream, so holding
+        # onto output doesn't change what Hadoop sees
+        buf = bytearray()
 
         def write_line(key, value):
-            self.stdout.write(write(key, value))
-            self.stdout.write(b'\n')
+            buf.extend(write(key, value))
+            buf.extend(b'\n')
+
+            if len(buf) >= buffer_size:
+                flush()
+
+        def flush():
+            if buf:
+                self.stdout.write(bytes(buf))
+                del buf[:]
+
+        return read_lines, write_line, flush
+
+    def _group_by_key(self, step_num, step_type, read_lines):
+        """Group the input for the given step by key, yielding tuples of
+        ``(key, values)``, where *values* is a generator.
+
+        If the protocol has ``read_key()`` and ``read_value()`` methods
+        (see :py:meth:`mrjob.protocol.JSONProtocol.read_key`), each value is
+        only decoded when *values* gets to it, so values that the reducer
+        skips are never decoded. Otherwise, we just group the output of
+        *read_lines()* (from :py:meth:`_wrap_protocols`).
+        """
+        read_key, read_value = self._pick_lazy_read_funcs(
+            step_num, step_type)
+
+        # be careful to use generators for everything, to allow for
+        # very large groupings of values
+        if read_key:
+            key_and_raw_values = (
+                read_key(line.rstrip(b'\r\n'))
+                for line in self._read_input())
+
+            for key, pairs in itertools.groupby(
+                    key_and_raw_values, key=lambda k_v: k_v[0]):
+                yield key, (read_value(v) for k, v in pairs)
+        else:
+            for key, pairs in itertools.groupby(
+                    read_lines(), key=lambda k_v: k_v[0]):
+                yield key, (v for k, v in pairs)
+
+    def _pick_lazy_read_funcs(self, step_num, step_type):
+        """Return the ``read_key()`` and ``read_value()`` methods of the
+        protocol that :py:meth:`pick_protocols` would use to read input,
+        or ``(None, None)`` if we can't use them.
+
+        We only use them if the protocol defines ``read_key()`` at least
+        as specifically as ``read()``, so that a subclass that
+        re-defines ``read()`` isn't bypassed.
+        """
+        read, _ = self.pick_protocols(step_num, step_type)
 
-        return read_lines, write_line
+        # pick_protocols() may have been overridden to return some other
+        # kind of function
+        protocol = getattr(read, '__self__', None)
+        if not (protocol is not None and
+                read.__name__ == 'read' and
+                hasattr(protocol, 'read_key') and
+                hasattr(protocol, 'read_value')):
+            return None, None
+
+        read_cls = _defining_class(type(protocol), 'read')
+        read_key_cls = _defining_class(type(protocol), 'read_key')
+
+        if not (read_cls and read_key_cls and
+                issubclass(read_key_cls, read_cls)):
+            return None, None
+
+        return protocol.read_key, protocol.read_value
 
     def _step_key(self, step_num, step_type):
         return '%d-%s' % (step_num, step_type)
@@ -760,8 +1099,8 @@ class MRJob(MRJobLauncher):
             # format of the data.
             # Combiners for non-script substeps can't use protocols, so this
             # function will just give us RawValueProtocol() in that case.
-            previous_mapper_output = self._mapper_output_protocol(
-                step_num, step_map)
+            previous_mapper_output = self._use_json_backend(
+                self._mapper_output_protocol(step_num, step_map))
             return previous_mapper_output, previous_mapper_output
         else:
             step_key = self._step_key(step_num, step_type)
@@ -780,7 +1119,7 @@ class MRJob(MRJobLauncher):
                 read = self.input_protocol()
             else:
                 read = self.internal_protocol()
-            return read, write
+            return self._use_json_backend(read), self._use_json_backend(write)
 
     def pick_protocols(self, step_num, step_type):
         """Pick the protocol classes to use for reading and writing for the
@@ -913,6 +1252,37 @@ class MRJob(MRJobLauncher):
     #: See :py:data:`mrjob.protocol` for the full list of protocols.
     OUTPUT_PROTOCOL = JSONProtocol
 
+    #: Number of bytes of encoded output to collect before writing it
+    #: to :py:attr:`stdout` in one go (output is always written out when
+    #: a task finishes, even if it raises an exception). Default: 64 KiB.
+    #:
+    #: Writing output in large chunks saves a lot of time for tasks that
+    #: emit many small lines. Set this to 0 to write each line as soon as
+    #: it's emitted (for example, if another process needs to read this
+    #: job's output as it's written).
+    OUTPUT_BUFFER_SIZE = 64 * 1024
+
+    #: Maximum number of records to pass to :py:meth:`mapper_batch` at a
+    #: time, and maximum number of values in each list passed to
+    #: :py:meth:`reducer_batch` and :py:meth:`combiner_batch`.
+    #: Default: 1000.
+    BATCH_SIZE = 1000
+
+    #: Maximum number of keys to hold combined values for in memory if
+    #: you define :py:meth:`mapper_combine`. Default: 10000.
+    MAPPER_COMBINE_SIZE = 10000
+
+    #: While running a task, write out counters (see
+    #: :py:meth:`increment_counter`) after this many increments.
+    #: Default: 10000. Set this to 1 to write out every increment as it
+    #: happens.
+    COUNTER_FLUSH_COUNT = 10000
+
+    #: While running a task, write out counters if it's been this many
+    #: seconds since we last wrote them out. (We only check when
+    #: :py:meth:`increment_counter` is called.) Default: 10.
+    COUNTER_FLUSH_INTERVAL = 10
+
     def parse_output(self, chunks):
         """Parse the final output of this MRJob (as a stream of byte chunks)
         into a stream of ``(key, value)``.
@@ -1046,6 +1416,11 @@ class MRJob(MRJobLauncher):
 
         You probably don't need to re-define this; it's just here for
         completeness.
+
+        The ``local`` and ``inline`` runners simulate ``HashPartitioner``
+        (the default) and ``KeyFieldBasedPartitioner`` (which reads
+        ``mapreduce.partition.keypartitioner.options`` from
+        :py:attr:`JOBCONF`); they can't run other partitioners.
         """
         return self.PARTITIONER
 
@@ -1135,5 +1510,54 @@ class MRJob(MRJobLauncher):
         return self.SORT_VALUES
 
 
+def _counter_line(group, counter, amount):
+    """Encode a line that tells Hadoop Streaming to increment a counter."""
+    line = 'reporter:counter:%s,%s,%d\n' % (group, counter, amount)
+    if not isinstance(line, bytes):
+        line = line.encode('utf_8')
+
+    return line
+
+
+def _defining_class(cls, attr):
+    """Return the class in *cls*'s MRO that defines *attr*, or ``None``."""
+    for c in getattr(cls, '__mro__', ()):
+        if attr in c.__dict__:
+            return c
+
+    return None
+
+
+def _hashable_key(key):
+    """Convert *key* to something we can use as a dictionary key, which
+    only compares equal to keys of the same type (at every level), since
+    protocols may write those differently. For example, ``1``, ``1.0``,
+    and ``True`` all differ, as do ``[1]``, ``[True]``, and ``(1,)``."""
+    if isinstance(key, (list, tuple)):
+        return (type(key), tuple(_hashable_key(x) for x in key))
+    elif isinstance(key, dict):
+        return (type(key), frozenset(
+            (_hashable_key(k), _hashable_key(v)) for k, v in key.items()))
+    elif isinstance(key, (set, frozenset)):
+        return (type(key), frozenset(_hashable_key(x) for x in key))
+    elif isinstance(key, float):
+        # 0.0 == -0.0, but they're written differently
+        return (float, repr(key))
+    else:
+        return (type(key), key)
+
+
+def _batches(iterable, size):
+    """Yield lists of up to *size* items from *iterable*."""
+    iterator = iter(iterable)
+
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+
+        yield batch
+
+
 if __name__ == '__main__':
     MRJob.run()
@@ -19,21 +19,33 @@ jobs on all CPUs."""
 import logging
 import os
 import platform
+import shutil
+import traceback
 from functools import partial
 from multiprocessing import Pool
 from subprocess import CalledProcessError
+from subprocess import PIPE
+from subprocess import Popen
 from subprocess import check_call
+from threading import Thread
 
 from mrjob.bin import MRJobBinRunner
 from mrjob.logs.errors import _format_error
 from mrjob.logs.task import _parse_task_stderr
 from mrjob.sim import SimMRJobRunner
-from mrjob.sim import _sort_lines_in_memory
+from mrjob.sim import _open_intermediate
+from mrjob.sim import _read_lines
+from mrjob.sim import _sort_lines
 from mrjob.step import StepFailedException
 from mrjob.util import cmd_line
+from mrjob.util import save_current_environment
+from mrjob.util import save_cwd
 
 log = logging.getLogger(__name__)
 
+# how many bytes at a time to pipe to tasks that read from split readers
+_PIPE_BUFFER_SIZE = 1024 * 1024
+
 
 class _TaskFailedException(StepFailedException):
     """Extension of :py:class:`~mrjob.step.StepFailedException` that
@@ -66,9 +78,10 @@ class LocalMRJobRunner(SimMRJobRunner, MRJobBinRunner):
 
     OPT_NAMES = SimMRJobRunner.OPT_NAMES | MRJobBinRunner.OPT_NAMES | {
         'sort_bin',
+        'warm_workers',
     }
 
-    def __init__(self, **kwargs):
+    def __init__(self, mrjob_cls=None, **kwargs):
         """Arguments to this constructor may also appear in :file:`mrjob.conf`
         under ``runners/local``.
 
@@ -79,14 +92,42 @@ class LocalMRJobRunner(SimMRJobRunner, MRJobBinRunner):
         * *cmdenv* is combined with :py:func:`~mrjob.conf.combine_local_envs`
         * *python_bin* defaults to ``sys.executable`` (the current python
           interpreter)
-        * *hadoop_input_format*, *hadoop_output_format*,
-          and *partitioner* are ignored because they
-          require Java. If you need to test these, consider starting up a
-          standalone Hadoop instance and running your job with ``-r hadoop``.
+        * *hadoop_input_format* and *hadoop_output_format* are ignored
+          because they require Java. If you need to test these, consider
+          starting up a standalone Hadoop instance and running your job
+          with ``-r hadoop``.
+        * *partitioner* is simulated if it's ``HashPartitioner`` or
+          ``KeyFieldBasedPartitioner``; other partitioners require Java,
+          so we use ``HashPartitioner`` instead.
+
+        *mrjob_cls* is the job's class, which tasks run in directly if
+        :mrjob-opt:`warm_workers` is set.
         """
         super(LocalMRJobRunner, self).__init__(**kwargs)
 
+        self._mrjob_cls = mrjob_cls
+
+        # worker processes, shared by every step (see _run_multiple())
+        self._pool = None
+        self._pool_size = None
+
+        if self._opts['warm_workers']:
+            if self._mrjob_cls is None:
+                log.warning("can't use warm workers without the job class;"
+                            " running tasks in subprocesses")
+            elif self._setup:
+                log.warning("warm workers can't run setup commands or"
+                            " py_files; running tasks in subprocesses")
+
     def _invoke_task_func(self, task_type, step_num, task_num):
+        if self._can_run_in_warm_worker(step_num, task_type):
+            # stdin, stdout, stderr, wd, and env will be passed in later
+            return partial(
+                _invoke_task_in_warm_worker,
+                task_type, step_num, task_num,
+                self._mrjob_cls, self._args_for_task(step_num, task_type),
+                self._num_steps())
+
         args = self._substep_args(step_num, task_type)
         num_steps = self._num_steps()
 
@@ -96,9 +137,34 @@ class LocalMRJobRunner(SimMRJobRunner, MRJobBinRunner):
             task_type, step_num, task_num,
             args, num_steps)
 
+    def _can_run_in_warm_worker(self, step_num, task_type):
+        """Can we run the given task directly inside a worker process,
+        rather than starting a new interpreter?"""
+        if not (self._opts['warm_workers'] and self._mrjob_cls):
+            return False
+
+        if self._setup:
+            return False
+
+        substep = self._get_step(step_num)[task_type]
+
+        return substep['type'] == 'script' and 'pre_filter' not in substep
+
+    def _run(self):
+        try:
+            super(LocalMRJobRunner, self)._run()
+        finally:
+            self._close_pool()
+
     def _run_multiple(self, funcs, num_processes=None):
-        """Use multiprocessing to run in parallel."""
-        pool = Pool(processes=num_processes)
+        """Use multiprocessing to run in parallel.
+
+        By default, run at most :mrjob-opt:`num_cores` functions at once.
+
+        We keep the same worker processes around between calls, until
+        the job finishes (see :py:meth:`_close_pool`).
+        """
+        pool = self._get_pool(num_processes or self._opts['num_cores'])
 
         try:
             results = [
@@ -108,18 +174,48 @@ class LocalMRJobRunner(SimMRJobRunner, MRJobBinRunner):
 
             for result in results:
                 result.get()
-
-        # make sure that the pool (and its file descriptors, etc.)
-        # don't stay open. This doesn't matter much for individual jobs,
-        # but it makes our automated tasks run out of file descriptors.
-
-            pool.close()
         except:
             # if there's an error in one task, terminate all others
-            pool.terminate()
+            self._close_pool(terminate=True)
             raise
+
+    def _get_pool(self, processes):
+        """Get our :py:class:`~multiprocessing.Pool`, creating it (or
+        replacing it, if it's the wrong size) if need be."""
+        if self._pool is not None and self._pool_size != processes:
+            self._close_pool()
+
+        if self._pool is None:
+            self._pool = Pool(processes=processes)
+            self._pool_size = processes
+
+        return self._pool
+
+    def _close_pool(self, terminate=False):
+        """Shut down our worker processes, if any. If *terminate* is true,
+        don't wait for running tasks to finish.
+
+        Make sure that the pool (and its file descriptors, etc.) don't stay
+        open. This doesn't matter much for individual jobs, but it makes our
+        automated tests run out of file descriptors.
+        """
+        if self._pool is None:
+            return
+
+        try:
+            if terminate:
+                self._pool.terminate()
+            else:
+                self._pool.close()
         finally:
-            pool.join()
+            self._pool.join()
+            self._pool = None
+            self._pool_size = None
+
+    def cleanup(self, mode=None):
+        self._close_pool(terminate=True)
+
+        super(LocalMRJobRunner, self).cleanup(mode=mode)
 
     def _log_cause_of_error(self, ex):
         if not isinstance(ex, _TaskFailedException):
@@ -155,16 +251,20 @@ class LocalMRJobRunner(SimMRJobRunner, MRJobBinRunner):
         return super(LocalMRJobRunner, self)._default_python_bin(
             local=True)
 
-    def _sort_input_func(self):
+    def _sort_input_func(self, codec=None):
         """Try sorting with the :command:`sort` binary before falling
         back to in-memory sort."""
         if platform.system() == 'Windows':  # we assume Unix sort
-            return super(LocalMRJobRunner, self)._sort_input_func()
+            return super(LocalMRJobRunner, self)._sort_input_func(
+                codec=codec)
         else:
             return partial(
                 _sort_lines_with_sort_bin,
                 sort_bin=self._sort_bin(),
-                tmp_dir=self._opts['local_tmp_dir'])
+                sort_values=self._sort_values,
+                buffer_size=self._sort_buffer_size(),
+                tmp_dir=self._opts['local_tmp_dir'],
+                codec=codec)
 
     def _sort_bin(self):
         """The binary to use to sort input.
@@ -188,12 +288,21 @@ def _invoke_task_in_subprocess(
         task_type, step_num, task_num,
         args, num_steps,
         stdin, stdout, stderr, wd, env):
-    """A pickleable function that invokes a task in a subprocess."""
+    """A pickleable function that invokes a task in a subprocess.
+
+    *stdin* and *stdout* may be objects that aren't real files (see
+    :py:class:`~mrjob.sim._SplitReader` and
+    :py:class:`~mrjob.sim._LineSorter`), in which case we pipe data
+    to and from the subprocess."""
     log.debug('> %s' % cmd_line(args))
 
     try:
-        check_call(args, stdin=stdin, stdout=stdout, stderr=stderr,
-                   cwd=wd, env=env)
+        if hasattr(stdin, 'fileno') and hasattr(stdout, 'fileno'):
+            check_call(args, stdin=stdin, stdout=stdout, stderr=stderr,
+                       cwd=wd, env=env)
+        else:
+            _call_with_pipes(args, stdin=stdin, stdout=stdout,
+                             stderr=stderr, cwd=wd, env=env)
     except Exception as ex:
         raise _TaskFailedException(
             reason=str(ex),
@@ -204,6 +313,117 @@ def _invoke_task_in_subprocess(
         )
 
 
+def _invoke_task_in_warm_worker(
+        task_type, step_num, task_num,
+        mrjob_cls, args, num_steps,
+        stdin, stdout, stderr, wd, env):
+    """A pickleable function that runs a task by instantiating *mrjob_cls*
+    inside the current process (normally a pool worker), so we don't
+    have to start a new interpreter and re-import the job for every task.
+
+    If the task fails, its traceback goes to *stderr*, like it would
+    if the task were running in a subprocess."""
+    log.debug('running %s inside worker: %s' % (
+        mrjob_cls.__name__, cmd_line(args)))
+
+    try:
+        with save_current_environment(), save_cwd():
+            os.environ.update(env)
+            os.chdir(wd)
+
+            task = mrjob_cls(args=args)
+            task.sandbox(stdin=stdin, stdout=stdout, stderr=stderr)
+
+            task.execute()
+    except SystemExit as ex:
+        # don't let the task take the worker down with it
+        if not ex.code:
+            return
+        reason = 'task exited with status %r' % ex.code
+    except Exception as ex:
+        tb = traceback.format_exc()
+        if not isinstance(tb, bytes):
+            tb = tb.encode('utf_8')
+        stderr.write(tb)
+
+        reason = str(ex)
+    else:
+        return
+
+    raise _TaskFailedException(
+        reason=reason,
+        step_num=step_num,
+        num_steps=num_steps,
+        task_type=task_type,
+        task_num=task_num,
+    )
+
+
+def _call_with_pipes(args, stdin, stdout, **kwargs):
+    """Like :py:func:`~subprocess.check_call`, except that *stdin* can
+    be any object with a ``read()`` method or any iterable of lines, and
+    *stdout* can be any object with a ``write()`` method."""
+    pipe_stdin = not hasattr(stdin, 'fileno')
+    pipe_stdout = not hasattr(stdout, 'fileno')
+
+    proc = Popen(args,
+                 stdin=(PIPE if pipe_stdin else stdin),
+                 stdout=(PIPE if pipe_stdout else stdout),
+                 **kwargs)
+
+    feeder = None
+    feeder_errors = []
+
+    if pipe_stdin:
+        if pipe_stdout:
+            # feed input in another thread, so the task can't block
+            # writing output while we're blocked writing its input
+            def feed():
+                try:
+                    _feed_stdin(stdin, proc.stdin)
+                except Exception as ex:
+                    feeder_errors.append(ex)
+
+            feeder = Thread(target=feed)
+            feeder.start()
+        else:
+            _feed_stdin(stdin, proc.stdin)
+
+    if pipe_stdout:
+        shutil.copyfileobj(proc.stdout, stdout, _PIPE_BUFFER_SIZE)
+        proc.stdout.close()
+
+    if feeder:
+        feeder.join()
+
+    returncode = proc.wait()
+
+    if feeder_errors:
+        raise feeder_errors[0]
+
+    if returncode:
+        raise CalledProcessError(returncode, args)
+
+
+def _feed_stdin(stdin, proc_stdin):
+    """Copy *stdin* (a file-like object or an iterable of lines)
+    into *proc_stdin*, and then close it."""
+    try:
+        if hasattr(stdin, 'read'):
+            shutil.copyfileobj(stdin, proc_stdin, _PIPE_BUFFER_SIZE)
+        else:
+            proc_stdin.writelines(stdin)
+    except IOError:
+        # task stopped reading input early; its exit status will tell
+        # us whether that's a problem
+        pass
+    finally:
+        try:
+            proc_stdin.close()
+        except IOError:
+            pass
+
+
 def _pickle_safe(func):
     """Call no-args function *func*, returning *None* and ensuring
     that any exception raised is pickleable."""
@@ -216,14 +436,20 @@ def _pickle_safe(func):
 
 
 def _sort_lines_with_sort_bin(input_paths, output_path, sort_bin,
-                              sort_values=False, tmp_dir=None):
+                              sort_values=False, buffer_size=None,
+                              tmp_dir=None, codec=None):
     """Sort lines the given *input_paths* into *output_path*,
-    using *sort_bin*. If there is a problem, fall back to in-memory sort.
+    using *sort_bin*. If there is a problem, fall back to sorting in Python
+    (see :py:func:`~mrjob.sim._sort_lines`).
 
     This is a helper for :py:meth:`LocalMRJobRunner._sort_input_func`.
 
     *tmp_dir* determines the value of :envvar:`$TMP` and :envvar:`$TMPDIR`
-    that *sort_bin* sees.
+    that *sort_bin* sees, and is also where the fallback sort
+    writes sorted chunks of more than *buffer_size* bytes.
+
+    If *codec* is set, input and output files are compressed with it, so
+    we pipe them through *sort_bin* rather than letting it read them.
     """
     if input_paths:
         env = os.environ.copy()
@@ -236,19 +462,28 @@ def _sort_lines_with_sort_bin(input_paths, output_path, sort_bin,
         env['TMP'] = tmp_dir
         env['TMPDIR'] = tmp_dir
 
-        with open(output_path, 'wb') as output:
-            args = sort_bin + list(input_paths)
+        with _open_intermediate(output_path, 'wb', codec) as output:
+            if codec:
+                args = sort_bin
+            else:
+                args = sort_bin + list(input_paths)
             log.debug('> %s' % cmd_line(args))
 
             try:
-                check_call(args, stdout=output, env=env)
+                if codec:
+                    _call_with_pipes(args,
+                                     stdin=_read_lines(input_paths, codec),
+                                     stdout=output, env=env)
+                else:
+                    check_call(args, stdout=output, env=env)
                 return
             except CalledProcessError:
                 log.error(
-                    '`%s` failed, falling back to in-memory sort' %
+                    '`%s` failed, falling back to sorting in Python' %
                     cmd_line(sort_bin))
             except OSError:
                 log.error(
-                    'no sort binary, falling back to in-memory sort')
+                    'no sort binary, falling back to sorting in Python')
 
-    _sort_lines_in_memory(input_paths, output_path, sort_values=sort_values)
+    _sort_lines(input_paths, output_path, sort_values=sort_values,
+                buffer_size=buffer_size, tmp_dir=tmp_dir, codec=codec)
@@ -246,6 +246,13 @@ _STEP_OPTS = dict(
             help='run Spark code',
         ),
     ),
+    json_backend=(
+        ['--json-backend'],
+        dict(
+            help=('JSON library for AutoJSONProtocol and'
+                  ' AutoJSONValueProtocol to use (set by the runner)'),
+        ),
+    ),
     show_steps=(
         ['--steps'],
         dict(
@@ -397,6 +404,25 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    cat_output_buffer_size=dict(
+        switches=[
+            (['--cat-output-buffer-size'], dict(
+                help=('When downloading several output files at once, keep'
+                      ' about this many megabytes of downloaded output in'
+                      ' memory. Default is 64 MiB.'),
+                type=float,
+            )),
+        ],
+    ),
+    cat_output_threads=dict(
+        switches=[
+            (['--cat-output-threads'], dict(
+                help=('Number of output files to download at once when'
+                      ' streaming output. Default is 1 (one at a time).'),
+                type=int,
+            )),
+        ],
+    ),
     check_input_paths=dict(
         switches=[
             (['--check-input-paths'], dict(
@@ -468,6 +494,21 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    cloud_upload_cache=dict(
+        switches=[
+            (['--cloud-upload-cache'], dict(
+                action='store_true',
+                help=('Upload local files to a shared cache/ directory in'
+                      ' cloud_tmp_dir, named by their MD5 sum, and reuse'
+                      ' them in later jobs'),
+            )),
+            (['--no-cloud-upload-cache'], dict(
+                action='store_false',
+                help=("Upload local files into the job's own temp directory"
+                      ' (the default)'),
+            )),
+        ],
+    ),
     cloud_upload_part_size=dict(
         cloud_role='launch',
         switches=[
@@ -479,6 +520,15 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    cloud_upload_threads=dict(
+        switches=[
+            (['--cloud-upload-threads'], dict(
+                help=('Number of local files (scripts, archives, etc.) to'
+                      ' upload to cloud storage at once. Default is 8.'),
+                type=int,
+            )),
+        ],
+    ),
     cluster_id=dict(
         switches=[
             (['--cluster-id'], dict(
@@ -816,6 +866,16 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    num_cores=dict(
+        switches=[
+            (['--num-cores'], dict(
+                help=('Maximum number of tasks to run at one time. Default is'
+                      ' the number of CPUs on your machine for the local'
+                      ' runner, and 1 for the inline runner.'),
+                type=int,
+            )),
+        ],
+    ),
     num_core_instances=dict(
         cloud_role='launch',
         switches=[
@@ -842,6 +902,21 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    pipe_to_combiner=dict(
+        switches=[
+            (['--pipe-to-combiner'], dict(
+                action='store_true',
+                help=('Sort mapper output in memory and pipe it straight'
+                      ' to the combiner, rather than writing it to disk'
+                      ' first (local and inline runners only)'),
+            )),
+            (['--no-pipe-to-combiner'], dict(
+                action='store_false',
+                help=('Write mapper output to disk and sort it into the'
+                      " combiner's input file (the default)"),
+            )),
+        ],
+    ),
     pool_clusters=dict(
         cloud_role='launch',
         switches=[
@@ -946,6 +1021,18 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    skew_report=dict(
+        switches=[
+            (['--skew-report'], dict(
+                help=('After each step, report the N keys with the most'
+                      ' records, how much input each reducer got, and how'
+                      ' long each task took (local and inline runners'
+                      ' only)'),
+                metavar='N',
+                type=int,
+            )),
+        ],
+    ),
     sort_bin=dict(
         combiner=combine_cmds,
         switches=[
@@ -955,6 +1042,16 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    sort_buffer_size=dict(
+        switches=[
+            (['--sort-buffer-size'], dict(
+                help=('Maximum number of megabytes of lines to sort in'
+                      ' memory at once when sorting in Python. Larger inputs'
+                      ' are sorted in chunks and merged. Default is 100 MiB.'),
+                type=float,
+            )),
+        ],
+    ),
     spark_args=dict(
         combiner=combine_lists,
         switches=[
@@ -1153,6 +1250,35 @@ _RUNNER_OPTS = dict(
             )),
         ],
     ),
+    warm_workers=dict(
+        switches=[
+            (['--warm-workers'], dict(
+                action='store_true',
+                help=('Run tasks inside the local runner\'s worker'
+                      ' processes, rather than starting a new Python'
+                      ' interpreter for each task'),
+            )),
+            (['--no-warm-workers'], dict(
+                action='store_false',
+                help=('Run each task in its own subprocess (the default)'),
+            )),
+        ],
+    ),
+    zero_copy_splits=dict(
+        switches=[
+            (['--zero-copy-splits'], dict(
+                action='store_true',
+                help=('Have mappers read uncompressed input directly from'
+                      ' the original files rather than making a copy of'
+                      ' each input split (local and inline runners only)'),
+            )),
+            (['--no-zero-copy-splits'], dict(
+                action='store_false',
+                help=('Copy each input split to its own file before'
+                      ' running mappers (the default)'),
+            )),
+        ],
+    ),
     zone=dict(
         cloud_role='launch',
         switches=[
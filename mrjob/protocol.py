@@ -31,6 +31,7 @@ For more information, see :ref:`job-protocols` and :ref:`writing-protocols`.
 # don't add imports here that aren't part of the standard Python library,
 # since MRJobs need to run in Amazon's generic EMR environment
 import json
+import marshal
 
 try:
     import cPickle as pickle  # Python 2 only
@@ -94,6 +95,26 @@ class _KeyCachingProtocol(object):
             self._last_key_decoded = self._loads(raw_key)
         return (self._last_key_decoded, self._loads(raw_value))
 
+    def read_key(self, line):
+        """Decode only the key from a line of input.
+
+        :return: A tuple of ``(key, raw_value)``, where *raw_value* can be
+                 passed to :py:meth:`read_value` to get the value.
+
+        Reducers and combiners use this (and :py:meth:`read_value`)
+        to avoid decoding values they never look at.
+        """
+        raw_key, raw_value = line.split(b'\t', 1)
+
+        if raw_key != self._last_key_encoded:
+            self._last_key_encoded = raw_key
+            self._last_key_decoded = self._loads(raw_key)
+        return (self._last_key_decoded, raw_value)
+
+    def read_value(self, raw_value):
+        """Decode a raw value returned by :py:meth:`read_key`."""
+        return self._loads(raw_value)
+
     def write(self, key, value):
         """Encode a key and value.
 
@@ -284,6 +305,151 @@ else:
     JSONValueProtocol = StandardJSONValueProtocol
 
 
+# JSON backends, fastest first (see tests/benchmarks/protocols.py), and
+# the protocols that use them
+_JSON_BACKENDS = [
+    ('ujson', UltraJSONProtocol, UltraJSONValueProtocol),
+    ('rapidjson', RapidJSONProtocol, RapidJSONValueProtocol),
+    ('simplejson', SimpleJSONProtocol, SimpleJSONValueProtocol),
+    ('json', StandardJSONProtocol, StandardJSONValueProtocol),
+]
+
+# data that a JSON backend has to encode and decode exactly for
+# pick_json_backend() to use it: unicode (including characters outside the
+# BMP and JavaScript line terminators), big ints, and floats that need
+# all 17 digits of precision
+_JSON_CONFORMANCE_DATA = [
+    u'Qu\xe9bec \u1ede \U0001f600 \u2028\u2029 \x00\x1f',
+    [0, -1, 2 ** 31, 2 ** 53 + 1, 2 ** 63 - 1, 2 ** 63, 2 ** 64 + 1,
+     -2 ** 63 - 1, 10 ** 30],
+    [0.1, -0.5, 1.0, 1e-7, 1e22, 1.7976931348623157e+308,
+     1.0000000000000002, 0.30000000000000004, 3.141592653589793],
+    {u'\xe9': [None, True, False, {u'': 1.5}]},
+]
+
+# map from backend name to whether it passed the conformance check
+_json_backend_ok = {}
+
+
+def _json_backend_installed(name):
+    if name == 'ujson':
+        return bool(ujson)
+    elif name == 'rapidjson':
+        # rapidjson is supposed to be Python 3+ only
+        return bool(rapidjson) and not PY2
+    elif name == 'simplejson':
+        return bool(simplejson)
+    else:
+        return name == 'json'
+
+
+def _json_protocols(name):
+    """Get the ``(protocol, value_protocol)`` classes for the given JSON
+    backend, or raise :py:class:`ValueError`."""
+    for backend_name, protocol, value_protocol in _JSON_BACKENDS:
+        if backend_name == name:
+            if not _json_backend_installed(name):
+                raise ValueError('JSON backend %r is not installed' % name)
+            return protocol, value_protocol
+
+    raise ValueError('Unknown JSON backend: %r' % name)
+
+
+def _same_json(a, b):
+    """Like ``a == b``, but also make sure types match (``1`` is not
+    ``1.0``)."""
+    if type(a) != type(b):
+        return False
+    elif isinstance(a, list):
+        return len(a) == len(b) and all(
+            _same_json(x, y) for x, y in zip(a, b))
+    elif isinstance(a, dict):
+        return (sorted(a) == sorted(b) and
+                all(_same_json(a[k], b[k]) for k in a))
+    else:
+        return a == b
+
+
+def json_backend_conforms(name):
+    """Does the given (installed) JSON backend encode and decode unicode,
+    big ints, and floats exactly, with both the key/value and value-only
+    protocol? The result is cached."""
+    if name not in _json_backend_ok:
+        protocol_cls, value_protocol_cls = _json_protocols(name)
+
+        try:
+            protocol = protocol_cls()
+            value_protocol = value_protocol_cls()
+
+            _json_backend_ok[name] = all(
+                _same_json(list(protocol.read(protocol.write(data, data))),
+                           [data, data]) and
+                _same_json(value_protocol.read(
+                    value_protocol.write(None, data))[1], data)
+                for data in _JSON_CONFORMANCE_DATA)
+        except Exception:
+            _json_backend_ok[name] = False
+
+    return _json_backend_ok[name]
+
+
+def pick_json_backend():
+    """Return the name of the fastest JSON backend that is installed and
+    passes :py:func:`json_backend_conforms`: one of ``'ujson'``,
+    ``'rapidjson'``, ``'simplejson'``, or ``'json'``.
+
+    This is what :py:class:`AutoJSONProtocol` and
+    :py:class:`AutoJSONValueProtocol` use when the job is launched.
+    """
+    for name, _, _ in _JSON_BACKENDS:
+        if _json_backend_installed(name) and json_backend_conforms(name):
+            return name
+
+    return 'json'
+
+
+class AutoJSONProtocol(object):
+    """Encode ``(key, value)`` as two JSONs separated by a tab, using the
+    fastest JSON library that encodes and decodes data correctly (see
+    :py:func:`pick_json_backend`).
+
+    When you use this protocol, the library is picked once, when your
+    job is launched, and recorded in the job's steps (as
+    ``json_backend``). Every task uses that library, so that keys are
+    always encoded the same way. If a task runs somewhere that library
+    isn't installed, it fails, rather than encoding keys differently.
+
+    :param backend: name of the JSON library to use (e.g. ``'ujson'``).
+                    By default, we call :py:func:`pick_json_backend`.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend or pick_json_backend()
+
+        protocol = _json_protocols(self.backend)[0]()
+
+        # bind methods directly, to avoid an extra function call per line
+        self.read = protocol.read
+        self.write = protocol.write
+        self.read_key = protocol.read_key
+        self.read_value = protocol.read_value
+
+
+class AutoJSONValueProtocol(object):
+    """Encode ``value`` as a JSON and discard ``key`` (``key`` is read in as
+    ``None``), using the same JSON library as :py:class:`AutoJSONProtocol`.
+
+    :param backend: name of the JSON library to use (e.g. ``'ujson'``).
+                    By default, we call :py:func:`pick_json_backend`.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend or pick_json_backend()
+
+        protocol = _json_protocols(self.backend)[1]()
+
+        self.read = protocol.read
+        self.write = protocol.write
+
+
 class PickleProtocol(_KeyCachingProtocol):
     """Encode ``(key, value)`` as two string-escaped pickles separated
     by a tab.
@@ -343,6 +509,74 @@ class PickleValueProtocol(object):
                 'latin_1').encode('unicode_escape')
 
 
+class MarshalProtocol(_KeyCachingProtocol):
+    """Encode ``(key, value)`` with :py:mod:`marshal`, separated by a tab.
+
+    This is a compact, fast binary format, useful as an
+    :py:attr:`~mrjob.job.MRJob.INTERNAL_PROTOCOL` when your job's
+    keys and values are built-in types (numbers, strings, bytes, tuples,
+    lists, dicts, sets, etc.). Rather than escaping every non-ASCII byte
+    like :py:class:`PickleProtocol`, we only escape tabs, newlines,
+    carriage returns, and our own escape character (``\\x01``), so
+    records stay on one line without growing much.
+
+    .. warning::
+
+        The marshal format varies between versions of Python, so use
+        this only to pass data between steps of the same job, not for
+        input or output.
+
+    .. versionadded:: 0.6.0
+    """
+    def _loads(self, value):
+        return marshal.loads(_unescape_binary(value))
+
+    def _dumps(self, value):
+        return _escape_binary(marshal.dumps(value, _MARSHAL_VERSION))
+
+
+class MarshalValueProtocol(object):
+    """Encode ``value`` with :py:mod:`marshal` and discard ``key``
+    (``key`` is read in as ``None``).
+
+    See :py:class:`MarshalProtocol` for details.
+
+    .. versionadded:: 0.6.0
+    """
+    def read(self, line):
+        return (None, marshal.loads(_unescape_binary(line)))
+
+    def write(self, key, value):
+        return _escape_binary(marshal.dumps(value, _MARSHAL_VERSION))
+
+
+# newer versions of marshal can encode the same value differently depending
+# on how many references there are to it, which would break sorting by key
+_MARSHAL_VERSION = 2
+
+
+def _escape_binary(data):
+    """Escape *data* so it has no tabs, newlines, or carriage returns.
+
+    Every escape sequence starts with ``\\x01`` and none of them end
+    with it, so :py:func:`_unescape_binary` can undo this with simple
+    replacements."""
+    return data.replace(
+        b'\x01', b'\x01\x02').replace(
+        b'\t', b'\x01\x03').replace(
+        b'\n', b'\x01\x04').replace(
+        b'\r', b'\x01\x05')
+
+
+def _unescape_binary(data):
+    """Undo :py:func:`_escape_binary`."""
+    return data.replace(
+        b'\x01\x05', b'\r').replace(
+        b'\x01\x04', b'\n').replace(
+        b'\x01\x03', b'\t').replace(
+        b'\x01\x02', b'\x01')
+
+
 # RawValueProtocol (below) is just an alias, but we treat it as a class for the
 # purpose of documentation. All it does is output the value (key is read as
 # ``None``).
@@ -26,8 +26,11 @@ import shutil
 import sys
 import tarfile
 import tempfile
+import threading
+from collections import deque
 
 import mrjob.step
+from mrjob.cat import DEFAULT_BUFSIZE
 from mrjob.compat import translate_jobconf
 from mrjob.compat import translate_jobconf_dict
 from mrjob.compat import translate_jobconf_for_all_versions
@@ -90,6 +93,8 @@ class MRJobRunner(object):
     # handle this with a warning from the launcher instead
     OPT_NAMES = {
         'bootstrap_mrjob',
+        'cat_output_buffer_size',
+        'cat_output_threads',
         'check_input_paths',
         'cleanup',
         'cleanup_on_failure',
@@ -352,6 +357,8 @@ class MRJobRunner(object):
             owner = None
 
         return dict(
+            cat_output_buffer_size=64,  # 64 MB
+            cat_output_threads=1,
             check_input_paths=True,
             cleanup=['ALL'],
             cleanup_on_failure=['NONE'],
@@ -511,11 +518,18 @@ class MRJobRunner(object):
         self._run()
         self._ran_job = True
 
-    def cat_output(self):
+    def cat_output(self, bufsize=DEFAULT_BUFSIZE):
         """Stream the jobs output, as a stream of ``bytes``. If there are
         multiple output files, there will be an empty bytestring
         (``b''``) between them.
 
+        :param bufsize: number of bytes to read from each output file at
+                        a time
+
+        If :mrjob-opt:`cat_output_threads` is more than 1, we download
+        that many output files at once in the background (but still
+        yield them in order).
+
         .. versionadded:: 0.6.0
 
            In previous versions, you'd use :py:meth:`stream_output`.
@@ -550,11 +564,27 @@ class MRJobRunner(object):
                             for name in split_path(subpath))):
                     yield filename
 
+        def cat_file(filename):
+            return self.fs._cat_file(filename, bufsize=bufsize)
+
+        num_threads = self._opts['cat_output_threads'] or 1
+
+        if num_threads > 1:
+            buffer_size = int(
+                (self._opts['cat_output_buffer_size'] or 0) * 1024 * 1024)
+
+            for chunk in _cat_files_in_parallel(
+                    cat_file, list(ls_output()),
+                    num_threads, buffer_size):
+                yield chunk
+
+            return
+
         for i, filename in enumerate(ls_output()):
             if i > 0:
                 yield b''  # EOF of previous file
 
-            for chunk in self.fs._cat_file(filename):
+            for chunk in cat_file(filename):
                 yield chunk
 
     def stream_output(self):
@@ -803,10 +833,17 @@ class MRJobRunner(object):
                    for step in self._get_steps())
 
     def _args_for_task(self, step_num, mrc):
-        return [
+        args = [
             '--step-num=%d' % step_num,
             '--%s' % mrc,
-        ] + self._mr_job_extra_args()
+        ]
+
+        # make every task use the same JSON library (see AutoJSONProtocol)
+        json_backend = self._get_step(step_num).get('json_backend')
+        if json_backend:
+            args.append('--json-backend=%s' % json_backend)
+
+        return args + self._mr_job_extra_args()
 
     def _mr_job_extra_args(self, local=False):
         """Return arguments to add to every invocation of MRJob.
@@ -1156,3 +1193,138 @@ def _fix_env(env):
             return s
 
     return dict((_to_str(k), _to_str(v)) for k, v in env.items())
+
+
+class _CatFileState(object):
+    """Chunks downloaded from one file by :py:func:`_cat_files_in_parallel`
+    that haven't been yielded yet."""
+
+    def __init__(self):
+        self.chunks = deque()
+        self.done = False
+        self.error = None
+
+
+# lets _cat_files_in_parallel() know it's being called from one of its
+# own background threads (see below)
+_cat_thread_local = threading.local()
+
+
+def _cat_files_in_parallel(cat_file, paths, num_threads, buffer_size):
+    """Yield ``cat_file(path)`` for each of *paths*, in order, with
+    ``b''`` between files (like :py:meth:`MRJobRunner.cat_output`), while
+    downloading up to *num_threads* files at once in background threads.
+
+    Threads don't read another chunk until the chunks that have been read
+    but not yet yielded (from any file) add up to less than *buffer_size*
+    bytes, so we never hold more than *buffer_size* bytes plus one chunk
+    per thread. The file we're currently yielding from can always read one
+    chunk (so that we never wait on a full buffer, or on a chunk bigger
+    than *buffer_size*).
+
+    If this is called from inside *cat_file()* (e.g. a filesystem that
+    downloads parts of each file in parallel), it reads the files one at
+    a time in the calling thread instead, so that memory use doesn't
+    multiply.
+
+    If *cat_file()* raises an exception, we re-raise it when we get to
+    that file.
+    """
+    if getattr(_cat_thread_local, 'in_thread', False):
+        for i, path in enumerate(paths):
+            if i > 0:
+                yield b''  # EOF of previous file
+
+            for chunk in cat_file(path):
+                yield chunk
+
+        return
+
+    if not paths:
+        return
+
+    cond = threading.Condition()
+    states = [_CatFileState() for _ in paths]
+    # use a dict so that threads can update these
+    shared = dict(buffered=0, current=0, stopped=False)
+
+    def fetch(i):
+        _cat_thread_local.in_thread = True
+        state = states[i]
+
+        try:
+            chunks = iter(cat_file(paths[i]))
+
+            while True:
+                with cond:
+                    # wait for space in the buffer before reading. The
+                    # current file can always have one chunk waiting to
+                    # be yielded, or we'd deadlock when other files fill
+                    # the buffer
+                    while not (shared['stopped'] or
+                               shared['buffered'] < buffer_size or
+                               (i == shared['current'] and
+                                not state.chunks)):
+                        cond.wait()
+
+                    if shared['stopped']:
+                        return
+
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+
+                with cond:
+                    state.chunks.append(chunk)
+                    shared['buffered'] += len(chunk)
+                    cond.notify_all()
+        except Exception as ex:
+            state.error = ex
+        finally:
+            with cond:
+                state.done = True
+                cond.notify_all()
+
+    def start(i):
+        if i < len(paths):
+            thread = threading.Thread(target=fetch, args=(i,))
+            # don't let a stuck download keep Python from exiting
+            thread.daemon = True
+            thread.start()
+
+    for i in range(num_threads):
+        start(i)
+
+    try:
+        for i, state in enumerate(states):
+            if i > 0:
+                yield b''  # EOF of previous file
+
+            with cond:
+                shared['current'] = i
+                cond.notify_all()
+
+            while True:
+                with cond:
+                    while not (state.chunks or state.done):
+                        cond.wait()
+
+                    if state.chunks:
+                        chunk = state.chunks.popleft()
+                        shared['buffered'] -= len(chunk)
+                        cond.notify_all()
+                    elif state.error is not None:
+                        raise state.error
+                    else:
+                        break
+
+                yield chunk
+
+            # keep *num_threads* files downloading
+            start(i + num_threads)
+    finally:
+        # if we stopped early, let threads know they can quit
+        with cond:
+            shared['stopped'] = True
+            cond.notify_all()
@@ -34,6 +34,7 @@ Hadoop can see them (HDFS or S3), we provide :py:class:`UploadDirManager`.
 Path dictionaries are meant to be immutable; all state is handled by
 manager classes.
 """
+import hashlib
 import itertools
 import logging
 import os
@@ -290,15 +291,23 @@ class UploadDirManager(object):
     :py:class:`UploadDirManager` assumes URIs to not need to be uploaded
     and thus does not store them. :py:meth:`uri` maps URIs to themselves.
     """
-    def __init__(self, prefix):
+    def __init__(self, prefix, content_addressed=False):
         """Make an :py:class`UploadDirManager`.
 
         :param string prefix: The URI for the directory (e.g.
                               `s3://bucket/dir/`). It doesn't matter if
                               *prefix* has a trailing slash; :py:meth:`uri`
                               will do the right thing.
+        :param bool content_addressed: If true, put each file in a
+                                       subdirectory named after the MD5 sum
+                                       of its contents (e.g.
+                                       ``s3://bucket/dir/<md5>/foo.py``), so
+                                       that a file always gets the same URI
+                                       as long as it doesn't change. Files
+                                       must exist when they are added.
         """
         self.prefix = prefix
+        self.content_addressed = content_addressed
 
         self._path_to_name = {}
         self._names_taken = set()
@@ -312,11 +321,18 @@ class UploadDirManager(object):
             return path
 
         if path not in self._path_to_name:
-            # use unhide so that input files won't be hidden from Hadoop,
-            # see #1200
-            name = name_uniquely(
-                path, names_taken=self._names_taken, unhide=True)
-            self._names_taken.add(name)
+            if self.content_addressed:
+                # files with different contents are in different
+                # directories, so names can't collide
+                name = posixpath.join(
+                    _md5sum_path(path), name_uniquely(path, unhide=True))
+            else:
+                # use unhide so that input files won't be hidden from Hadoop,
+                # see #1200
+                name = name_uniquely(
+                    path, names_taken=self._names_taken, unhide=True)
+                self._names_taken.add(name)
+
             self._path_to_name[path] = name
 
         return self.uri(path)
@@ -339,6 +355,20 @@ class UploadDirManager(object):
                     for path in self._path_to_name)
 
 
+def _md5sum_path(path, block_size=(512 ** 2)):
+    """Return the MD5 sum (in hex) of the local file at *path*."""
+    md5 = hashlib.md5()
+
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            md5.update(data)
+
+    return md5.hexdigest()
+
+
 class WorkingDirManager(object):
     """Represents the working directory of hadoop tasks (or bootstrap
     commands on EMR).
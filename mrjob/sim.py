@@ -12,12 +12,19 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import itertools
+import heapq
+import json
+import bz2
+import gzip
 import logging
 import os
+import re
 import shutil
 import stat
+import time
+from contextlib import contextmanager
 from functools import partial
+from itertools import groupby
 from multiprocessing import cpu_count
 from os.path import dirname
 from os.path import isdir
@@ -25,21 +32,71 @@ from os.path import join
 from os.path import relpath
 from shutil import copy2
 from shutil import copytree
+from tempfile import mkdtemp
 
 from mrjob.cat import decompress
 from mrjob.cat import is_compressed
+from mrjob.compat import jobconf_from_dict
 from mrjob.compat import translate_jobconf
 from mrjob.compat import translate_jobconf_for_all_versions
 from mrjob.conf import combine_dicts
 from mrjob.conf import combine_local_envs
 from mrjob.logs.counters import _format_counters
 from mrjob.parse import parse_mr_job_stderr
+from mrjob.py2 import to_unicode
 from mrjob.runner import MRJobRunner
 from mrjob.runner import _fix_env
 from mrjob.util import unarchive
 
+try:
+    import lz4.frame
+    lz4  # quiet "redefinition of unused ..." warning from pyflakes
+except ImportError:
+    lz4 = None
+
 log = logging.getLogger(__name__)
 
+# default value of the sort_buffer_size option, in megabytes
+_DEFAULT_SORT_BUFFER_SIZE = 100
+
+# Hadoop partitioners that we know how to simulate
+_HASH_PARTITIONERS = {
+    'org.apache.hadoop.mapred.lib.HashPartitioner',
+    'org.apache.hadoop.mapreduce.lib.partition.HashPartitioner',
+}
+
+_KEY_FIELD_BASED_PARTITIONERS = {
+    'org.apache.hadoop.mapred.lib.KeyFieldBasedPartitioner',
+    'org.apache.hadoop.mapreduce.lib.partition.KeyFieldBasedPartitioner',
+}
+
+# a key spec for KeyFieldBasedPartitioner, e.g. "-k2.3,4nr"
+_KEY_SPEC_RE = re.compile(
+    r'^-k(?P<begin_field>\d+)(\.(?P<begin_char>\d+))?[nr]*'
+    r'(,(?P<end_field>\d+)(\.(?P<end_char>\d+))?[nr]*)?$')
+
+# Java bytes are signed
+_SIGNED_BYTES = [b if b < 128 else b - 256 for b in range(256)]
+
+# don't remember which partition more than this many keys go to
+_MAX_CACHED_PARTITION_KEYS = 100000
+
+# map from Hadoop compression codec (minus the package) to the codec we use
+# to compress intermediate files (see SimMRJobRunner._map_output_codec())
+_HADOOP_CODEC_TO_CODEC = {
+    'BZip2Codec': 'bz2',
+    'DefaultCodec': 'gzip',
+    'DeflateCodec': 'gzip',
+    'GzipCodec': 'gzip',
+    'Lz4Codec': 'lz4',
+}
+
+# fast is more important than small for temp files
+_GZIP_COMPRESSLEVEL = 1
+
+# how many bytes to buffer before compressing them
+_COMPRESS_BUFFER_SIZE = 1024 * 1024
+
 
 # This class defers execution to a lot of other functions because of local
 # mode which uses :mod:`multiprocessing`, which relies on pickling.
@@ -52,7 +109,6 @@ class SimMRJobRunner(MRJobRunner):
     _IGNORED_HADOOP_KWARGS = [
         'hadoop_input_format',
         'hadoop_output_format',
-        'partitioner',
     ]
 
     # options that we ignore becaue they require real Hadoop.
@@ -62,12 +118,21 @@ class SimMRJobRunner(MRJobRunner):
 
     OPT_NAMES = MRJobRunner.OPT_NAMES | {
         'hadoop_version',
+        'num_cores',
+        'pipe_to_combiner',
+        'skew_report',
+        'sort_buffer_size',
+        'zero_copy_splits',
     }
 
     def __init__(self, **kwargs):
         super(SimMRJobRunner, self).__init__(**kwargs)
 
         self._counters = []
+        self._skew_reports = []
+
+        # cache for _map_output_codec()
+        self._step_num_to_map_output_codec = {}
 
         # warn about ignored keyword arguments
         for key in self._IGNORED_HADOOP_KWARGS:
@@ -77,6 +142,12 @@ class SimMRJobRunner(MRJobRunner):
                     'ignoring %s keyword arg (requires real Hadoop): %r' %
                     (key, value))
 
+        if self._partitioner and not (
+                self._partitioner in _HASH_PARTITIONERS or
+                self._partitioner in _KEY_FIELD_BASED_PARTITIONERS):
+            log.warning("can't simulate partitioner %s (requires real"
+                        " Hadoop); using HashPartitioner" % self._partitioner)
+
         # TODO: libjars should just not be an option for local runners
         #
         # however, the job class can still set it; might want to handle
@@ -88,6 +159,14 @@ class SimMRJobRunner(MRJobRunner):
                     'ignoring %s option (requires real Hadoop): %r' %
                     (ignored_opt, value))
 
+    def _default_opts(self):
+        return combine_dicts(
+            super(SimMRJobRunner, self)._default_opts(),
+            dict(
+                sort_buffer_size=_DEFAULT_SORT_BUFFER_SIZE,
+            )
+        )
+
     def _opt_combiners(self):
         """Combine *cmdenv* with :py:func:`~mrjob.conf.combine_local_envs`"""
         return combine_dicts(
@@ -144,25 +223,32 @@ class SimMRJobRunner(MRJobRunner):
                 self._run_mappers_and_combiners(step_num, map_splits)
 
                 if 'reducer' in step:
-                    self._sort_reducer_input(step_num, len(map_splits))
-                    num_reducer_tasks = self._split_reducer_input(step_num)
-
-                    self._run_reducers(step_num, num_reducer_tasks)
+                    self._run_reducers(step_num, len(map_splits))
 
                 self._log_counters(step_num)
 
+                if self._opts['skew_report']:
+                    self._skew_reports.append(
+                        self._read_skew_report(step_num, len(map_splits)))
+                    self._log_skew_report(step_num)
+
             except Exception as ex:
                 self._log_counters(step_num)
                 self._log_cause_of_error(ex)
 
                 raise
 
-    def _run_task_func(self, task_type, step_num, task_num, map_split=None):
+    def _run_task_func(self, task_type, step_num, task_num, map_split=None,
+                       read_split_in_place=False):
         """Returns a no-args function that runs one mapper, reducer, or
          combiner.
 
         This sets up everything the task needs to run, then passes it off to
         :py:meth:`_invoke_task_func`.
+
+        If *read_split_in_place* is true, the task reads *map_split*
+        directly from the original input file, rather than from its
+        own input file.
         """
         input_path = self._task_input_path(task_type, step_num, task_num)
         stderr_path = self._task_stderr_path(task_type, step_num, task_num)
@@ -171,11 +257,23 @@ class SimMRJobRunner(MRJobRunner):
         env = _fix_env(
             self._env_for_task(task_type, step_num, task_num, map_split))
 
+        # mappers read (uncompressed) input splits, and the last task
+        # type in the step writes (uncompressed) output for the step;
+        # everything else is intermediate
+        codec = self._map_output_codec(step_num)
+
+        input_codec = None if task_type == 'mapper' else codec
+        output_codec = (
+            None if task_type == self._last_task_type_in_step(step_num)
+            else codec)
+
         return partial(
             _run_task,
             self._invoke_task_func(task_type, step_num, task_num),
             task_type, step_num, task_num,
-            input_path, output_path, stderr_path, wd, env)
+            input_path, output_path, stderr_path, wd, env,
+            input_split=(map_split if read_split_in_place else None),
+            input_codec=input_codec, output_codec=output_codec)
 
     def _run_mappers_and_combiners(self, step_num, map_splits):
         try:
@@ -200,6 +298,25 @@ class SimMRJobRunner(MRJobRunner):
     def counters(self):
         return self._counters
 
+    def skew_report(self):
+        """Get a report of how evenly work was divided between tasks, for
+        each step, if the :mrjob-opt:`skew_report` option is set (otherwise
+        this returns an empty list). Each step's report is a dictionary
+        like::
+
+            {'top_keys': [{'key': 'the', 'records': 1000, 'bytes': 9000},
+                          ...],
+             'reducer_input': [{'records': 3000, 'bytes': 25000}, ...],
+             'task_times': {'mapper': [0.5, ...], 'reducer': [1.5, ...]}}
+
+        *top_keys* are the keys with the most records in the reducers'
+        input (after the combiner, if any), heaviest first, and
+        *reducer_input* and the reducer part of *task_times* are
+        in order by reducer number. Map task times include the combiner.
+        Steps with no reducer only have mapper task times.
+        """
+        return self._skew_reports
+
     def get_hadoop_version(self):
         return self._opts['hadoop_version']
 
@@ -208,18 +325,35 @@ class SimMRJobRunner(MRJobRunner):
         corresponding combiner if there is one."""
         step = self._get_step(step_num)
 
+        # create mapper dir
+        self.fs.mkdir(self._task_dir('mapper', step_num, task_num))
+
         mapper_input_path = self._task_input_path(
             'mapper', step_num, task_num)
         mapper_output_path = self._task_output_path(
             'mapper', step_num, task_num)
 
+        # with zero_copy_splits, the mapper reads uncompressed input
+        # directly from the original file
+        read_split_in_place = bool(
+            self._opts['zero_copy_splits'] and 'mapper' in step and
+            not is_compressed(map_split['file']))
+
+        if read_split_in_place:
+            write_split = None
+        else:
+            write_split = partial(_write_split, map_split, mapper_input_path)
+
         run_mapper = None
 
         if 'mapper' in step:
             run_mapper = self._run_task_func(
-                'mapper', step_num, task_num, map_split)
+                'mapper', step_num, task_num, map_split,
+                read_split_in_place=read_split_in_place)
+
+        codec = self._map_output_codec(step_num)
 
-        sort_input = self._sort_input_func()
+        sort_input = self._sort_input_func(codec=codec)
 
         combiner_input_path = None
         run_combiner = None
@@ -234,20 +368,84 @@ class SimMRJobRunner(MRJobRunner):
             run_combiner = self._run_task_func(
                 'combiner', step_num, task_num, map_split)
 
+        # with pipe_to_combiner, mapper output goes straight into a sort
+        # in memory (which only spills to disk if it has to), and from
+        # there to the combiner
+        make_sorter = None
+
+        if self._opts['pipe_to_combiner'] and run_mapper and run_combiner:
+            make_sorter = partial(_LineSorter,
+                                  sort_values=self._sort_values,
+                                  buffer_size=self._sort_buffer_size(),
+                                  tmp_dir=self._opts['local_tmp_dir'],
+                                  codec=codec)
+
+        partition = None
+
+        if 'reducer' in step:
+            map_output_path = self._task_output_path(
+                'combiner' if run_combiner else 'mapper', step_num, task_num)
+
+            partition_paths = [
+                self._map_task_partition_path(step_num, task_num, reducer_num)
+                for reducer_num in range(self._num_reducers(step_num))
+            ]
+            self.fs.mkdir(dirname(partition_paths[0]))
+
+            get_key, get_partition = self._partition_funcs(step_num)
+
+            partition = partial(
+                _partition_lines, map_output_path, partition_paths,
+                get_key=get_key, get_partition=get_partition, codec=codec)
+
+        stats_path = None
+        if self._opts['skew_report']:
+            stats_path = self._task_stats_path('mapper', step_num, task_num)
+
         return partial(
             _run_mapper_and_combiner,
-            run_mapper, sort_input, run_combiner,
-            mapper_input_path, mapper_output_path, combiner_input_path)
+            write_split, run_mapper, sort_input, run_combiner, partition,
+            mapper_input_path, mapper_output_path, combiner_input_path,
+            make_sorter=make_sorter, stats_path=stats_path, codec=codec)
 
-    def _run_reducers(self, step_num, num_reducer_tasks):
+    def _run_reducers(self, step_num, num_map_tasks):
         try:
             self._run_multiple(
-                self._run_task_func('reducer', step_num, task_num)
-                for task_num in range(num_reducer_tasks)
+                self._sort_and_run_reducer_func(
+                    step_num, task_num, num_map_tasks)
+                for task_num in range(self._num_reducers(step_num))
             )
         finally:
             self._parse_task_counters('reducer', step_num)
 
+    def _sort_and_run_reducer_func(self, step_num, task_num, num_map_tasks):
+        """Returns a no-args function that sorts the corresponding
+        partition of each map task's output into the reducer's input file,
+        and then runs the reducer."""
+        run_reducer = self._run_task_func('reducer', step_num, task_num)
+
+        partition_paths = [
+            self._map_task_partition_path(step_num, map_task_num, task_num)
+            for map_task_num in range(num_map_tasks)
+        ]
+
+        reducer_input_path = self._task_input_path(
+            'reducer', step_num, task_num)
+
+        stats_path = None
+        if self._opts['skew_report']:
+            stats_path = self._task_stats_path('reducer', step_num, task_num)
+
+        codec = self._map_output_codec(step_num)
+
+        return partial(
+            _sort_and_run_reducer,
+            self._sort_input_func(codec=codec), run_reducer,
+            partition_paths, reducer_input_path,
+            stats_path=stats_path,
+            num_top_keys=self._opts['skew_report'],
+            codec=codec)
+
     def _create_dist_cache_dir(self, step_num):
         """Copy working directory files into a shared directory,
         simulating the way Hadoop's Distributed Cache works on nodes."""
@@ -358,73 +556,91 @@ class SimMRJobRunner(MRJobRunner):
                     for tk in translate_jobconf_for_all_versions(k)}
 
     def _num_mappers(self, step_num):
-        # TODO: look up mapred.job.maps (convert to int) in _jobconf_for_step()
-        return cpu_count()
+        """Target number of map tasks for the given step. This is
+        ``mapreduce.job.maps`` from jobconf if set, otherwise twice the
+        number of CPUs."""
+        return self._num_tasks_from_jobconf(
+            step_num, 'mapreduce.job.maps', cpu_count() * 2)
 
     def _num_reducers(self, step_num):
-        # TODO: look up mapred.job.reduces in _jobconf_for_step()
-        return cpu_count()
+        """Number of reduce tasks for the given step. This is
+        ``mapreduce.job.reduces`` from jobconf if set, otherwise the
+        number of CPUs."""
+        return self._num_tasks_from_jobconf(
+            step_num, 'mapreduce.job.reduces', cpu_count())
+
+    def _num_tasks_from_jobconf(self, step_num, name, default):
+        """Read a number of tasks from the given jobconf variable (under
+        any version of its name), falling back to *default* if it's unset
+        or not an integer.
+
+        We always run at least one task; local runners can't
+        skip the reducer the way Hadoop does when there are zero reducers.
+        """
+        value = jobconf_from_dict(self._jobconf_for_step(step_num), name)
+
+        if value is None:
+            return default
+
+        try:
+            return max(int(value), 1)
+        except ValueError:
+            log.warning('ignoring non-integer jobconf %s=%r' % (name, value))
+            return default
 
     def _split_mapper_input(self, input_paths, step_num):
-        """Take one or more input paths (which may be compressed) and split
-        it to create the input files for the map tasks.
+        """Take one or more input paths (which may be compressed) and
+        decide how to split them into input for the map tasks.
 
-        Yields "splits", which are dictionaries with the following keys:
+        Returns a list of "splits", which are dictionaries with the
+        following keys:
 
-        input: path of input for one mapper
         file: path of original file
-        start, length: chunk of original file in *input*
+        start, length: range of bytes in original file
+
+        This doesn't read or write any data; each map task writes its own
+        input file (see :py:func:`_write_split`), so splitting happens in
+        parallel, and each mapper can start as soon as its input is ready.
 
-        Uncompressed files will not be split (even ``.bz2`` files);
+        Compressed files will not be split (even ``.bz2`` files);
         uncompressed files will be split as to to attempt to create
-        twice as many input files as there are mappers.
+        as many input files as :py:meth:`_num_mappers` returns.
         """
         input_paths = list(input_paths)
 
         # determine split size
         split_size = self._pick_mapper_split_size(input_paths, step_num)
 
-        # yield output fileobjs as needed
-        split_fileobj_gen = self._yield_split_fileobjs('mapper', step_num)
-
         results = []
 
         for path in input_paths:
-            with open(path, 'rb') as src:
-                if is_compressed(path):
-                    # if file is compressed, uncompress it into a single split
-
-                    # Hadoop tracks the compressed file's size
-                    size = os.stat(path)[stat.ST_SIZE]
+            # for compressed files, Hadoop tracks the compressed file's size
+            size = os.stat(path)[stat.ST_SIZE]
+
+            if is_compressed(path):
+                # if file is compressed, uncompress it into a single split
+                results.append(dict(
+                    file=path,
+                    start=0,
+                    length=size,
+                ))
+            else:
+                # otherwise, split into one or more ranges of bytes. Map
+                # tasks will adjust these to line boundaries
+                start = 0
 
-                    with next(split_fileobj_gen) as dest:
-                        for chunk in decompress(src, path):
-                            dest.write(chunk)
+                while True:
+                    length = min(split_size, size - start)
 
                     results.append(dict(
                         file=path,
-                        start=0,
-                        length=size,
+                        start=start,
+                        length=length,
                     ))
-                else:
-                    # otherwise, split into one or more input files
-                    start = 0
-                    length = 0
-
-                    for lines in _split_records(src, split_size):
-                        with next(split_fileobj_gen) as dest:
-                            for line in lines:
-                                dest.write(line)
-                                length += len(line)
-
-                        results.append(dict(
-                            file=path,
-                            start=start,
-                            length=length,
-                        ))
-
-                        start += length
-                        length = 0
+
+                    start += length
+                    if start >= size:
+                        break
 
         return results
 
@@ -432,60 +648,20 @@ class SimMRJobRunner(MRJobRunner):
         if not isinstance(input_paths, list):
             raise TypeError
 
-        target_num_splits = self._num_mappers(step_num) * 2
+        target_num_splits = self._num_mappers(step_num)
 
         # decide on a split size to approximate target_num_splits
         num_compressed = 0
         uncompressed_bytes = 0
 
         for path in input_paths:
-            if path.endswith('.gz') or path.endswith('.bz'):
+            if is_compressed(path):
                 num_compressed += 1
             else:
                 uncompressed_bytes += os.stat(path)[stat.ST_SIZE]
 
-        return uncompressed_bytes // max(
-            target_num_splits - num_compressed, 1)
-
-    def _split_reducer_input(self, step_num):
-        """Split a single, uncompressed file containing sorted input for the
-        reducer into input files for each reducer task.
-
-        Yield the paths of the reducer input files."""
-        path = self._sorted_reducer_input_path(step_num)
-
-        log.debug('splitting reducer input: %s' % path)
-
-        size = os.stat(path)[stat.ST_SIZE]
-        split_size = size // (self._num_reducers(step_num) * 2)
-
-        # yield output fileobjs as needed
-        split_fileobj_gen = self._yield_split_fileobjs('reducer', step_num)
-
-        def reducer_key(line):
-            return line.split(b'\t')[0]
-
-        num_reducer_tasks = 0
-
-        with open(path, 'rb') as src:
-            for records in _split_records(src, split_size, reducer_key):
-                with next(split_fileobj_gen) as dest:
-                    for record in records:
-                        dest.write(record)
-                    num_reducer_tasks += 1
-
-        return num_reducer_tasks
-
-    def _yield_split_fileobjs(self, task_type, step_num):
-        """Used to split input for the given mapper/reducer.
-
-        Yields writeable fileobjs for input splits (check their *name*
-        attribute to get the path)
-        """
-        for task_num in itertools.count():
-            path = self._task_input_path(task_type, step_num, task_num)
-            self.fs.mkdir(dirname(path))
-            yield open(path, 'wb')
+        return max(uncompressed_bytes // max(
+            target_num_splits - num_compressed, 1), 1)
 
     def _setup_working_dir(self, task_type, step_num, task_num):
         wd = self._task_working_dir(task_type, step_num, task_num)
@@ -582,147 +758,864 @@ class SimMRJobRunner(MRJobRunner):
     def _task_working_dir(self, task_type, step_num, task_num):
         return join(self._task_dir(task_type, step_num, task_num), 'wd')
 
-    # need this specifically since there's a global sort of reducer input
+    # step/<step_num>/mapper/<task_num>/partitions/<reducer_num>
+
+    def _map_task_partition_path(self, step_num, task_num, reducer_num):
+        """Where to put the part of the given map task's output (after
+        the combiner, if any) that goes to the given reducer."""
+        return join(self._task_dir('mapper', step_num, task_num),
+                    'partitions', '%05d' % reducer_num)
+
+    def _partition_funcs(self, step_num):
+        """Return ``(get_key, get_partition)``, functions which simulate
+        how Hadoop would split the given step's mapper output between
+        reducers.
+
+        ``get_key(line)`` returns the key that Hadoop Streaming would see
+        (see ``stream.num.map.output.key.fields``), and
+        ``get_partition(key, num_partitions)`` simulates the job's
+        partitioner (``HashPartitioner`` by default, or
+        ``KeyFieldBasedPartitioner``).
+        """
+        jobconf = self._jobconf_for_step(step_num)
+
+        num_key_fields = int(jobconf_from_dict(
+            jobconf, 'stream.num.map.output.key.fields', 1))
+        field_separator = _to_bytes(jobconf_from_dict(
+            jobconf, 'stream.map.output.field.separator', '\t'))
+
+        get_key = partial(_streaming_key,
+                          num_fields=num_key_fields,
+                          separator=field_separator)
 
-    def _sorted_reducer_input_path(self, step_num):
-        return join(self._step_dir(step_num), 'reducer', 'sorted-input')
+        partitioner = self._partitioner or self._sort_values_partitioner()
 
-    def _sort_input_func(self):
+        if partitioner in _KEY_FIELD_BASED_PARTITIONERS:
+            key_specs = _parse_key_specs(jobconf_from_dict(
+                jobconf, 'mapreduce.partition.keypartitioner.options', ''))
+            key_field_separator = _to_bytes(jobconf_from_dict(
+                jobconf, 'mapreduce.map.output.key.field.separator', '\t'))
+
+            get_partition = partial(_key_field_based_partition,
+                                    key_specs=key_specs,
+                                    separator=key_field_separator)
+        else:
+            get_partition = _hash_partition
+
+        return get_key, get_partition
+
+    def _sort_input_func(self, codec=None):
         """Returns a function that sorts lines from one or more input paths
         into a new file. Takes the arguments *input_path* and *output_path*.
 
-        By default, sorts in memory, but you can override this to
+        By default, sorts in Python (spilling to disk if the input doesn't
+        fit in :mrjob-opt:`sort_buffer_size`), but you can override this to
         use the :command:`sort` binary, etc.
+
+        If *codec* is set, both input and output files are compressed
+        with it (see :py:meth:`_map_output_codec`).
+        """
+        return partial(_sort_lines,
+                       sort_values=self._sort_values,
+                       buffer_size=self._sort_buffer_size(),
+                       tmp_dir=self._opts['local_tmp_dir'],
+                       codec=codec)
+
+    def _map_output_codec(self, step_num):
+        """Which codec to compress the given step's intermediate files
+        (mapper and combiner output, partitions, sorted reducer input,
+        and sorted chunks) with: ``'lz4'``, ``'gzip'`` (at level 1),
+        ``'bz2'``, or ``None`` to not compress them.
+
+        Like Hadoop, we only compress if ``mapreduce.map.output.compress``
+        is true. We use the codec that matches
+        ``mapreduce.map.output.compress.codec`` (``Lz4Codec``,
+        ``GzipCodec``/``DefaultCodec``/``DeflateCodec``, or ``BZip2Codec``),
+        or otherwise whichever is fastest (``'lz4'`` if it's installed).
         """
-        return partial(_sort_lines_in_memory, sort_values=self._sort_values)
+        if step_num not in self._step_num_to_map_output_codec:
+            jobconf = self._jobconf_for_step(step_num)
 
-    def _sort_reducer_input(self, step_num, num_map_tasks):
-        step = self._get_step(step_num)
+            codec = None
 
-        output_path = self._sorted_reducer_input_path(step_num)
-        self.fs.mkdir(dirname(output_path))
+            if str(jobconf_from_dict(
+                    jobconf, 'mapreduce.map.output.compress')).lower() == (
+                        'true'):
+                hadoop_codec = jobconf_from_dict(
+                    jobconf, 'mapreduce.map.output.compress.codec') or ''
+                codec = _HADOOP_CODEC_TO_CODEC.get(hadoop_codec.split('.')[-1])
 
-        prev_task_type = 'combiner' if step.get('combiner') else 'mapper'
-        input_paths = [
-            self._task_output_path(prev_task_type, step_num, task_num)
-            for task_num in range(num_map_tasks)
-        ]
+                if codec == 'lz4' and not lz4:
+                    log.warning('lz4 module not installed, compressing map'
+                                ' output with gzip instead')
+                    codec = 'gzip'
+
+                if not codec:
+                    codec = 'lz4' if lz4 else 'gzip'
 
-        self._sort_input_func()(input_paths, output_path)
+            self._step_num_to_map_output_codec[step_num] = codec
+
+        return self._step_num_to_map_output_codec[step_num]
+
+    def _sort_buffer_size(self):
+        """Max number of bytes of lines to sort in memory at once, or
+        ``None`` for no limit."""
+        if self._opts['sort_buffer_size']:
+            return int(self._opts['sort_buffer_size'] * 1024 * 1024)
+        else:
+            return None
 
     def _log_counters(self, step_num):
         counters = self.counters()[step_num]
         if counters:
             log.info('\n%s\n' % _format_counters(counters))
 
+    # step/<step_num>/<task_type>/<task_num>/stats.json
+
+    def _task_stats_path(self, task_type, step_num, task_num):
+        """Where a task records how long it took, etc. for
+        :py:meth:`skew_report` (map tasks use the ``mapper``
+        task type)."""
+        return join(self._task_dir(task_type, step_num, task_num),
+                    'stats.json')
+
+    def _read_skew_report(self, step_num, num_map_tasks):
+        """Build the given step's :py:meth:`skew_report` from the stats
+        files written by each task."""
+        def read_stats(task_type, num_tasks):
+            stats = []
+            for task_num in range(num_tasks):
+                with open(self._task_stats_path(
+                        task_type, step_num, task_num)) as f:
+                    stats.append(json.load(f))
+            return stats
+
+        mapper_stats = read_stats('mapper', num_map_tasks)
+
+        if 'reducer' in self._get_step(step_num):
+            reducer_stats = read_stats(
+                'reducer', self._num_reducers(step_num))
+        else:
+            reducer_stats = []
+
+        # every key goes to exactly one reducer, so the heaviest keys
+        # overall are among the heaviest keys for each reducer
+        top_keys = sorted(
+            (k for s in reducer_stats for k in s['top_keys']),
+            key=lambda k: (k['records'], k['bytes']),
+            reverse=True)[:self._opts['skew_report']]
+
+        task_times = dict(mapper=[s['wall_time'] for s in mapper_stats])
+        if reducer_stats:
+            task_times['reducer'] = [s['wall_time'] for s in reducer_stats]
+
+        return dict(
+            top_keys=top_keys,
+            reducer_input=[dict(records=s['records'], bytes=s['bytes'])
+                           for s in reducer_stats],
+            task_times=task_times,
+        )
+
+    def _log_skew_report(self, step_num):
+        log.info('\n%s\n' % _format_skew_report(
+            self.skew_report()[step_num]))
+
 
 def _chmod_u_rx(path, recursive=False):
     """make *path* user readable and executable. If *recursive* is true,
     make *path* and everything inside it executable."""
     if recursive:
-        for dirname, _, filenames in os.walk(path, followlinks=True):
+        for dir_path, _, filenames in os.walk(path, followlinks=True):
             for filename in filenames:
-                _chmod_u_rx(join(dirname, filename))
+                _chmod_u_rx(join(dir_path, filename))
     else:
         if hasattr(os, 'chmod'):  # only available on Unix, Windows
             os.chmod(path, stat.S_IRUSR | stat.S_IXUSR)
 
 
-def _group_records_for_split(record_gen, split_size, reducer_key=None):
-    """Helper for _split_records()."""
-    split_num = 0
-    bytes_in_split = 0
+def _partition_lines(input_path, output_paths,
+                     get_key=None, get_partition=None, codec=None):
+    """Split lines from *input_path* between *output_paths*, so that
+    all lines with the same key end up in the same file.
+
+    *get_key(line)* gets the key from each line (by default, everything
+    up to the first tab), and *get_partition(key, num_partitions)* picks
+    which file it goes in (by default, we simulate Hadoop's
+    ``HashPartitioner``). See :py:meth:`SimMRJobRunner._partition_funcs`.
+
+    If *codec* is set, input and output files are compressed with it.
+
+    Helper for :py:meth:`SimMRJobRunner._run_mapper_and_combiner_func`.
+    """
+    log.debug('partitioning %s into %d files' % (
+        input_path, len(output_paths)))
+
+    get_key = get_key or _streaming_key
+    get_partition = get_partition or _hash_partition
+
+    # mapper output tends to have a lot of repeated keys
+    key_to_partition = {}
+
+    outputs = [_open_intermediate(output_path, 'wb', codec)
+               for output_path in output_paths]
+
+    try:
+        with _open_intermediate(input_path, 'rb', codec) as input:
+            for line in input:
+                key = get_key(line)
+
+                partition_num = key_to_partition.get(key)
+                if partition_num is None:
+                    partition_num = get_partition(key, len(outputs))
+                    if len(key_to_partition) < _MAX_CACHED_PARTITION_KEYS:
+                        key_to_partition[key] = partition_num
+
+                outputs[partition_num].write(line)
+    finally:
+        for output in outputs:
+            output.close()
+
+
+def _streaming_key(line, num_fields=1, separator=b'\t'):
+    """The key Hadoop Streaming would see for the given line of mapper
+    output: the first *num_fields* fields, or the entire line if it
+    doesn't have that many."""
+    if line.endswith(b'\n'):
+        line = line[:-1]
+        if line.endswith(b'\r'):
+            line = line[:-1]
+
+    fields = line.split(separator, num_fields)
+    return separator.join(fields[:num_fields])
+
+
+def _hash_partition(key, num_partitions):
+    """Simulate Hadoop's ``HashPartitioner``, which uses the key's hash
+    code (for ``Text``, a Java-style hash of its bytes)."""
+    return (_java_hash(bytearray(key), 1) & 0x7fffffff) % num_partitions
+
+
+def _key_field_based_partition(key, num_partitions, key_specs=(),
+                               separator=b'\t'):
+    """Simulate Hadoop's ``KeyFieldBasedPartitioner``, which hashes
+    only the parts of the key picked out by *key_specs* (see
+    :py:func:`_parse_key_specs`), using *separator* to split the key into
+    fields. With no key specs, it hashes the whole key as a Java string.
+    """
+    if not key_specs:
+        # hash of key as UTF-16, like java.lang.String.hashCode()
+        utf_16 = bytearray(key.decode('utf_8', 'replace').encode('utf_16_be'))
+        h = 0
+        for i in range(0, len(utf_16), 2):
+            h = (31 * h + (utf_16[i] << 8 | utf_16[i + 1])) & 0xffffffff
+
+        return (h & 0x7fffffff) % num_partitions
+
+    if not key:
+        return 0
+
+    field_lengths = [len(field) for field in key.split(separator)]
+
+    def field_offset(field_num):
+        # offset of the start of the given field (1-indexed)
+        return sum(field_lengths[:field_num - 1]) + (
+            len(separator) * (field_num - 1))
+
+    key_bytes = bytearray(key)
+    h = 0
+
+    for begin_field, begin_char, end_field, end_char in key_specs:
+        if begin_field > len(field_lengths):
+            continue
+
+        start = field_offset(begin_field) + begin_char - 1
+        if start >= len(key):
+            continue
+
+        if not end_field or end_field > len(field_lengths):
+            end = len(key) - 1
+        elif not end_char:
+            end = field_offset(end_field) + field_lengths[end_field - 1] - 1
+        else:
+            end = min(field_offset(end_field) + end_char - 1, len(key) - 1)
+
+        h = _java_hash(key_bytes[start:end + 1], h)
+
+    return (h & 0x7fffffff) % num_partitions
+
 
-    last_key_value = None
+def _java_hash(key_bytes, h):
+    """Update the 32-bit hash *h* with *key_bytes* (a :py:class:`bytearray`)
+    the way Hadoop does (``h = 31 * h + b`` for each signed byte *b*)."""
+    for b in key_bytes:
+        h = (31 * h + _SIGNED_BYTES[b]) & 0xffffffff
 
-    for record in record_gen:
-        same_key = False
+    return h
+
+
+def _parse_key_specs(options):
+    """Parse key specs (e.g. ``-k1,1``) out of
+    ``mapreduce.partition.keypartitioner.options`` into a list of tuples of
+    ``(begin_field, begin_char, end_field, end_char)``. *end_field* is 0 if
+    the key spec extends to the end of the key, and *end_char* is 0 if it
+    extends to the end of *end_field*.
+
+    Like Hadoop, we ignore anything we can't parse.
+    """
+    key_specs = []
+
+    args = options.split()
+    for i, arg in enumerate(args):
+        # allow "-k 1,1" as well as "-k1,1"
+        if arg == '-k' and i + 1 < len(args):
+            arg += args[i + 1]
+
+        m = _KEY_SPEC_RE.match(arg)
+        if m:
+            key_specs.append((
+                int(m.group('begin_field')),
+                int(m.group('begin_char') or 1),
+                int(m.group('end_field') or 0),
+                int(m.group('end_char') or 0),
+            ))
+
+    return key_specs
+
+
+def _to_bytes(s):
+    """Encode *s* as UTF-8, if it's not already bytes."""
+    if isinstance(s, bytes):
+        return s
+    else:
+        return s.encode('utf_8')
+
+
+class _SplitReader(object):
+    """Read-only file object for the lines in one split of an uncompressed
+    file (see :py:meth:`SimMRJobRunner._split_mapper_input`). Supports
+    ``read()``, ``readline()``, and iterating over lines.
+
+    As in Hadoop, the line in progress at *start* belongs to the previous
+    split, and the line in progress at *start* + *length* belongs to this
+    one, so every line is read by exactly one split.
+    """
+    def __init__(self, path, start, length):
+        self._file = open(path, 'rb')
+
+        try:
+            split_start = self._find_line_start(start)
+            split_end = max(self._find_line_start(start + length),
+                            split_start)
+        except:
+            self._file.close()
+            raise
 
-        if reducer_key:
-            key_value = reducer_key(record)
-            same_key = (key_value == last_key_value)
-            last_key_value = key_value
+        self._file.seek(split_start)
+        self._bytes_left = split_end - split_start
 
-        if bytes_in_split >= split_size and not same_key:
-            split_num += 1
-            bytes_in_split = 0
+    def _find_line_start(self, offset):
+        """Find the first line that starts at or after *offset*."""
+        if not offset:
+            return 0
 
-        yield split_num, record
-        bytes_in_split += len(record)
+        self._file.seek(offset - 1)
+        self._file.readline()
+        return self._file.tell()
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._bytes_left:
+            size = self._bytes_left
+
+        data = self._file.read(size)
+        self._bytes_left -= len(data)
+        return data
+
+    def readline(self):
+        if not self._bytes_left:
+            return b''
+
+        line = self._file.readline(self._bytes_left)
+        self._bytes_left -= len(line)
+        return line
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+def _write_split(map_split, dest_path):
+    """Write the input for one map task to *dest_path*, decompressing
+    if necessary.
+
+    Helper for :py:meth:`SimMRJobRunner._run_mapper_and_combiner_func`.
+    """
+    path = map_split['file']
+
+    log.debug('writing split %s:%d+%d -> %s' % (
+        path, map_split['start'], map_split['length'], dest_path))
+
+    with open(dest_path, 'wb') as dest:
+        if is_compressed(path):
+            with open(path, 'rb') as src:
+                for chunk in decompress(src, path):
+                    dest.write(chunk)
+        else:
+            with _SplitReader(path, map_split['start'],
+                              map_split['length']) as src:
+                shutil.copyfileobj(src, dest)
+
+
+class _CompressedFile(object):
+    """File object for an intermediate file compressed with *codec*
+    (``'lz4'``, ``'gzip'``, or ``'bz2'``; see
+    :py:meth:`SimMRJobRunner._map_output_codec`). Supports ``read()``,
+    ``readline()``, and iterating over lines in ``'rb'`` mode, and
+    ``write()`` and ``writelines()`` in ``'wb'`` mode.
+
+    Unlike the file objects it wraps, this has no ``fileno()``, so tasks
+    running in subprocesses get (de)compressed data through a pipe, not
+    the raw file. Writes are buffered so that we compress big chunks
+    rather than one line at a time.
+    """
+    def __init__(self, path, mode='rb', codec='gzip'):
+        if codec == 'gzip':
+            self._file = gzip.GzipFile(
+                path, mode, compresslevel=_GZIP_COMPRESSLEVEL)
+        elif codec == 'bz2':
+            self._file = bz2.BZ2File(path, mode)
+        elif codec == 'lz4' and lz4:
+            self._file = lz4.frame.open(path, mode)
+        else:
+            raise ValueError('unknown codec: %r' % (codec,))
+
+        self._write_buffer = []
+        self._bytes_in_write_buffer = 0
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def readline(self):
+        return self._file.readline()
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def write(self, data):
+        self._write_buffer.append(data)
+        self._bytes_in_write_buffer += len(data)
+
+        if self._bytes_in_write_buffer >= _COMPRESS_BUFFER_SIZE:
+            self.flush()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        if self._write_buffer:
+            self._file.write(b''.join(self._write_buffer))
+            self._write_buffer = []
+            self._bytes_in_write_buffer = 0
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+def _open_intermediate(path, mode='rb', codec=None):
+    """Open an intermediate file, which is compressed with *codec* if
+    it's set (see :py:class:`_CompressedFile`)."""
+    if codec:
+        return _CompressedFile(path, mode, codec)
+    else:
+        return open(path, mode)
+
+
+def _read_lines(paths, codec=None):
+    """Yield lines from each of the given intermediate files in turn."""
+    for path in paths:
+        with _open_intermediate(path, 'rb', codec) as f:
+            for line in f:
+                yield line
+
+
+def _compress_file(path, dest, codec):
+    """Copy *path* to *dest*, compressing it with *codec*."""
+    log.debug('compressing %s -> %s' % (path, dest))
+
+    with open(path, 'rb') as src, \
+            _open_intermediate(dest, 'wb', codec) as dest_file:
+        shutil.copyfileobj(src, dest_file, _COMPRESS_BUFFER_SIZE)
 
 
 def _run_mapper_and_combiner(
-        run_mapper, sort_input, run_combiner,
-        mapper_input_path, mapper_output_path, combiner_input_path):
-    """Helper for :py:meth:`SimMRJobRunner._run_mapper_and_combiner_func`."""
+        write_split, run_mapper, sort_input, run_combiner, partition,
+        mapper_input_path, mapper_output_path, combiner_input_path,
+        make_sorter=None, stats_path=None, codec=None):
+    """Helper for :py:meth:`SimMRJobRunner._run_mapper_and_combiner_func`.
+
+    If *make_sorter* is set, use the :py:class:`_LineSorter` it returns to
+    pipe the mapper's output to the combiner, rather than writing it to
+    *mapper_output_path* and sorting it into *combiner_input_path*.
+
+    If *stats_path* is set, record how long the task took there.
+
+    If *codec* is set, the mapper's output is compressed with it (which
+    matters if there is no mapper, and we have to copy its input).
+    """
     # we don't need *combiner_output_path* because *run_combiner* already
     # knows it
+    start = time.time()
 
-    if run_mapper:
-        run_mapper()
+    if write_split:
+        write_split()
+
+    if make_sorter:
+        with make_sorter() as sorter:
+            run_mapper(stdout=sorter)
+            run_combiner(stdin=iter(sorter))
     else:
-        _symlink_or_copy(mapper_input_path, mapper_output_path)
+        if run_mapper:
+            run_mapper()
+        elif codec:
+            _compress_file(mapper_input_path, mapper_output_path, codec)
+        else:
+            _symlink_or_copy(mapper_input_path, mapper_output_path)
 
-    if run_combiner:
-        sort_input([mapper_output_path], combiner_input_path)
-        run_combiner()
+        if run_combiner:
+            sort_input([mapper_output_path], combiner_input_path)
+            run_combiner()
+
+    if partition:
+        partition()
+
+    if stats_path:
+        _write_task_stats(stats_path, dict(wall_time=time.time() - start))
 
 
 def _run_task(invoke_task,
               task_type, step_num, task_num,
-              input_path, output_path, stderr_path, wd, env):
+              input_path, output_path, stderr_path, wd, env,
+              input_split=None, stdin=None, stdout=None,
+              input_codec=None, output_codec=None):
     """Set up filehandles and call *invoke_task()*.
 
+    If *input_split* is set, read input directly from that split of the
+    original input file (see :py:class:`_SplitReader`) rather than from
+    *input_path*.
+
+    If *input_codec* or *output_codec* is set, *input_path* or
+    *output_path* is compressed with it.
+
+    You may also pass in *stdin* (any iterable of lines) or *stdout*
+    (anything with a ``write()`` method) to use in place of *input_path*
+    and *output_path*. These are not closed when the task is done.
+
     Helper for :py:meth:`SimMRJobRunner._run_task_func`.
     """
     log.debug('running step %d, %s %d' % (step_num, task_type, task_num))
 
-    with open(input_path, 'rb') as stdin, \
-            open(output_path, 'wb') as stdout, \
+    if input_split:
+        open_input = partial(
+            _SplitReader, input_split['file'],
+            input_split['start'], input_split['length'])
+    else:
+        open_input = partial(
+            _open_intermediate, input_path, 'rb', input_codec)
+
+    open_output = partial(
+        _open_intermediate, output_path, 'wb', output_codec)
+
+    with _open_unless_given(stdin, open_input) as stdin, \
+            _open_unless_given(stdout, open_output) as stdout, \
             open(stderr_path, 'wb') as stderr:
 
       invoke_task(
           stdin, stdout, stderr, wd, env)
 
 
-def _sort_lines_in_memory(input_paths, output_path, sort_values=False):
+@contextmanager
+def _open_unless_given(fileobj, open_func):
+    """Yield *fileobj*, or if it's ``None``, open a file with
+    *open_func()*, yield it, and close it afterwards.
+
+    Helper for :py:func:`_run_task`."""
+    if fileobj is None:
+        with open_func() as f:
+            yield f
+    else:
+        yield fileobj
+
+
+def _sort_and_run_reducer(
+        sort_input, run_reducer, partition_paths, reducer_input_path,
+        stats_path=None, num_top_keys=None, codec=None):
+    """Helper for :py:meth:`SimMRJobRunner._sort_and_run_reducer_func`.
+
+    If *stats_path* is set, record how long the task took, how much input
+    it got, and its *num_top_keys* heaviest keys there.
+
+    If *codec* is set, *reducer_input_path* is compressed with it.
+    """
+    start = time.time()
+
+    sort_input(partition_paths, reducer_input_path)
+    run_reducer()
+
+    if stats_path:
+        stats = _reducer_input_stats(reducer_input_path, num_top_keys,
+                                     codec=codec)
+        stats['wall_time'] = time.time() - start
+        _write_task_stats(stats_path, stats)
+
+
+def _reducer_input_stats(input_path, num_top_keys=None, codec=None):
+    """Count the records and bytes in a (sorted) reducer input file,
+    and find the *num_top_keys* keys with the most records.
+
+    If *codec* is set, *input_path* is compressed with it (we still
+    count uncompressed bytes)."""
+    records = 0
+    num_bytes = 0
+    # min-heap of (records, bytes, key)
+    top_keys = []
+
+    with _open_intermediate(input_path, 'rb', codec) as input:
+        for key, lines in groupby(input, _streaming_key):
+            key_records = 0
+            key_bytes = 0
+            for line in lines:
+                key_records += 1
+                key_bytes += len(line)
+
+            records += key_records
+            num_bytes += key_bytes
+
+            if not num_top_keys:
+                continue
+
+            entry = (key_records, key_bytes, key)
+            if len(top_keys) < num_top_keys:
+                heapq.heappush(top_keys, entry)
+            elif entry > top_keys[0]:
+                heapq.heapreplace(top_keys, entry)
+
+    return dict(
+        records=records,
+        bytes=num_bytes,
+        top_keys=[
+            dict(key=to_unicode(key), records=key_records, bytes=key_bytes)
+            for key_records, key_bytes, key in sorted(top_keys, reverse=True)
+        ],
+    )
+
+
+def _write_task_stats(path, stats):
+    """Write *stats* (a dictionary) to *path* as JSON."""
+    with open(path, 'w') as f:
+        json.dump(stats, f)
+
+
+def _format_skew_report(report, indent='\t'):
+    """Format a single step's :py:meth:`SimMRJobRunner.skew_report`
+    for logging, with no trailing newline."""
+    message = 'Skew report:'
+
+    if report['top_keys']:
+        message += '\n%sHeaviest keys (records, bytes):' % indent
+        for k in report['top_keys']:
+            message += '\n%s%s%s\t%d\t%d' % (
+                indent, indent, k['key'], k['records'], k['bytes'])
+
+    def format_range(name, values, fmt):
+        if not values:
+            return ''
+
+        values = sorted(values)
+        return '\n%s%s: min=%s median=%s max=%s' % (
+            indent, name, fmt % values[0], fmt % values[len(values) // 2],
+            fmt % values[-1])
+
+    message += format_range(
+        'Reducer input records',
+        [r['records'] for r in report['reducer_input']], '%d')
+    message += format_range(
+        'Reducer input bytes',
+        [r['bytes'] for r in report['reducer_input']], '%d')
+
+    for task_type in 'mapper', 'reducer':
+        message += format_range(
+            '%s wall time (seconds)' % task_type.capitalize(),
+            report['task_times'].get(task_type), '%.2f')
+
+    return message
+
+
+def _sort_lines(input_paths, output_path, sort_values=False,
+                buffer_size=None, tmp_dir=None, codec=None):
     """Sort lines from *input_paths* and output them into *output_path*.
 
     If *sort_values* is true, sort by the entire line; otherwise just sort
     by everything up to the first tab.
+
+    If there are more than *buffer_size* bytes of lines, sort them in
+    chunks of about *buffer_size* bytes, write each chunk to a temp
+    directory inside *tmp_dir*, and then merge the chunks together (so we
+    don't have to fit all the lines in memory). Lines with the same key
+    stay in the order they were read.
+
+    If *codec* is set, input files, *output_path*, and sorted chunks
+    are all compressed with it.
     """
-    log.debug('sorting in memory: %s -> %s' %
+    log.debug('sorting: %s -> %s' %
               (', '.join(input_paths), output_path))
-    lines = []
 
-    for input_path in input_paths:
-        with open(input_path, 'rb') as input:
-            lines.extend(input)
+    with _LineSorter(sort_values=sort_values, buffer_size=buffer_size,
+                     tmp_dir=tmp_dir, codec=codec) as sorter:
+        for line in _read_lines(input_paths, codec):
+            sorter.add_line(line)
 
-    if sort_values:
-        lines.sort()
-    else:
-        lines.sort(key=lambda line: line.split(b'\t')[0])
+        with _open_intermediate(output_path, 'wb', codec) as output:
+            output.writelines(sorter)
 
-    with open(output_path, 'wb') as output:
-        for line in lines:
-            output.write(line)
 
+class _LineSorter(object):
+    """Sorts lines in bounded memory (see :py:func:`_sort_lines`).
 
-def _split_records(record_gen, split_size, reducer_key=None):
-    """Given a stream of records (bytestrings, usually lines), yield groups of
-    records (as generators such that the total number of bytes in each group
-    only barely exceeds *split_size*, and, if *reducer_key* is set, consecutive
-    records with the same key will be in the same split."""
-    grouped_record_gen = _group_records_for_split(
-        record_gen, split_size, reducer_key)
+    Add lines one at a time with :py:meth:`add_line`, or write arbitrary
+    bytes to it like a file (so it can stand in for a task's stdout). Then
+    iterate over it to get the lines back in sorted order. Use it as
+    a context manager (or call :py:meth:`close`) to clean up any sorted
+    chunks it had to write to disk.
 
-    for group_id, grouped_records in itertools.groupby(
-            grouped_record_gen, key=lambda gr: gr[0]):
-        yield (record for _, record in grouped_records)
-    else:
-        # special case for empty files
-        yield ()
+    If *codec* is set, sorted chunks are compressed with it.
+    """
+    def __init__(self, sort_values=False, buffer_size=None, tmp_dir=None,
+                 codec=None):
+        if sort_values:
+            self._key = None
+        else:
+            self._key = _line_key
+
+        self._buffer_size = buffer_size
+        self._tmp_dir = tmp_dir
+        self._codec = codec
+
+        self._lines = []
+        self._bytes_in_buffer = 0
+        # bytes written since the last newline
+        self._partial_line = b''
+
+        self._chunk_dir = None
+        self._chunk_paths = []
+        self._chunks = []
+
+    def add_line(self, line):
+        self._lines.append(line)
+        self._bytes_in_buffer += len(line)
+
+        if self._buffer_size and self._bytes_in_buffer >= self._buffer_size:
+            self._write_chunk()
+
+    def write(self, data):
+        if self._partial_line:
+            data = self._partial_line + data
+
+        end = data.rfind(b'\n') + 1
+        self._partial_line = data[end:]
+
+        if end:
+            for line in data[:end - 1].split(b'\n'):
+                self.add_line(line + b'\n')
+
+    def flush(self):
+        pass
+
+    def _write_chunk(self):
+        if self._chunk_dir is None:
+            self._chunk_dir = mkdtemp(prefix='sort-', dir=self._tmp_dir)
+
+        chunk_path = join(self._chunk_dir, '%05d' % len(self._chunk_paths))
+        log.debug('  writing sorted chunk: %s' % chunk_path)
+
+        self._lines.sort(key=self._key)
+        with _open_intermediate(chunk_path, 'wb', self._codec) as chunk:
+            chunk.writelines(self._lines)
+
+        self._chunk_paths.append(chunk_path)
+        self._lines = []
+        self._bytes_in_buffer = 0
+
+    def __iter__(self):
+        if self._partial_line:
+            self.add_line(self._partial_line)
+            self._partial_line = b''
+
+        self._lines.sort(key=self._key)
+
+        if not self._chunk_paths:
+            return iter(self._lines)
+
+        log.debug('  merging %d sorted chunks' % (len(self._chunk_paths) + 1))
+
+        self._chunks = [_open_intermediate(chunk_path, 'rb', self._codec)
+                        for chunk_path in self._chunk_paths]
+
+        # lines still in memory came last, so they go last on ties
+        sorted_streams = [
+            _decorate_lines(stream, self._key, i)
+            for i, stream in enumerate(self._chunks + [self._lines])
+        ]
+
+        return (line for _, _, line in heapq.merge(*sorted_streams))
+
+    def close(self):
+        for chunk in self._chunks:
+            chunk.close()
+
+        if self._chunk_dir:
+            shutil.rmtree(self._chunk_dir)
+            self._chunk_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+def _decorate_lines(lines, key, stream_num):
+    """Helper for :py:class:`_LineSorter`. Yield ``(key, stream_num, line)``
+    for each line, so that :py:func:`heapq.merge` compares by key and then
+    breaks ties by the order of the sorted streams (and never compares
+    the lines themselves)."""
+    for line in lines:
+        if key is None:
+            yield line, stream_num, line
+        else:
+            yield key(line), stream_num, line
+
+
+def _line_key(line):
+    """Sort key for a line of mapper output: everything up to the first
+    tab."""
+    return line.split(b'\t')[0]
 
 
 def _symlink_or_copy(path, dest):
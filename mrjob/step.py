@@ -23,11 +23,11 @@ STEP_TYPES = ('jar', 'spark', 'spark_jar', 'spark_script', 'streaming')
 
 # Function names mapping to mapper, reducer, and combiner operations
 _MAPPER_FUNCS = ('mapper', 'mapper_init', 'mapper_final', 'mapper_cmd',
-                 'mapper_pre_filter')
+                 'mapper_pre_filter', 'mapper_batch', 'mapper_combine')
 _COMBINER_FUNCS = ('combiner', 'combiner_init', 'combiner_final',
-                   'combiner_cmd', 'combiner_pre_filter')
+                   'combiner_cmd', 'combiner_pre_filter', 'combiner_batch')
 _REDUCER_FUNCS = ('reducer', 'reducer_init', 'reducer_final', 'reducer_cmd',
-                  'reducer_pre_filter')
+                  'reducer_pre_filter', 'reducer_batch')
 _HADOOP_OPTS = ('jobconf',)
 
 # params to specify how to run the step. need at least one of these
@@ -153,6 +153,18 @@ class MRStep(object):
     :param combiner_final: function with same function signature as
                            :py:meth:`~mrjob.job.MRJob.combiner_final`, or
                            ``None`` for no final combiner action.
+    :param mapper_combine: function with same function signature as
+                           :py:meth:`~mrjob.job.MRJob.mapper_combine`, or
+                           ``None`` for no in-mapper combining.
+    :param mapper_batch: function with same function signature as
+                         :py:meth:`~mrjob.job.MRJob.mapper_batch`, to use
+                         instead of *mapper*.
+    :param reducer_batch: function with same function signature as
+                          :py:meth:`~mrjob.job.MRJob.reducer_batch`, to use
+                          instead of *reducer*.
+    :param combiner_batch: function with same function signature as
+                           :py:meth:`~mrjob.job.MRJob.combiner_batch`, to use
+                           instead of *combiner*.
     :param jobconf: dictionary with custom jobconf arguments to pass to
                     hadoop.
     """
@@ -195,6 +207,11 @@ class MRStep(object):
         _check_cmd('combiner_cmd', _prefix_set('combiner'))
         _check_cmd('reducer_cmd', _prefix_set('reducer'))
 
+        for func in ('mapper', 'combiner', 'reducer'):
+            if steps[func] and steps[func + '_batch']:
+                raise ValueError("Can't specify both %s and %s_batch" % (
+                    func, func))
+
         self._steps = steps
 
     def __repr__(self):
@@ -24,6 +24,9 @@ try:
         'extras_require': {
             # highly recommended, but requires a compiler
             'ujson': ['ujson'],
+            # to read .lz4 and .zst files
+            'lz4': ['lz4'],
+            'zstandard': ['zstandard'],
         },
         'install_requires': [
             'boto3>=1.4.6',
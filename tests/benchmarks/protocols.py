@@ -0,0 +1,304 @@
+# Copyright 2017 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Measure how fast each protocol in :py:mod:`mrjob.protocol` can write
+and read lines, and how big those lines are, for a few typical kinds of
+keys and values (small ints, strings, bytes, nested dicts, and large
+lists).
+
+Protocols whose optional libraries aren't installed are skipped, as are
+protocols that can't encode a given kind of data (e.g.
+:py:class:`~mrjob.protocol.TextProtocol` and small ints).
+
+Usage::
+
+    python -m tests.benchmarks.protocols [--records N] [--repeat N]
+        [--protocol NAME ...] [--output report.json]
+
+This prints a table, and if you set ``--output``, writes a JSON report
+(use ``-`` for stdout) that looks like::
+
+    {"python": "3.6.1", "mrjob": "0.6.0", "records": 100000, ...
+     "results": [{"protocol": "StandardJSONProtocol",
+                  "data": "small_ints", "records": 100000,
+                  "write_per_sec": 812345.6, "read_per_sec": 654321.0,
+                  "bytes_per_record": 11.9, "round_trip": true}, ...]}
+
+``round_trip`` is false if decoded data isn't equal to what was encoded
+(e.g. JSON turns tuples into lists). ``write_per_sec`` and
+``read_per_sec`` are records per second, best out of ``--repeat`` tries.
+There are 100x fewer ``large_lists`` records, since each one has 1000
+numbers in it.
+
+Skipped protocols have a ``skipped`` field explaining why, instead.
+"""
+from __future__ import print_function
+
+import json
+import platform
+import sys
+import time
+from argparse import ArgumentParser
+
+import mrjob
+import mrjob.protocol
+
+# protocols to benchmark, and which optional module (an attribute of
+# mrjob.protocol) each needs, if any
+PROTOCOLS = [
+    ('StandardJSONProtocol', None),
+    ('StandardJSONValueProtocol', None),
+    ('SimpleJSONProtocol', 'simplejson'),
+    ('SimpleJSONValueProtocol', 'simplejson'),
+    ('RapidJSONProtocol', 'rapidjson'),
+    ('RapidJSONValueProtocol', 'rapidjson'),
+    ('UltraJSONProtocol', 'ujson'),
+    ('UltraJSONValueProtocol', 'ujson'),
+    ('PickleProtocol', None),
+    ('PickleValueProtocol', None),
+    ('MarshalProtocol', None),
+    ('MarshalValueProtocol', None),
+    ('ReprProtocol', None),
+    ('ReprValueProtocol', None),
+    ('BytesProtocol', None),
+    ('BytesValueProtocol', None),
+    ('TextProtocol', None),
+    ('TextValueProtocol', None),
+]
+
+# kinds of data to try, in order
+DATA_NAMES = ['small_ints', 'strings', 'bytes', 'nested_dicts',
+              'large_lists']
+
+
+def main(cl_args=None):
+    arg_parser = _make_arg_parser()
+    options = arg_parser.parse_args(cl_args)
+
+    protocol_names = options.protocols or [name for name, _ in PROTOCOLS]
+    data_names = options.data or DATA_NAMES
+
+    report = dict(
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        mrjob=mrjob.__version__,
+        records=options.records,
+        repeat=options.repeat,
+        results=[],
+    )
+
+    # keep stdout clean for the JSON report
+    table_file = sys.stderr if options.output == '-' else sys.stdout
+
+    print('%-26s %-13s %13s %13s %10s %6s' % (
+        'protocol', 'data', 'write (r/s)', 'read (r/s)', 'bytes/r',
+        'exact'), file=table_file)
+
+    for protocol_name in protocol_names:
+        for data_name in data_names:
+            result = benchmark(protocol_name, data_name,
+                               options.records, options.repeat)
+            report['results'].append(result)
+
+            _print_result(result, table_file)
+
+    if options.output == '-':
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+    elif options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+
+def benchmark(protocol_name, data_name, num_records, repeat):
+    """Benchmark one protocol with one kind of data, and return a
+    dictionary describing the results (see module docstring)."""
+    # records with large lists are 1000x bigger than the others
+    num_records = max(1, num_records // _RECORDS_DIVISOR.get(data_name, 1))
+
+    result = dict(protocol=protocol_name, data=data_name,
+                  records=num_records)
+
+    skipped = _why_skip(protocol_name)
+    if skipped:
+        result['skipped'] = skipped
+        return result
+
+    protocol_cls = getattr(mrjob.protocol, protocol_name)
+    records = _make_records(data_name, num_records,
+                            protocol_name.endswith('ValueProtocol'))
+
+    # some protocols (e.g. BytesValueProtocol) pass through values they
+    # can't encode rather than raising an exception
+    try:
+        lines = [protocol_cls().write(k, v) for k, v in records]
+    except Exception as ex:
+        result['skipped'] = "can't encode: %r" % ex
+        return result
+
+    if not all(isinstance(line, bytes) for line in lines):
+        result['skipped'] = "can't encode: didn't return bytes"
+        return result
+
+    result['write_per_sec'] = _records_per_sec(
+        lambda p: [p.write(k, v) for k, v in records],
+        protocol_cls, num_records, repeat)
+
+    result['read_per_sec'] = _records_per_sec(
+        lambda p: [p.read(line) for line in lines],
+        protocol_cls, num_records, repeat)
+
+    # count the newline that separates lines, too
+    result['bytes_per_record'] = (
+        sum(len(line) + 1 for line in lines) / float(num_records))
+
+    protocol = protocol_cls()
+    result['round_trip'] = all(
+        protocol.read(line) == record for line, record in zip(lines, records))
+
+    return result
+
+
+def _why_skip(protocol_name):
+    """Return a reason to skip *protocol_name*, or ``None``."""
+    if not hasattr(mrjob.protocol, protocol_name):
+        return 'no such protocol'
+
+    module_name = dict(PROTOCOLS).get(protocol_name)
+    if module_name and getattr(mrjob.protocol, module_name) is None:
+        return '%s not installed' % module_name
+
+    return None
+
+
+def _make_records(data_name, num_records, value_only=False):
+    """Make a list of *num_records* (key, value) pairs of the given kind.
+    If *value_only* is true, keys are all ``None``."""
+    make_record = _RECORD_FUNCS[data_name]
+
+    records = [make_record(i) for i in range(num_records)]
+
+    if value_only:
+        records = [(None, v) for _, v in records]
+
+    return records
+
+
+def _small_ints_record(i):
+    return i % 1000, i % 7
+
+
+def _strings_record(i):
+    # about a hundred distinct keys, like a word count
+    return ('word%d' % (i % 97),
+            u'the quick brown fox jumps over the lazy dog %d' % i)
+
+
+def _bytes_record(i):
+    return (b'word%d' % (i % 97),
+            b'the quick brown fox jumps over the lazy dog %d' % i)
+
+
+def _nested_dicts_record(i):
+    return (
+        ['user', i % 1000],
+        {'id': i,
+         'name': u'user %d' % i,
+         'score': i * 0.5,
+         'active': bool(i % 2),
+         'tags': [u'a', u'b', u'c'],
+         'address': {'city': u'San Francisco', 'zip': u'%05d' % i}},
+    )
+
+
+def _large_lists_record(i):
+    return i % 100, list(range(i % 10, i % 10 + 1000))
+
+
+# use fewer of some kinds of records, so that each kind takes roughly
+# the same amount of time
+_RECORDS_DIVISOR = dict(large_lists=100)
+
+_RECORD_FUNCS = dict(
+    small_ints=_small_ints_record,
+    strings=_strings_record,
+    bytes=_bytes_record,
+    nested_dicts=_nested_dicts_record,
+    large_lists=_large_lists_record,
+)
+
+
+def _records_per_sec(func, protocol_cls, num_records, repeat):
+    """Best records/sec out of *repeat* calls to ``func(protocol)``,
+    using a new protocol instance each time (so key caching starts
+    from scratch)."""
+    best = None
+
+    for _ in range(repeat):
+        protocol = protocol_cls()
+
+        start = time.time()
+        func(protocol)
+        elapsed = time.time() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return num_records / max(best, 1e-9)
+
+
+def _print_result(result, f):
+    if result.get('skipped'):
+        print('%-26s %-13s (skipped: %s)' % (
+            result['protocol'], result['data'], result['skipped']), file=f)
+    else:
+        print('%-26s %-13s %13.0f %13.0f %10.1f %6s' % (
+            result['protocol'], result['data'],
+            result['write_per_sec'], result['read_per_sec'],
+            result['bytes_per_record'],
+            'yes' if result['round_trip'] else 'no'), file=f)
+
+
+def _make_arg_parser():
+    arg_parser = ArgumentParser(description=(
+        'Measure read and write speed and encoded size for the protocols'
+        ' in mrjob.protocol'))
+
+    arg_parser.add_argument(
+        '--records', dest='records', type=int, default=100000,
+        help='Number of records of each kind of data (default: 100000)')
+
+    arg_parser.add_argument(
+        '--repeat', dest='repeat', type=int, default=3,
+        help='Time reading and writing this many times, and report the'
+        ' best time (default: 3)')
+
+    arg_parser.add_argument(
+        '--protocol', dest='protocols', action='append',
+        help=('Name of a protocol class to benchmark (e.g. PickleProtocol).'
+              ' May be used more than once. Default is all protocols.'))
+
+    arg_parser.add_argument(
+        '--data', dest='data', action='append', choices=DATA_NAMES,
+        help=('Kind of data to benchmark. May be used more than once.'
+              ' Default is all kinds.'))
+
+    arg_parser.add_argument(
+        '-o', '--output', dest='output',
+        help='Write a JSON report to this path (use - for stdout)')
+
+    return arg_parser
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# Copyright 2017 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compare how many lines per second tasks can read from plain, ``.gz``,
+and ``.bz2`` input, using :py:func:`~mrjob.cat.open_input` (what
+:py:meth:`MRJob._read_input` uses) versus
+``to_lines(decompress(...))`` (what it used to use).
+
+Usage::
+
+    python -m tests.benchmarks.read_input [--lines N] [--repeat N]
+"""
+from __future__ import print_function
+
+import bz2
+import gzip
+import os
+import shutil
+import time
+from argparse import ArgumentParser
+from tempfile import mkdtemp
+
+from mrjob.cat import decompress
+from mrjob.cat import open_input
+from mrjob.util import to_lines
+
+
+def main(cl_args=None):
+    arg_parser = _make_arg_parser()
+    options = arg_parser.parse_args(cl_args)
+
+    tmp_dir = mkdtemp()
+    try:
+        paths = _write_input_files(tmp_dir, options.lines)
+
+        print('%-8s %15s %15s %8s' % (
+            'input', 'before (l/s)', 'after (l/s)', 'speedup'))
+
+        for path in paths:
+            before = _lines_per_sec(_read_lines_before, path, options.repeat)
+            after = _lines_per_sec(_read_lines_after, path, options.repeat)
+
+            ext = os.path.splitext(path)[1] or '(text)'
+            print('%-8s %15.0f %15.0f %7.1fx' % (
+                ext, before, after, after / before))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def _read_lines_before(path):
+    with open(path, 'rb') as f:
+        for line in to_lines(decompress(f, path)):
+            yield line
+
+
+def _read_lines_after(path):
+    with open_input(path) as f:
+        for line in f:
+            yield line
+
+
+def _lines_per_sec(read_lines, path, repeat):
+    """Best lines/sec out of *repeat* tries"""
+    best = None
+
+    for _ in range(repeat):
+        start = time.time()
+        num_lines = 0
+        for _ in read_lines(path):
+            num_lines += 1
+        elapsed = time.time() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return num_lines / best
+
+
+def _write_input_files(tmp_dir, num_lines):
+    """Write the same tab-separated lines to a plain, a .gz, and a
+    .bz2 file, and return their paths."""
+    data = b''.join(
+        b'%d\tthe quick brown fox jumps over the lazy dog %d\n' % (i, i * 7)
+        for i in range(num_lines))
+
+    paths = [os.path.join(tmp_dir, 'input' + ext)
+             for ext in ('', '.gz', '.bz2')]
+
+    with open(paths[0], 'wb') as f:
+        f.write(data)
+
+    with gzip.GzipFile(paths[1], 'wb') as f:
+        f.write(data)
+
+    with open(paths[2], 'wb') as f:
+        f.write(bz2.compress(data))
+
+    return paths
+
+
+def _make_arg_parser():
+    arg_parser = ArgumentParser(description=(
+        'Measure how fast tasks read lines from plain, .gz, and .bz2'
+        ' input'))
+
+    arg_parser.add_argument(
+        '--lines', dest='lines', type=int, default=1000000,
+        help='Number of lines in each input file (default: 1000000)')
+
+    arg_parser.add_argument(
+        '--repeat', dest='repeat', type=int, default=3,
+        help='Read each file this many times, and report the best'
+        ' time (default: 3)')
+
+    return arg_parser
+
+
+if __name__ == '__main__':
+    main()
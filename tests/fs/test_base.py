@@ -15,6 +15,7 @@ import os.path
 from unittest import TestCase
 
 from mrjob.fs.base import Filesystem
+from mrjob.fs.base import _byte_ranges
 
 from tests.py2 import Mock
 from tests.py2 import patch
@@ -65,3 +66,19 @@ class JoinTestCase(SandboxedTestCase):
                          'hdfs://host2/path')
         self.assertEqual(self.fs.join('/', 'hdfs://host2/path', 'subdir'),
                          'hdfs://host2/path/subdir')
+
+
+class ByteRangesTestCase(TestCase):
+
+    def test_empty(self):
+        self.assertEqual(_byte_ranges(0, 0, 10), [])
+
+    def test_one_part(self):
+        self.assertEqual(_byte_ranges(0, 10, 10), [(0, 10)])
+
+    def test_last_part_is_short(self):
+        self.assertEqual(_byte_ranges(0, 25, 10),
+                         [(0, 10), (10, 20), (20, 25)])
+
+    def test_start(self):
+        self.assertEqual(_byte_ranges(10, 25, 10), [(10, 20), (20, 25)])
@@ -242,3 +242,76 @@ class GCSFSHTTPErrorTestCase(PatcherTestCase):
 
             with self.assertRaises(google_http.HttpError):
                 self.fs._download_io(self.gcs_path, io_obj)
+
+
+@skipIf(
+    hasattr(sys, 'pypy_version_info') and (3, 0) <= sys.version_info < (3, 3),
+    "googleapiclient doesn't work with PyPy 3")
+class DownloadIOInPartsTestCase(PatcherTestCase):
+
+    DATA = b''.join(b'line %d\n' % i for i in range(100))
+
+    def setUp(self):
+        super(DownloadIOInPartsTestCase, self).setUp()
+
+        self.fs = GCSFilesystem(download_part_size=100, download_threads=3)
+        self.gcs_path = 'gs://walrus/data'
+
+        objects_ret = mock.MagicMock()
+        objects_ret.get_media.return_value = google_http.HttpRequest(
+            None, None, self.gcs_path)
+
+        api_client = mock.MagicMock()
+        api_client.objects.return_value = objects_ret
+
+        self.fs._api_client = api_client
+
+        self.io_obj = io.BytesIO()
+
+        # the first chunk comes from MediaIoBaseDownload
+        def next_chunk():
+            self.io_obj.write(self.DATA[:100])
+
+            status = mock.Mock(resumable_progress=100,
+                               total_size=len(self.DATA))
+            status.progress.return_value = 100.0 / len(self.DATA)
+
+            return status, False
+
+        self.next_chunk = self.start(patch.object(
+            google_http.MediaIoBaseDownload, 'next_chunk',
+            side_effect=next_chunk))
+
+        # the rest come from _download_range()
+        def download_range(src_uri, start, end):
+            return self.DATA[start:end]
+
+        self.download_range = self.start(patch.object(
+            self.fs, '_download_range', side_effect=download_range))
+
+    def test_download_in_parts(self):
+        self.fs._download_io(self.gcs_path, self.io_obj)
+
+        self.assertEqual(self.io_obj.getvalue(), self.DATA)
+
+        self.assertEqual(self.next_chunk.call_count, 1)
+        self.assertEqual(
+            sorted(args[1:] for args, kwargs in
+                   self.download_range.call_args_list),
+            [(start, min(start + 100, len(self.DATA)))
+             for start in range(100, len(self.DATA), 100)])
+
+    def test_disable_with_download_threads(self):
+        self.fs._download_threads = 0
+        self.next_chunk.side_effect = None
+        self.next_chunk.return_value = (None, True)
+
+        self.fs._download_io(self.gcs_path, self.io_obj)
+
+        self.assertFalse(self.download_range.called)
+
+    def test_error_in_part(self):
+        self.download_range.side_effect = IOError
+
+        self.assertRaises(
+            IOError, self.fs._download_io, self.gcs_path, self.io_obj)
@@ -17,8 +17,10 @@ import gzip
 import os
 from os.path import join
 
+from mrjob.cat import decompress
 from mrjob.fs.local import LocalFilesystem
 
+from tests.py2 import patch
 from tests.sandbox import SandboxedTestCase
 
 class CatTestCase(SandboxedTestCase):
@@ -60,6 +62,20 @@ class CatTestCase(SandboxedTestCase):
             b''.join(self.fs._cat_file(input_bz2_path)),
             b'bar\nbar\nfoo\n')
 
+    def test_bufsize(self):
+        input_gz_path = join(self.tmp_dir, 'input.gz')
+        with gzip.GzipFile(input_gz_path, 'wb') as input_gz:
+            input_gz.write(b'foo\nbar\n')
+
+        with patch('mrjob.fs.local.decompress',
+                   side_effect=decompress) as m_decompress:
+            self.assertEqual(
+                b''.join(self.fs.cat(input_gz_path, bufsize=3)),
+                b'foo\nbar\n')
+
+        self.assertEqual(m_decompress.call_count, 1)
+        self.assertEqual(m_decompress.call_args[1], dict(bufsize=3))
+
 class LocalFSTestCase(SandboxedTestCase):
 
     def setUp(self):
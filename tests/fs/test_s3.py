@@ -16,10 +16,12 @@ import bz2
 
 from botocore.exceptions import ClientError
 
+from mrjob.cat import DEFAULT_BUFSIZE
 from mrjob.fs.s3 import S3Filesystem
 
 from tests.compress import gzip_compress
 from tests.mock_boto3 import MockBoto3TestCase
+from tests.mock_boto3.s3 import MockS3Client
 from tests.py2 import patch
 
 
@@ -55,13 +57,115 @@ class CatTestCase(MockBoto3TestCase):
 
     def test_chunks_file(self):
         self.add_mock_s3_data(
-            {'walrus': {'data/foo': b'foo\n' * 1000}})
+            {'walrus': {'data/foo': b'foo\n' * DEFAULT_BUFSIZE}})
 
         self.assertGreater(
             len(list(self.fs._cat_file('s3://walrus/data/foo'))),
             1)
 
 
+class CatInPartsTestCase(MockBoto3TestCase):
+
+    DATA = b''.join(b'line %d\n' % i for i in range(100))
+
+    def setUp(self):
+        super(CatInPartsTestCase, self).setUp()
+        self.fs = S3Filesystem(download_part_size=100, download_threads=3)
+
+        self.cat_key_in_parts = self.start(patch.object(
+            S3Filesystem, '_cat_key_in_parts',
+            side_effect=S3Filesystem._cat_key_in_parts,
+            autospec=True))
+
+    def test_cat_in_parts(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': self.DATA}})
+
+        self.assertEqual(
+            b''.join(self.fs._cat_file('s3://walrus/data/foo')),
+            self.DATA)
+
+        self.assertTrue(self.cat_key_in_parts.called)
+
+    def test_parts_use_client(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': self.DATA + b'x'}})
+
+        with patch.object(MockS3Client, 'get_object',
+                          side_effect=MockS3Client.get_object,
+                          autospec=True) as get_object:
+            self.assertEqual(
+                b''.join(self.fs._cat_file('s3://walrus/data/foo')),
+                self.DATA + b'x')
+
+        self.assertEqual(
+            sorted(kwargs['Range'] for _, kwargs in get_object.call_args_list),
+            ['bytes=100-199', 'bytes=200-299', 'bytes=300-399',
+             'bytes=400-499', 'bytes=500-599', 'bytes=600-699',
+             'bytes=700-790'])
+
+    def test_last_part_is_short(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': self.DATA + b'x'}})
+
+        self.assertEqual(
+            b''.join(self.fs._cat_file('s3://walrus/data/foo')),
+            self.DATA + b'x')
+
+    def test_cat_gz_in_parts(self):
+        self.add_mock_s3_data(
+            {'walrus': {'data/foo.gz': gzip_compress(self.DATA * 10)}})
+
+        self.assertEqual(
+            b''.join(self.fs._cat_file('s3://walrus/data/foo.gz')),
+            self.DATA * 10)
+
+        self.assertTrue(self.cat_key_in_parts.called)
+
+    def test_cat_bz2_in_parts(self):
+        self.add_mock_s3_data(
+            {'walrus': {'data/foo.bz2': bz2.compress(self.DATA * 10)}})
+
+        self.assertEqual(
+            b''.join(self.fs._cat_file('s3://walrus/data/foo.bz2')),
+            self.DATA * 10)
+
+    def test_small_key_downloaded_in_one_piece(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': b'foo\n'}})
+
+        self.assertEqual(
+            b''.join(self.fs._cat_file('s3://walrus/data/foo')),
+            b'foo\n')
+
+        self.assertFalse(self.cat_key_in_parts.called)
+
+    def test_empty_key(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': b''}})
+
+        self.assertEqual(
+            b''.join(self.fs._cat_file('s3://walrus/data/foo')), b'')
+
+        self.assertFalse(self.cat_key_in_parts.called)
+
+    def test_disable_with_download_threads(self):
+        self.fs = S3Filesystem(download_part_size=100, download_threads=0)
+        self.add_mock_s3_data({'walrus': {'data/foo': self.DATA}})
+
+        self.assertEqual(
+            b''.join(self.fs._cat_file('s3://walrus/data/foo')),
+            self.DATA)
+
+        self.assertFalse(self.cat_key_in_parts.called)
+
+    def test_key_changed_during_download(self):
+        self.add_mock_s3_data({'walrus': {'data/foo': self.DATA}})
+
+        chunks = self.fs._cat_file('s3://walrus/data/foo')
+
+        # overwrite the key after the first request
+        self.assertEqual(next(chunks), self.DATA[:100])
+        self.add_mock_s3_data({'walrus': {'data/foo': self.DATA * 2}})
+
+        self.assertRaises(ClientError, list, chunks)
+
+
 class S3FSTestCase(MockBoto3TestCase):
 
     def setUp(self):
@@ -77,6 +77,20 @@ class MockS3Client(object):
 
         return dict(LocationConstraint=location_constraint)
 
+    def get_object(self, Bucket, Key, IfMatch=None, Range=None):
+        return MockS3Object(self, Bucket, Key).get(
+            IfMatch=IfMatch, Range=Range)
+
+    def head_object(self, Bucket, Key):
+        resp = MockS3Object(self, Bucket, Key).get()
+        del resp['Body']
+
+        # we don't track content type or user metadata
+        resp['ContentType'] = 'binary/octet-stream'
+        resp['Metadata'] = {}
+
+        return resp
+
 
 def add_mock_s3_data(mock_s3_fs, data, age=None, location=None):
     """Update *mock_s3_fs* with a map from bucket name to key name to data.
@@ -203,7 +217,7 @@ class MockS3Object(object):
 
         return {}
 
-    def get(self):
+    def get(self, IfMatch=None, Range=None):
         key_data, mtime = self._get_key_data_and_mtime()
 
         # fill in known attributes
@@ -214,13 +228,27 @@ class MockS3Object(object):
         self.last_modified = mtime
         self.size = len(key_data)
 
-        return dict(
+        if IfMatch is not None and IfMatch != self.e_tag:
+            raise _precondition_failed_error('GetObject')
+
+        resp = dict(
             Body=MockStreamingBody(key_data),
             ContentLength=self.size,
             ETag=self.e_tag,
             LastModified=self.last_modified,
         )
 
+        if Range is not None:
+            # only supports "bytes=start-end", which is all mrjob uses
+            start, end = [int(i) for i in Range[len('bytes='):].split('-')]
+            end = min(end, self.size - 1)
+
+            resp['Body'] = MockStreamingBody(key_data[start:end + 1])
+            resp['ContentLength'] = end + 1 - start
+            resp['ContentRange'] = 'bytes %d-%d/%d' % (start, end, self.size)
+
+        return resp
+
     def put(self, Body):
         if not isinstance(Body, bytes):
             raise NotImplementedError('mock put() only support bytes')
@@ -237,6 +265,42 @@ class MockS3Object(object):
 
         mock_keys[self.key] = (data, _boto3_now())
 
+    def copy_from(self, CopySource, MetadataDirective=None,
+                  ContentType=None, Metadata=None):
+        # only supports copying from a dict, which is all mrjob uses.
+        # we don't track content type or user metadata
+        src_key = MockS3Object(
+            self.meta.client, CopySource['Bucket'], CopySource['Key'])
+        key_data, _ = src_key._get_key_data_and_mtime()
+
+        if (src_key.bucket_name, src_key.key) == (
+                self.bucket_name, self.key) and (
+                    MetadataDirective != 'REPLACE'):
+            raise ClientError(
+                dict(Error=dict(
+                    Code='InvalidRequest',
+                    Message=('This copy request is illegal because it is'
+                             ' trying to copy an object to itself without'
+                             " changing the object's metadata, storage"
+                             ' class, website redirect location or'
+                             ' encryption attributes.'))),
+                'CopyObject')
+
+        mock_keys = self._mock_bucket_keys('CopyObject')
+        mock_keys[self.key] = (key_data, _boto3_now())
+
+        return {}
+
+    def copy(self, CopySource, ExtraArgs=None, Config=None):
+        # boto3's managed copy, which may be multipart. This can copy a
+        # key onto itself without changing its metadata
+        src_key = MockS3Object(
+            self.meta.client, CopySource['Bucket'], CopySource['Key'])
+        key_data, _ = src_key._get_key_data_and_mtime()
+
+        mock_keys = self._mock_bucket_keys('CopyObject')
+        mock_keys[self.key] = (key_data, _boto3_now())
+
     def upload_file(self, path, Config=None):
         if self.bucket_name not in self.meta.client.mock_s3_fs:
             # upload_file() is a higher-order operation, has fancy errors
@@ -302,6 +366,9 @@ class MockStreamingBody(object):
         self._offset = end
         return self._data[start:end]
 
+    def close(self):
+        pass
+
 
 # Errors
 
@@ -320,6 +387,22 @@ def _no_such_bucket_error(bucket_name, operation_name):
         operation_name)
 
 
+def _precondition_failed_error(operation_name):
+    return ClientError(
+        dict(
+            Error=dict(
+                Code='PreconditionFailed',
+                Message=('At least one of the pre-conditions you specified'
+                         ' did not hold'),
+            ),
+            ResponseMetadata=dict(
+                HTTPStatusCode=412,
+            ),
+        ),
+        operation_name,
+    )
+
+
 def _no_such_key_error(key_name, operation_name):
     return ClientError(
         dict(
@@ -375,6 +375,25 @@ class MockGCSClientObjects(object):
     def insert(self, bucket=None, name=None, media_body=None):
         raise NotImplementedError('See MockGCSClient.upload_io')
 
+    @mock_api
+    def rewrite(self, sourceBucket=None, sourceObject=None,
+                destinationBucket=None, destinationObject=None,
+                body=None, rewriteToken=None):
+        """Emulate objects().rewrite - always finishes in one call"""
+        try:
+            source = self._objects[sourceBucket][sourceObject]
+        except KeyError:
+            raise mock_google_error(404)
+
+        object_resp = _insert_object_resp(
+            bucket=destinationBucket, name=destinationObject,
+            data=source['_data'])
+
+        _set_deep(self._objects, [destinationBucket, destinationObject],
+                  object_resp)
+
+        return dict(done=True, resource=object_resp)
+
 
 class MockGCSClientBuckets(object):
     def __init__(self, client):
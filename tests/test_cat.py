@@ -0,0 +1,274 @@
+# Copyright 2017 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import bz2
+import struct
+from io import BytesIO
+from os.path import join
+from unittest import TestCase
+from unittest import skipIf
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+try:
+    import lz4.block
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from mrjob.cat import bunzip2_stream
+from mrjob.cat import decompress
+from mrjob.cat import gunzip_stream
+from mrjob.cat import is_compressed
+from mrjob.cat import open_input
+
+from tests.compress import gzip_compress
+from tests.sandbox import SandboxedTestCase
+
+
+def hadoop_lz4_compress(blocks, chunk_size=100):
+    """Compress each of *blocks* the way Hadoop's Lz4Codec does, splitting
+    them into chunks of no more than *chunk_size* bytes."""
+    parts = []
+
+    for block in blocks:
+        parts.append(struct.pack('>I', len(block)))
+
+        for i in range(0, len(block), chunk_size):
+            chunk = lz4.block.compress(
+                block[i:i + chunk_size], store_size=False)
+            parts.append(struct.pack('>I', len(chunk)))
+            parts.append(chunk)
+
+    return b''.join(parts)
+
+
+class ReadRecorder(BytesIO):
+
+    def __init__(self, data):
+        super(ReadRecorder, self).__init__(data)
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return super(ReadRecorder, self).read(size)
+
+
+class ReadOnly(object):
+    """Wrapper that *only* has a read() method, like a boto3
+    StreamingBody."""
+
+    def __init__(self, fileobj):
+        self.read = fileobj.read
+
+
+class DecompressTestCase(TestCase):
+
+    DATA = b'foo\nbar\n' * 100
+
+    def assertDecompresses(self, compressed, ext, data=DATA, **kwargs):
+        self.assertEqual(
+            b''.join(decompress(BytesIO(compressed), 'data' + ext, **kwargs)),
+            data)
+
+    def test_uncompressed_fileobj_passed_through(self):
+        f = BytesIO(self.DATA)
+        self.assertEqual(decompress(f, 'data'), f)
+
+    def test_gz(self):
+        self.assertDecompresses(gzip_compress(self.DATA), '.gz')
+
+    def test_bz2(self):
+        self.assertDecompresses(bz2.compress(self.DATA), '.bz2')
+
+    def test_small_bufsize(self):
+        self.assertDecompresses(gzip_compress(self.DATA), '.gz', bufsize=7)
+        self.assertDecompresses(bz2.compress(self.DATA), '.bz2', bufsize=7)
+
+    def test_multi_member_gz(self):
+        self.assertDecompresses(
+            gzip_compress(b'foo\n') + gzip_compress(b'bar\n'), '.gz',
+            data=b'foo\nbar\n')
+
+    def test_multi_stream_bz2(self):
+        # chunk boundary falls right at the end of the first stream
+        first = bz2.compress(b'foo\n')
+
+        self.assertDecompresses(
+            first + bz2.compress(b'bar\n'), '.bz2',
+            data=b'foo\nbar\n', bufsize=len(first))
+
+    def test_null_padding_after_gz(self):
+        self.assertDecompresses(
+            gzip_compress(self.DATA) + b'\0' * 100, '.gz')
+
+    @skipIf(lzma is None, 'lzma module not available')
+    def test_xz(self):
+        self.assertDecompresses(lzma.compress(self.DATA), '.xz')
+
+    @skipIf(lz4 is None, 'lz4 module not installed')
+    def test_lz4(self):
+        self.assertDecompresses(lz4.frame.compress(self.DATA), '.lz4')
+
+    @skipIf(lz4 is None, 'lz4 module not installed')
+    def test_multi_frame_lz4(self):
+        self.assertDecompresses(
+            lz4.frame.compress(b'foo\n') + lz4.frame.compress(b'bar\n'),
+            '.lz4', data=b'foo\nbar\n', bufsize=3)
+
+    @skipIf(lz4 is None, 'lz4 module not installed')
+    def test_hadoop_lz4(self):
+        # two blocks, each in several chunks
+        self.assertDecompresses(
+            hadoop_lz4_compress([self.DATA[:500], self.DATA[500:]]), '.lz4')
+
+    @skipIf(lz4 is None, 'lz4 module not installed')
+    def test_hadoop_lz4_small_bufsize(self):
+        self.assertDecompresses(
+            hadoop_lz4_compress([self.DATA[:500], self.DATA[500:]]), '.lz4',
+            bufsize=7)
+
+    @skipIf(zstandard is None, 'zstandard module not installed')
+    def test_zst(self):
+        self.assertDecompresses(
+            zstandard.ZstdCompressor().compress(self.DATA), '.zst')
+
+    def test_gz_chunks(self):
+        # e.g. a file downloaded in several parts
+        compressed = gzip_compress(self.DATA)
+        chunks = [compressed[i:i + 10] for i in range(0, len(compressed), 10)]
+
+        self.assertEqual(
+            b''.join(decompress(iter(chunks), 'data.gz')), self.DATA)
+
+    def test_bz2_chunks(self):
+        compressed = bz2.compress(self.DATA)
+        chunks = [compressed[i:i + 10] for i in range(0, len(compressed), 10)]
+
+        self.assertEqual(
+            b''.join(decompress(iter(chunks), 'data.bz2')), self.DATA)
+
+    @skipIf(lz4 is not None, 'lz4 module installed')
+    def test_lz4_passed_through_without_module(self):
+        f = BytesIO(self.DATA)
+        self.assertEqual(decompress(f, 'data.lz4'), f)
+
+    @skipIf(zstandard is not None, 'zstandard module installed')
+    def test_zst_passed_through_without_module(self):
+        f = BytesIO(self.DATA)
+        self.assertEqual(decompress(f, 'data.zst'), f)
+
+
+class BufsizeTestCase(TestCase):
+
+    def test_gunzip_stream(self):
+        f = ReadRecorder(gzip_compress(b'foo\n'))
+        list(gunzip_stream(f, bufsize=123))
+
+        self.assertEqual(set(f.read_sizes), set([123]))
+
+    def test_bunzip2_stream(self):
+        f = ReadRecorder(bz2.compress(b'foo\n'))
+        list(bunzip2_stream(f, bufsize=123))
+
+        self.assertEqual(set(f.read_sizes), set([123]))
+
+    def test_decompress_non_fileobj(self):
+        f = ReadRecorder(b'foo\n')
+
+        list(decompress(ReadOnly(f), 'data', bufsize=123))
+        self.assertEqual(set(f.read_sizes), set([123]))
+
+
+class IsCompressedTestCase(TestCase):
+
+    def test_is_compressed(self):
+        for path in ('data.gz', 'data.bz2'):
+            self.assertTrue(is_compressed(path), path)
+
+    def test_optional_formats(self):
+        # only compressed if we have the module to read them
+        self.assertEqual(is_compressed('data.xz'), lzma is not None)
+        self.assertEqual(is_compressed('data.lz4'), lz4 is not None)
+        self.assertEqual(is_compressed('data.zst'), zstandard is not None)
+
+    def test_is_not_compressed(self):
+        for path in ('data', 'data.txt', 'data.gzip', 'gz'):
+            self.assertFalse(is_compressed(path), path)
+
+
+class OpenInputTestCase(SandboxedTestCase):
+
+    DATA = b'foo\nbar\r\n\nbaz'
+
+    LINES = [b'foo\n', b'bar\r\n', b'\n', b'baz']
+
+    def write(self, name, data):
+        path = join(self.tmp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def read_lines(self, path, **kwargs):
+        with open_input(path, **kwargs) as f:
+            return list(f)
+
+    def test_plain(self):
+        path = self.write('data', self.DATA)
+        self.assertEqual(self.read_lines(path), self.LINES)
+
+    def test_empty(self):
+        path = self.write('data', b'')
+        self.assertEqual(self.read_lines(path), [])
+
+    def test_gz(self):
+        path = self.write('data.gz', gzip_compress(self.DATA))
+        self.assertEqual(self.read_lines(path), self.LINES)
+
+    def test_multi_member_gz(self):
+        path = self.write('data.gz',
+                          gzip_compress(b'foo\nba') + gzip_compress(b'r\n'))
+        self.assertEqual(self.read_lines(path), [b'foo\n', b'bar\n'])
+
+    def test_bz2(self):
+        path = self.write('data.bz2', bz2.compress(self.DATA))
+        self.assertEqual(self.read_lines(path), self.LINES)
+
+    @skipIf(lzma is None, 'lzma module not available')
+    def test_xz(self):
+        path = self.write('data.xz', lzma.compress(self.DATA))
+        self.assertEqual(self.read_lines(path), self.LINES)
+
+        # make sure the file gets closed
+        with open_input(path) as f:
+            pass
+        self.assertTrue(f.closed)
+        self.assertTrue(f.raw._fileobj.closed)
+
+    def test_lines_longer_than_bufsize(self):
+        data = b'a' * 100 + b'\n' + b'b' * 100 + b'\n'
+
+        for name, compress in [('data', lambda d: d),
+                               ('data.gz', gzip_compress),
+                               ('data.bz2', bz2.compress)]:
+            path = self.write(name, compress(data))
+            self.assertEqual(self.read_lines(path, bufsize=16),
+                             [b'a' * 100 + b'\n', b'b' * 100 + b'\n'])
@@ -20,6 +20,8 @@ import os
 import os.path
 
 from contextlib import contextmanager
+from datetime import datetime
+from datetime import timedelta
 from io import BytesIO
 
 import mrjob
@@ -30,6 +32,7 @@ from mrjob.dataproc import _DATAPROC_API_REGION
 from mrjob.dataproc import _DEFAULT_CLOUD_TMP_DIR_OBJECT_TTL_DAYS
 from mrjob.dataproc import _DEFAULT_IMAGE_VERSION
 from mrjob.dataproc import _MAX_HOURS_IDLE_BOOTSTRAP_ACTION_PATH
+from mrjob.fs.gcs import GCSFilesystem
 from mrjob.fs.gcs import parse_gcs_uri
 from mrjob.py2 import PY2
 from mrjob.py2 import StringIO
@@ -39,6 +42,7 @@ from mrjob.util import log_to_stream
 
 from tests.mockgoogleapiclient import MockGoogleAPITestCase
 from tests.mockgoogleapiclient import _TEST_PROJECT
+from tests.mockgoogleapiclient import _datetime_to_gcptime
 from tests.mr_hadoop_format_job import MRHadoopFormatJob
 from tests.mr_no_mapper import MRNoMapper
 from tests.mr_two_step_job import MRTwoStepJob
@@ -924,6 +928,188 @@ class TestCatFallback(MockGoogleAPITestCase):
         self.assertEqual(list(runner.fs.cat('gs://walrus/one')), [b'one_text'])
 
 
+class UploadLocalFilesTestCase(MockGoogleAPITestCase):
+
+    def setUp(self):
+        super(UploadLocalFilesTestCase, self).setUp()
+
+        self.upload_io = self.start(patch.object(
+            GCSFilesystem, '_upload_io',
+            side_effect=self._gcs_client.upload_io))
+
+    def make_runner_with_files(self, num_files=5, **kwargs):
+        runner = DataprocJobRunner(conf_paths=[], **kwargs)
+
+        for i in range(num_files):
+            path = self.makefile('file-%d.txt' % i, b'file %d\n' % i)
+            runner._upload_mgr.add(path)
+
+        return runner
+
+    def assert_files_uploaded(self, runner):
+        for path, gcs_uri in runner._upload_mgr.path_to_uri().items():
+            with open(path, 'rb') as f:
+                self.assertEqual(b''.join(runner.fs.cat(gcs_uri)), f.read())
+
+    def test_upload_in_parallel(self):
+        runner = self.make_runner_with_files(cloud_upload_threads=3)
+
+        runner._upload_local_files_to_fs()
+
+        self.assert_files_uploaded(runner)
+        self.assertEqual(self.upload_io.call_count, 5)
+
+    def test_skip_files_already_uploaded(self):
+        runner = self.make_runner_with_files()
+        runner._upload_local_files_to_fs()
+
+        self.upload_io.reset_mock()
+        runner._upload_local_files_to_fs()
+
+        self.assertFalse(self.upload_io.called)
+
+    def test_upload_cache(self):
+        runner = self.make_runner_with_files(
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+        runner._upload_local_files_to_fs()
+
+        self.assert_files_uploaded(runner)
+        self.assertEqual(self.upload_io.call_count, 5)
+
+        for gcs_uri in runner._upload_mgr.path_to_uri().values():
+            self.assertTrue(gcs_uri.startswith('gs://walrus/tmp/cache/'))
+
+    def test_reuse_cached_files_from_other_jobs(self):
+        runner1 = self.make_runner_with_files(
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+        runner1._upload_local_files_to_fs()
+
+        self.upload_io.reset_mock()
+
+        runner2 = self.make_runner_with_files(
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+        runner2._upload_local_files_to_fs()
+
+        self.assertEqual(runner1._upload_mgr.path_to_uri(),
+                         runner2._upload_mgr.path_to_uri())
+        self.assertFalse(self.upload_io.called)
+
+    def test_refresh_old_cached_files(self):
+        runner1 = self.make_runner_with_files(
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+        runner1._upload_local_files_to_fs()
+
+        self.upload_io.reset_mock()
+
+        runner2 = self.make_runner_with_files(
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+
+        with patch.object(runner2, '_uploaded_file_age',
+                          return_value=timedelta(days=2)):
+            with patch.object(runner2.fs, 'rm') as mock_rm:
+                with patch.object(
+                        runner2, '_refresh_uploaded_file',
+                        wraps=runner2._refresh_uploaded_file) as mock_refresh:
+                    runner2._upload_local_files_to_fs()
+
+        # old files are rewritten in place, not deleted and re-uploaded
+        self.assertFalse(mock_rm.called)
+        self.assertFalse(self.upload_io.called)
+        self.assertEqual(mock_refresh.call_count, 5)
+
+        self.assert_files_uploaded(runner2)
+
+    def test_refresh_uploaded_file(self):
+        runner = self.make_runner_with_files(
+            num_files=1,
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+        runner._upload_local_files_to_fs()
+
+        gcs_uri = list(runner._upload_mgr.path_to_uri().values())[0]
+        bucket_name, object_name = parse_gcs_uri(gcs_uri)
+
+        # make the object look like it was uploaded two days ago
+        gcs_object = self._gcs_client._cache_objects[bucket_name][object_name]
+        gcs_object['timeCreated'] = _datetime_to_gcptime(
+            datetime.utcnow() - timedelta(days=2))
+        self.assertGreater(runner._uploaded_file_age(gcs_uri),
+                           timedelta(days=1))
+
+        runner._refresh_uploaded_file(gcs_uri)
+
+        self.assertLess(runner._uploaded_file_age(gcs_uri),
+                        timedelta(hours=1))
+        self.assert_files_uploaded(runner)
+
+    def test_uploaded_by_another_job_after_check(self):
+        runner = self.make_runner_with_files(
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+
+        files_missing = runner._files_missing_from_upload_cache
+
+        def upload_from_another_job():
+            to_upload = files_missing()
+
+            # another job uploads the same files after we check for them
+            for path, gcs_uri in to_upload:
+                with open(path, 'rb') as f:
+                    self.put_gcs_multi({gcs_uri: f.read()})
+
+            return to_upload
+
+        with patch.object(runner, '_files_missing_from_upload_cache',
+                          side_effect=upload_from_another_job):
+            runner._upload_local_files_to_fs()
+
+        self.assertFalse(self.upload_io.called)
+        self.assert_files_uploaded(runner)
+
+    def test_uploaded_by_another_job_during_upload(self):
+        runner = self.make_runner_with_files(
+            num_files=1,
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+
+        def upload_io(io_obj, gcs_uri):
+            # another job finishes uploading the file just before we do
+            self._gcs_client.upload_io(io_obj, gcs_uri)
+            raise Exception('File already exists: ' + gcs_uri)
+
+        self.upload_io.side_effect = upload_io
+
+        runner._upload_local_files_to_fs()
+
+        # we don't try to upload the file again
+        self.assertEqual(self.upload_io.call_count, 1)
+        self.assert_files_uploaded(runner)
+
+    def test_same_file_in_two_dirs_uploaded_once(self):
+        runner = DataprocJobRunner(
+            conf_paths=[],
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+
+        path1 = self.makefile(os.path.join('a', 'file.txt'), b'same\n')
+        path2 = self.makefile(os.path.join('b', 'file.txt'), b'same\n')
+        self.assertEqual(runner._upload_mgr.add(path1),
+                         runner._upload_mgr.add(path2))
+
+        runner._upload_local_files_to_fs()
+
+        self.assert_files_uploaded(runner)
+        self.assertEqual(self.upload_io.call_count, 1)
+
+    def test_uploaded_file_age(self):
+        runner = self.make_runner_with_files(
+            cloud_tmp_dir='gs://walrus/tmp/', cloud_upload_cache=True)
+        runner._upload_local_files_to_fs()
+
+        for gcs_uri in runner._upload_mgr.path_to_uri().values():
+            self.assertLess(runner._uploaded_file_age(gcs_uri),
+                            timedelta(hours=1))
+
+        self.assertIsNone(
+            runner._uploaded_file_age('gs://walrus/tmp/cache/nothing'))
+
+
 class CleanUpJobTestCase(MockGoogleAPITestCase):
 
     @contextmanager
@@ -24,7 +24,9 @@ import os
 import os.path
 import posixpath
 import sys
+import threading
 import time
+from datetime import timedelta
 from io import BytesIO
 from shutil import make_archive
 
@@ -45,6 +47,7 @@ from mrjob.emr import _DEFAULT_IMAGE_VERSION
 from mrjob.emr import _HUGE_PART_THRESHOLD
 from mrjob.emr import _MAX_HOURS_IDLE_BOOTSTRAP_ACTION_PATH
 from mrjob.emr import _PRE_4_X_STREAMING_JAR
+from mrjob.fs.s3 import S3Filesystem
 from mrjob.job import MRJob
 from mrjob.parse import parse_s3_uri
 from mrjob.pool import _extract_tags
@@ -62,6 +65,8 @@ import tests.mock_boto3.emr
 import tests.mock_boto3.s3
 from tests.mock_boto3 import MockBoto3TestCase
 from tests.mock_boto3.emr import MockEMRClient
+from tests.mock_boto3.s3 import MockS3Client
+from tests.mock_boto3.s3 import MockS3Object
 from tests.mockssh import mock_ssh_dir
 from tests.mockssh import mock_ssh_file
 from tests.mr_hadoop_format_job import MRHadoopFormatJob
@@ -2880,6 +2885,304 @@ class MultiPartUploadTestCase(MockBoto3TestCase):
         self.assert_upload_succeeds(runner, data, _HUGE_PART_THRESHOLD)
 
 
+class UploadLocalFilesTestCase(MockBoto3TestCase):
+
+    def setUp(self):
+        super(UploadLocalFilesTestCase, self).setUp()
+
+        # keep the real method around; upload_file() will be patched
+        self.original_upload_file = (
+            tests.mock_boto3.s3.MockS3Object.upload_file)
+
+        self.upload_file = self.start(patch(
+            'tests.mock_boto3.s3.MockS3Object.upload_file',
+            side_effect=self.original_upload_file,
+            autospec=True))
+
+        # so we can see how long we wait before retrying failed uploads
+        self.cloud_time = self.start(patch('mrjob.cloud.time'))
+
+        # for cloud_upload_cache tests
+        self.add_mock_s3_data({'walrus': {}})
+
+    def make_runner_with_files(self, num_files=5, **kwargs):
+        runner = EMRJobRunner(**kwargs)
+
+        for i in range(num_files):
+            path = self.makefile('file-%d.txt' % i, b'file %d\n' % i)
+            runner._upload_mgr.add(path)
+
+        return runner
+
+    def assert_files_uploaded(self, runner):
+        for path, s3_uri in runner._upload_mgr.path_to_uri().items():
+            with open(path, 'rb') as f:
+                self.assertEqual(b''.join(runner.fs.cat(s3_uri)), f.read())
+
+    def test_upload_in_parallel(self):
+        runner = self.make_runner_with_files(cloud_upload_threads=3)
+
+        runner._upload_local_files_to_s3()
+
+        self.assert_files_uploaded(runner)
+        self.assertEqual(self.upload_file.call_count, 5)
+
+    def test_one_thread(self):
+        runner = self.make_runner_with_files(cloud_upload_threads=1)
+
+        runner._upload_local_files_to_s3()
+
+        self.assert_files_uploaded(runner)
+        self.assertEqual(self.upload_file.call_count, 5)
+
+    def test_one_bucket_per_thread(self):
+        runner = self.make_runner_with_files(num_files=10,
+                                             cloud_upload_threads=3)
+
+        original_get_bucket = S3Filesystem.get_bucket
+        this_thread = threading.current_thread()
+        upload_threads = []
+
+        def get_bucket(fs, bucket_name):
+            if threading.current_thread() is not this_thread:
+                upload_threads.append(threading.current_thread())
+
+            return original_get_bucket(fs, bucket_name)
+
+        with patch.object(S3Filesystem, 'get_bucket', get_bucket):
+            runner._upload_local_files_to_s3()
+
+        self.assert_files_uploaded(runner)
+
+        # each thread got a bucket once
+        self.assertLessEqual(len(upload_threads), 3)
+        self.assertEqual(len(upload_threads), len(set(upload_threads)))
+
+    def test_skip_files_already_uploaded(self):
+        runner = self.make_runner_with_files()
+        runner._upload_local_files_to_s3()
+
+        self.upload_file.reset_mock()
+        runner._upload_local_files_to_s3()
+
+        self.assertFalse(self.upload_file.called)
+
+    def test_reupload_changed_file(self):
+        runner = self.make_runner_with_files()
+        runner._upload_local_files_to_s3()
+
+        self.makefile('file-0.txt', b'changed\n')
+
+        self.upload_file.reset_mock()
+        runner._upload_local_files_to_s3()
+
+        self.assert_files_uploaded(runner)
+        self.assertEqual(self.upload_file.call_count, 1)
+
+    def test_retry(self):
+        failed_paths = set()
+
+        def upload_file(s3_key, path, Config=None):
+            # fail the first time we upload each file
+            if path not in failed_paths:
+                failed_paths.add(path)
+                raise IOError('connection reset')
+
+            return self.original_upload_file(s3_key, path, Config=Config)
+
+        self.upload_file.side_effect = upload_file
+
+        runner = self.make_runner_with_files(cloud_upload_threads=3)
+        runner._upload_local_files_to_s3()
+
+        self.assert_files_uploaded(runner)
+        self.assertEqual(self.upload_file.call_count, 10)
+
+    def test_upload_cache(self):
+        runner = self.make_runner_with_files(
+            cloud_tmp_dir='s3://walrus/tmp/', cloud_upload_cache=True)
+        runner._upload_local_files_to_s3()
+
+        self.assert_files_uploaded(runner)
+        self.assertEqual(self.upload_file.call_count, 5)
+
+        for s3_uri in runner._upload_mgr.path_to_uri().values():
+            self.assertTrue(s3_uri.startswith('s3://walrus/tmp/cache/'))
+
+    def test_reuse_cached_files_from_other_jobs(self):
+        runner1 = self.make_runner_with_files(
+            cloud_tmp_dir='s3://walrus/tmp/', cloud_upload_cache=True)
+        runner1._upload_local_files_to_s3()
+
+        self.upload_file.reset_mock()
+
+        runner2 = self.make_runner_with_files(
+            cloud_tmp_dir='s3://walrus/tmp/', cloud_upload_cache=True)
+        runner2._upload_local_files_to_s3()
+
+        self.assertEqual(runner1._upload_mgr.path_to_uri(),
+                         runner2._upload_mgr.path_to_uri())
+        self.assertFalse(self.upload_file.called)
+
+    def test_refresh_old_cached_files(self):
+        runner1 = self.make_runner_with_files(
+            cloud_tmp_dir='s3://walrus/tmp/', cloud_upload_cache=True)
+        runner1._upload_local_files_to_s3()
+
+        # make the first file look like it was uploaded two days ago
+        path, s3_uri = sorted(runner1._upload_mgr.path_to_uri().items())[0]
+        bucket_name, key_name = parse_s3_uri(s3_uri)
+        with open(path, 'rb') as f:
+            self.add_mock_s3_data({bucket_name: {key_name: f.read()}},
+                                  age=timedelta(days=2))
+
+        self.upload_file.reset_mock()
+
+        runner2 = self.make_runner_with_files(
+            cloud_tmp_dir='s3://walrus/tmp/', cloud_upload_cache=True)
+
+        with patch.object(runner2.fs, 'rm') as mock_rm:
+            runner2._upload_local_files_to_s3()
+
+        # the old file was copied onto itself, not deleted and re-uploaded
+        self.assertFalse(mock_rm.called)
+        self.assertFalse(self.upload_file.called)
+
+        self.assert_files_uploaded(runner2)
+        self.assertLess(runner2._uploaded_file_age(s3_uri),
+                        timedelta(hours=1))
+
+    def upload_old_cached_file(self):
+        """Upload one file to the cache, make it two days old, and return
+        a runner that uses it, and its URI."""
+        runner = self.make_runner_with_files(
+            num_files=1,
+            cloud_tmp_dir='s3://walrus/tmp/', cloud_upload_cache=True)
+        runner._upload_local_files_to_s3()
+
+        path, s3_uri = list(runner._upload_mgr.path_to_uri().items())[0]
+        bucket_name, key_name = parse_s3_uri(s3_uri)
+        with open(path, 'rb') as f:
+            self.add_mock_s3_data({bucket_name: {key_name: f.read()}},
+                                  age=timedelta(days=2))
+
+        self.upload_file.reset_mock()
+
+        return runner, s3_uri
+
+    def test_refresh_keeps_content_type_and_metadata(self):
+        runner, s3_uri = self.upload_old_cached_file()
+
+        head_object = MockS3Client.head_object
+
+        def fake_head_object(client, Bucket, Key):
+            resp = head_object(client, Bucket=Bucket, Key=Key)
+            resp['ContentType'] = 'text/x-python'
+            resp['Metadata'] = dict(owner='walrus')
+            return resp
+
+        self.start(patch.object(MockS3Client, 'head_object',
+                                side_effect=fake_head_object,
+                                autospec=True))
+        copy_from = self.start(patch.object(
+            MockS3Object, 'copy_from',
+            side_effect=MockS3Object.copy_from, autospec=True))
+
+        runner._upload_local_files_to_s3()
+
+        self.assertEqual(copy_from.call_count, 1)
+        self.assertEqual(copy_from.call_args[1]['ContentType'],
+                         'text/x-python')
+        self.assertEqual(copy_from.call_args[1]['Metadata'],
+                         dict(owner='walrus'))
+        self.assertEqual(copy_from.call_args[1]['MetadataDirective'],
+                         'REPLACE')
+
+        self.assertLess(runner._uploaded_file_age(s3_uri),
+                        timedelta(hours=1))
+
+    def test_refresh_huge_file_with_multipart_copy(self):
+        runner, s3_uri = self.upload_old_cached_file()
+
+        self.start(patch('mrjob.emr._MAX_SINGLE_COPY_SIZE', 1))
+        copy_from = self.start(patch.object(MockS3Object, 'copy_from'))
+        copy = self.start(patch.object(
+            MockS3Object, 'copy',
+            side_effect=MockS3Object.copy, autospec=True))
+
+        runner._upload_local_files_to_s3()
+
+        self.assertFalse(copy_from.called)
+        self.assertEqual(copy.call_count, 1)
+        self.assertFalse(self.upload_file.called)
+
+        self.assertLess(runner._uploaded_file_age(s3_uri),
+                        timedelta(hours=1))
+
+    def test_check_cached_files_in_threads(self):
+        runner = self.make_runner_with_files(
+            cloud_tmp_dir='s3://walrus/tmp/', cloud_upload_cache=True,
+            cloud_upload_threads=3)
+
+        check_threads = []
+        uploaded_file_age = runner._uploaded_file_age
+
+        def record_thread(s3_uri):
+            check_threads.append(threading.current_thread())
+            return uploaded_file_age(s3_uri)
+
+        with patch.object(runner, '_uploaded_file_age',
+                          side_effect=record_thread):
+            runner._upload_local_files_to_s3()
+
+        self.assertEqual(len(check_threads), 5)
+        self.assertNotIn(threading.current_thread(), check_threads)
+
+        self.assert_files_uploaded(runner)
+
+    def test_same_file_in_two_dirs_uploaded_once(self):
+        runner = EMRJobRunner(
+            cloud_tmp_dir='s3://walrus/tmp/', cloud_upload_cache=True)
+
+        path1 = self.makefile(os.path.join('a', 'file.txt'), b'same\n')
+        path2 = self.makefile(os.path.join('b', 'file.txt'), b'same\n')
+        self.assertEqual(runner._upload_mgr.add(path1),
+                         runner._upload_mgr.add(path2))
+
+        runner._upload_local_files_to_s3()
+
+        self.assert_files_uploaded(runner)
+        self.assertEqual(self.upload_file.call_count, 1)
+
+    def test_cached_files_not_cleaned_up(self):
+        runner = self.make_runner_with_files(
+            cloud_tmp_dir='s3://walrus/tmp/', cloud_upload_cache=True)
+        runner._upload_local_files_to_s3()
+
+        runner._cleanup_cloud_tmp()
+
+        self.assert_files_uploaded(runner)
+
+    def test_give_up_after_max_tries(self):
+        self.upload_file.side_effect = IOError('connection reset')
+
+        runner = self.make_runner_with_files(num_files=1)
+
+        self.assertRaises(IOError, runner._upload_local_files_to_s3)
+        self.assertEqual(self.upload_file.call_count, 3)
+
+    def test_back_off_before_retrying(self):
+        self.upload_file.side_effect = IOError('connection reset')
+
+        runner = self.make_runner_with_files(num_files=1)
+
+        self.assertRaises(IOError, runner._upload_local_files_to_s3)
+
+        # wait longer each time, but not after the last try
+        self.assertEqual(self.cloud_time.sleep.call_args_list,
+                         [call(1.0), call(2.0)])
+
+
 class AWSSessionTokenTestCase(MockBoto3TestCase):
 
     def setUp(self):
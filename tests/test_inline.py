@@ -23,21 +23,29 @@ import os.path
 import stat
 from io import BytesIO
 from unittest import TestCase
+from unittest import skipIf
 
 from mrjob import conf
 from mrjob.fs.base import Filesystem
 from mrjob.inline import InlineMRJobRunner
+from mrjob.inline import _fork_pool
 from mrjob.job import MRJob
 from mrjob.protocol import JSONValueProtocol
+from mrjob.sim import _hash_partition
+from mrjob.sim import _key_field_based_partition
+from mrjob.sim import lz4
 from mrjob.step import MRStep
 from tests.mr_no_mapper import MRNoMapper
+from tests.mr_sort_values import MRSortValues
 from tests.mr_test_cmdenv import MRTestCmdenv
 from tests.mr_test_jobconf import MRTestJobConf
 from tests.mr_test_per_step_jobconf import MRTestPerStepJobConf
 from tests.mr_two_step_job import MRTwoStepJob
+from tests.mr_verbose_job import MRVerboseJob
 from tests.mr_word_count import MRWordCount
 from tests.py2 import mock
 from tests.py2 import patch
+from tests.quiet import no_handlers_for_logger
 from tests.sandbox import EmptyMrjobConfTestCase
 from tests.sandbox import SandboxedTestCase
 
@@ -252,6 +260,249 @@ class InlineMRJobRunnerJobConfTestCase(SandboxedTestCase):
         self.assertEqual(sorted(results),
                          [(input_path, 3), (input_gz_path, 1)])
 
+    def test_num_maps_and_reduces_from_jobconf(self):
+        input_path = os.path.join(self.tmp_dir, 'input')
+        with open(input_path, 'wb') as input_file:
+            input_file.write(b'bar\nqux\nfoo\nbaz\n' * 10)
+
+        mr_job = MRWordCount(['-r', self.RUNNER,
+                              '--jobconf', 'mapreduce.job.maps=4',
+                              '--jobconf', 'mapred.reduce.tasks=3',
+                              input_path])
+        mr_job.sandbox()
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            self.assertEqual(runner._num_mappers(0), 4)
+            self.assertEqual(runner._num_reducers(0), 3)
+
+            self.assertEqual(
+                len(list(runner.fs.ls(os.path.join(
+                    runner._step_dir(0), 'mapper', '*', 'input')))),
+                4)
+
+            output_dir = runner.get_output_dir()
+            self.assertEqual(
+                sorted(os.listdir(output_dir)),
+                ['part-00000', 'part-00001', 'part-00002'])
+
+            results = list(mr_job.parse_output(runner.cat_output()))
+
+        self.assertEqual(results, [(input_path, 40)])
+
+    def test_zero_copy_splits(self):
+        input_path = os.path.join(self.tmp_dir, 'input')
+        with open(input_path, 'wb') as input_file:
+            input_file.write(b'bar\nqux\nfoo\nbaz\n' * 10)
+
+        input_gz_path = os.path.join(self.tmp_dir, 'input.gz')
+        with gzip.GzipFile(input_gz_path, 'wb') as input_gz:
+            input_gz.write(b'foo\n')
+
+        mr_job = MRWordCount(['-r', self.RUNNER,
+                              '--zero-copy-splits',
+                              '--jobconf', 'mapreduce.job.maps=4',
+                              input_path, input_gz_path])
+        mr_job.sandbox()
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            # only the .gz file needed its own input file
+            self.assertEqual(
+                len(list(runner.fs.ls(os.path.join(
+                    runner._step_dir(0), 'mapper', '*', 'input')))),
+                1)
+
+            results = list(mr_job.parse_output(runner.cat_output()))
+
+        self.assertEqual(sorted(results),
+                         [(input_path, 40), (input_gz_path, 1)])
+
+    def test_pipe_to_combiner(self):
+        input_path = os.path.join(self.tmp_dir, 'input')
+        with open(input_path, 'wb') as input_file:
+            input_file.write(b'bar\nqux\nfoo\nbaz\n' * 10)
+
+        mr_job = MRWordCount(['-r', self.RUNNER,
+                              '--pipe-to-combiner',
+                              '--jobconf', 'mapreduce.job.maps=2',
+                              input_path])
+        mr_job.sandbox()
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            # mapper output went straight to the combiners, without
+            # touching disk
+            self.assertEqual(
+                list(runner.fs.ls(os.path.join(
+                    runner._step_dir(0), 'mapper', '*', 'output'))),
+                [])
+            self.assertEqual(
+                list(runner.fs.ls(os.path.join(
+                    runner._step_dir(0), 'combiner', '*', 'input'))),
+                [])
+
+            self.assertEqual(
+                runner.counters()[0]['count']['combiners'], 2)
+
+            results = list(mr_job.parse_output(runner.cat_output()))
+
+        self.assertEqual(results, [(input_path, 40)])
+
+    def assert_files_start_with(self, runner, path_glob, magic):
+        paths = list(runner.fs.ls(
+            os.path.join(runner._step_dir(0), path_glob)))
+        self.assertTrue(paths)
+
+        for path in paths:
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(len(magic)), magic)
+
+    def test_compress_map_output(self):
+        input_path = os.path.join(self.tmp_dir, 'input')
+        with open(input_path, 'wb') as input_file:
+            input_file.write(b'bar\nqux\nfoo\nbaz\n' * 10)
+
+        mr_job = MRWordCount([
+            '-r', self.RUNNER,
+            '--jobconf', 'mapreduce.map.output.compress=true',
+            '--jobconf', ('mapreduce.map.output.compress.codec='
+                          'org.apache.hadoop.io.compress.GzipCodec'),
+            '--jobconf', 'mapreduce.job.maps=2',
+            '--jobconf', 'mapreduce.job.reduces=2',
+            input_path])
+        mr_job.sandbox()
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            gzip_magic = b'\x1f\x8b'
+
+            self.assert_files_start_with(
+                runner, 'mapper/*/output', gzip_magic)
+            self.assert_files_start_with(
+                runner, 'mapper/*/partitions/*', gzip_magic)
+            self.assert_files_start_with(
+                runner, 'combiner/*/input', gzip_magic)
+            self.assert_files_start_with(
+                runner, 'combiner/*/output', gzip_magic)
+            self.assert_files_start_with(
+                runner, 'reducer/*/input', gzip_magic)
+
+            # mapper input and final output aren't compressed
+            self.assert_files_start_with(
+                runner, 'mapper/*/input', b'bar\n')
+
+            results = list(mr_job.parse_output(runner.cat_output()))
+
+            self.assertEqual(
+                runner.counters()[0]['count']['combiners'], 2)
+
+        self.assertEqual(results, [(input_path, 40)])
+
+    def test_compress_map_output_with_pipe_to_combiner(self):
+        mr_job = MRWordCount([
+            '-r', self.RUNNER,
+            '--pipe-to-combiner',
+            '--jobconf', 'mapred.compress.map.output=true',
+            '--jobconf', ('mapred.map.output.compression.codec='
+                          'org.apache.hadoop.io.compress.BZip2Codec')])
+        mr_job.sandbox(stdin=BytesIO(b'bar\nqux\nfoo\nbaz\n' * 10))
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            self.assert_files_start_with(
+                runner, 'combiner/*/output', b'BZh')
+
+            results = list(mr_job.parse_output(runner.cat_output()))
+
+        # input comes from a temp file, not literally from stdin
+        self.assertEqual([count for _, count in results], [40])
+
+    def test_map_output_codec(self):
+        def codec(*jobconf_args):
+            args = ['-r', self.RUNNER]
+            for jobconf_arg in jobconf_args:
+                args.extend(['--jobconf', jobconf_arg])
+
+            with MRWordCount(args).make_runner() as runner:
+                return runner._map_output_codec(0)
+
+        fastest = 'lz4' if lz4 else 'gzip'
+
+        self.assertEqual(codec(), None)
+        self.assertEqual(codec('mapreduce.map.output.compress=false'), None)
+        self.assertEqual(codec('mapreduce.map.output.compress=true'),
+                         fastest)
+        self.assertEqual(
+            codec('mapreduce.map.output.compress=true',
+                  'mapreduce.map.output.compress.codec='
+                  'org.apache.hadoop.io.compress.DefaultCodec'),
+            'gzip')
+        self.assertEqual(
+            codec('mapreduce.map.output.compress=true',
+                  'mapreduce.map.output.compress.codec='
+                  'org.apache.hadoop.io.compress.SnappyCodec'),
+            fastest)
+
+        with no_handlers_for_logger('mrjob.sim'):
+            self.assertEqual(
+                codec('mapreduce.map.output.compress=true',
+                      'mapreduce.map.output.compress.codec='
+                      'org.apache.hadoop.io.compress.Lz4Codec'),
+                fastest)
+
+    def test_skew_report(self):
+        mr_job = MRTwoStepJob(['-r', self.RUNNER,
+                               '--skew-report', '2',
+                               '--jobconf', 'mapreduce.job.reduces=3'])
+        mr_job.sandbox(stdin=BytesIO(b'a\n' * 30 + b'b\n' * 5 + b'c\n'))
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            report = runner.skew_report()
+
+        self.assertEqual(len(report), 2)
+
+        # the mapper emits (None, line) and (line, None) for every line
+        self.assertEqual(
+            [(k['key'], k['records']) for k in report[0]['top_keys']],
+            [('null', 36), ('"a"', 30)])
+        self.assertEqual(len(report[0]['reducer_input']), 3)
+        self.assertEqual(
+            sum(r['records'] for r in report[0]['reducer_input']), 72)
+        self.assertEqual(len(report[0]['task_times']['reducer']), 3)
+
+        # second step is mapper-only
+        self.assertEqual(report[1]['top_keys'], [])
+        self.assertEqual(report[1]['reducer_input'], [])
+        self.assertNotIn('reducer', report[1]['task_times'])
+        self.assertTrue(report[1]['task_times']['mapper'])
+
+    def test_no_skew_report_by_default(self):
+        mr_job = MRTwoStepJob(['-r', self.RUNNER])
+        mr_job.sandbox(stdin=BytesIO(b'a\nb\n'))
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            self.assertEqual(runner.skew_report(), [])
+
+    def test_bad_num_reduces_in_jobconf(self):
+        for num_reduces, expected in [('0', 1), ('-2', 1), ('ten', 8)]:
+            mr_job = MRWordCount(
+                ['-r', self.RUNNER,
+                 '--jobconf', 'mapreduce.job.reduces=' + num_reduces])
+
+            with mr_job.make_runner() as runner:
+                with patch('mrjob.sim.cpu_count', return_value=8):
+                    self.assertEqual(runner._num_reducers(0), expected)
+
     def _extra_expected_local_files(self, runner):
         """A list of additional local files expected, as tuples
         of (path, name). Hook for dealing with cat.py in local mode."""
@@ -376,6 +627,22 @@ class InlineMRJobRunnerNoMapperTestCase(SandboxedTestCase):
                 [(1, ['blue', 'one', 'red', 'two']),
                  (4, ['fish'])])
 
+    def test_step_with_no_mapper_and_compressed_map_output(self):
+        mr_job = MRNoMapper(['-r', self.RUNNER,
+                             '--jobconf',
+                             'mapreduce.map.output.compress=true'])
+
+        mr_job.sandbox(stdin=BytesIO(
+            b'one fish two fish\nred fish blue fish\n'))
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            self.assertEqual(
+                sorted(mr_job.parse_output(runner.cat_output())),
+                [(1, ['blue', 'one', 'red', 'two']),
+                 (4, ['fish'])])
+
 
 class InlineMRJobRunnerFSTestCase(SandboxedTestCase):
 
@@ -391,3 +658,100 @@ class InlineMRJobRunnerFSTestCase(SandboxedTestCase):
 
     def test_cant_handle_uris(self):
         self.assertRaises(IOError, self.runner.fs.ls, 's3://walrus/foo')
+
+
+@skipIf(not hasattr(os, 'fork'), "can't fork on this platform")
+class InlineMRJobRunnerNumCoresTestCase(SandboxedTestCase):
+
+    def setUp(self):
+        super(InlineMRJobRunnerNumCoresTestCase, self).setUp()
+
+        self.fork_pool = self.start(patch('mrjob.inline._fork_pool',
+                                          wraps=_fork_pool))
+
+        self.input_path = self.makefile('input', b'bar\nqux\nfoo\n' * 10)
+
+    def test_serial_by_default(self):
+        mr_job = MRWordCount(['-r', 'inline', self.input_path])
+        mr_job.sandbox()
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            self.assertEqual(
+                list(mr_job.parse_output(runner.cat_output())),
+                [(self.input_path, 30)])
+
+        self.assertFalse(self.fork_pool.called)
+
+    def test_forked_workers(self):
+        mr_job = MRWordCount(['-r', 'inline', '--num-cores', '2',
+                              '--jobconf', 'mapreduce.job.maps=4',
+                              self.input_path])
+        mr_job.sandbox()
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            self.assertEqual(
+                list(mr_job.parse_output(runner.cat_output())),
+                [(self.input_path, 30)])
+
+            # counters from the forked combiners still get parsed
+            self.assertEqual(
+                runner.counters()[0]['count']['combiners'], 4)
+
+        self.fork_pool.assert_called_with(2)
+
+    def test_exception_reraised(self):
+        mr_job = MRVerboseJob(['-r', 'inline', '--num-cores', '2',
+                               self.input_path])
+        mr_job.sandbox()
+
+        with mr_job.make_runner() as runner:
+            with no_handlers_for_logger('mrjob.inline'):
+                with self.assertRaises(Exception) as cm:
+                    runner.run()
+
+            self.assertEqual(str(cm.exception), 'BOOM')
+            self.assertEqual(runner._error_while_reading_from,
+                             runner._task_input_path('mapper', 0, 0))
+            self.assertIn('BOOM', runner._error_traceback)
+
+
+class InlineMRJobRunnerPartitionerTestCase(SandboxedTestCase):
+
+    def test_hash_partitioner_by_default(self):
+        mr_job = MRWordCount(['-r', 'inline'])
+
+        with mr_job.make_runner() as runner:
+            get_key, get_partition = runner._partition_funcs(0)
+
+            self.assertEqual(get_key(b'a\tb\n'), b'a')
+            self.assertEqual(get_partition, _hash_partition)
+
+    def test_sort_values(self):
+        mr_job = MRSortValues(['-r', 'inline'])
+
+        with mr_job.make_runner() as runner:
+            get_key, get_partition = runner._partition_funcs(0)
+
+            # key includes the value, but only the first field is used
+            # to partition
+            self.assertEqual(get_key(b'a\tb\n'), b'a\tb')
+            self.assertEqual(get_partition.func, _key_field_based_partition)
+            self.assertEqual(get_partition.keywords['key_specs'],
+                             [(1, 1, 1, 0)])
+
+    def test_warn_about_unknown_partitioner(self):
+        with patch('mrjob.sim.log') as log:
+            InlineMRJobRunner(partitioner='com.example.MyPartitioner')
+
+            self.assertTrue(log.warning.called)
+
+    def test_dont_warn_about_hash_partitioner(self):
+        with patch('mrjob.sim.log') as log:
+            InlineMRJobRunner(
+                partitioner='org.apache.hadoop.mapred.lib.HashPartitioner')
+
+            self.assertFalse(log.warning.called)
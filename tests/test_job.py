@@ -14,10 +14,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Unit testing of MRJob."""
+import bz2
 import os
 import os.path
 import sys
 import time
+from collections import Counter
 from io import BytesIO
 from subprocess import Popen
 from subprocess import PIPE
@@ -26,16 +28,20 @@ from unittest import TestCase
 from mrjob.conf import combine_envs
 from mrjob.job import MRJob
 from mrjob.job import UsageError
+from mrjob.job import _batches
 from mrjob.job import _im_func
 from mrjob.parse import parse_mr_job_stderr
+from mrjob.protocol import AutoJSONProtocol
 from mrjob.protocol import BytesValueProtocol
 from mrjob.protocol import JSONProtocol
 from mrjob.protocol import JSONValueProtocol
+from mrjob.protocol import MarshalProtocol
 from mrjob.protocol import PickleProtocol
 from mrjob.protocol import RawValueProtocol
 from mrjob.protocol import ReprProtocol
 from mrjob.protocol import ReprValueProtocol
 from mrjob.protocol import StandardJSONProtocol
+from mrjob.protocol import pick_json_backend
 from mrjob.py2 import StringIO
 from mrjob.step import _IDENTITY_MAPPER
 from mrjob.step import _IDENTITY_REDUCER
@@ -44,6 +50,7 @@ from mrjob.step import MRStep
 from mrjob.step import SparkStep
 from mrjob.util import log_to_stream
 
+from tests.compress import gzip_compress
 from tests.mr_hadoop_format_job import MRHadoopFormatJob
 from tests.mr_cmd_job import MRCmdJob
 from tests.mr_sort_values import MRSortValues
@@ -264,6 +271,84 @@ class CountersAndStatusTestCase(TestCase):
                           'girl; interrupted': {'movie': 1}})
 
 
+class CounterAggregationTestCase(TestCase):
+
+    class MRCountingMapper(MRJob):
+
+        def mapper(self, key, value):
+            self.increment_counter('Lines', 'seen')
+            self.increment_counter('Chars', 'seen', len(value))
+            if value == 'boom':
+                raise ValueError('boom!')
+            yield key, value
+
+    def run_mapper(self, stdin, **attrs):
+        mr_job = self.MRCountingMapper(['--mapper'])
+        for name, value in attrs.items():
+            setattr(mr_job, name, value)
+
+        mr_job.sandbox(stdin=BytesIO(stdin))
+
+        try:
+            mr_job.run_mapper()
+        finally:
+            self.stderr_lines = mr_job.stderr.getvalue().splitlines()
+            self.counters = parse_mr_job_stderr(
+                self.stderr_lines)['counters']
+
+    def test_one_line_per_counter(self):
+        self.run_mapper(b'foo\nbar\nbaz\n')
+
+        self.assertEqual(self.counters,
+                         {'Lines': {'seen': 3}, 'Chars': {'seen': 9}})
+        self.assertEqual(len(self.stderr_lines), 2)
+
+    def test_flush_count(self):
+        self.run_mapper(b'foo\nbar\nbaz\n', COUNTER_FLUSH_COUNT=4)
+
+        self.assertEqual(self.counters,
+                         {'Lines': {'seen': 3}, 'Chars': {'seen': 9}})
+        # 2 lines after the 2nd line, 2 lines at the end
+        self.assertEqual(len(self.stderr_lines), 4)
+
+    def test_flush_interval(self):
+        self.run_mapper(b'foo\nbar\nbaz\n', COUNTER_FLUSH_INTERVAL=0)
+
+        self.assertEqual(self.counters,
+                         {'Lines': {'seen': 3}, 'Chars': {'seen': 9}})
+        self.assertEqual(len(self.stderr_lines), 6)
+
+    def test_zero_total(self):
+
+        class MRUpAndDown(MRJob):
+
+            def mapper(self, key, value):
+                self.increment_counter('Foo', 'Bar', 1)
+                self.increment_counter('Foo', 'Bar', -1)
+                return []
+
+        mr_job = MRUpAndDown(['--mapper'])
+        mr_job.sandbox(stdin=BytesIO(b'foo\n'))
+        mr_job.run_mapper()
+
+        self.assertEqual(
+            parse_mr_job_stderr(mr_job.stderr.getvalue())['counters'],
+            {'Foo': {'Bar': 0}})
+
+    def test_flushed_on_error(self):
+        self.assertRaises(ValueError, self.run_mapper, b'foo\nboom\nbar\n')
+
+        self.assertEqual(self.counters,
+                         {'Lines': {'seen': 2}, 'Chars': {'seen': 7}})
+
+    def test_not_aggregated_outside_task(self):
+        mr_job = MRJob().sandbox()
+        mr_job.increment_counter('Foo', 'Bar')
+
+        self.assertEqual(mr_job.stderr.getvalue(),
+                         b'reporter:counter:Foo,Bar,1\n')
+
+
 class ProtocolsTestCase(TestCase):
     # not putting these in their own files because we're not going to invoke
     # it as a script anyway.
@@ -363,6 +448,479 @@ class ProtocolsTestCase(TestCase):
                          RAW_INPUT.getvalue())
 
 
+class OutputBufferTestCase(TestCase):
+
+    class MRCountingJob(MRBoringJob):
+
+        def mapper(self, key, value):
+            self.increment_counter('Lines', 'seen')
+            yield key, value
+
+    class MRFailingJob(MRBoringJob):
+
+        def mapper(self, key, value):
+            if value == 'qux':
+                raise ValueError('qux!')
+            yield key, value
+
+    INPUT = b'foo\nbar\nbaz\nqux\n'
+
+    EXPECTED_OUTPUT = (b'null\t"foo"\n' +
+                       b'null\t"bar"\n' +
+                       b'null\t"baz"\n' +
+                       b'null\t"qux"\n')
+
+    def run_mapper(self, job_class, buffer_size):
+        stdout = BytesIO()
+        writes = []
+
+        def write(data):
+            writes.append(data)
+            return BytesIO.write(stdout, data)
+
+        stdout.write = write
+
+        mr_job = job_class(['--mapper'])
+        mr_job.OUTPUT_BUFFER_SIZE = buffer_size
+        mr_job.sandbox(stdin=BytesIO(self.INPUT), stdout=stdout)
+
+        try:
+            mr_job.run_mapper()
+        finally:
+            self.writes = writes
+
+        return mr_job
+
+    def test_default_buffers_all_output(self):
+        mr_job = self.run_mapper(MRBoringJob, MRJob.OUTPUT_BUFFER_SIZE)
+
+        self.assertEqual(mr_job.stdout.getvalue(), self.EXPECTED_OUTPUT)
+        self.assertEqual(self.writes, [self.EXPECTED_OUTPUT])
+
+    def test_small_buffer(self):
+        mr_job = self.run_mapper(MRBoringJob, 20)
+
+        self.assertEqual(mr_job.stdout.getvalue(), self.EXPECTED_OUTPUT)
+        # flushes after every two lines
+        self.assertEqual(len(self.writes), 2)
+
+    def test_unbuffered(self):
+        mr_job = self.run_mapper(MRBoringJob, 0)
+
+        self.assertEqual(mr_job.stdout.getvalue(), self.EXPECTED_OUTPUT)
+        self.assertEqual(len(self.writes), 4)
+
+    def test_counters_written_as_they_happen(self):
+        mr_job = self.run_mapper(self.MRCountingJob, 1024)
+
+        self.assertEqual(mr_job.stdout.getvalue(), self.EXPECTED_OUTPUT)
+        self.assertEqual(
+            parse_mr_job_stderr(mr_job.stderr.getvalue())['counters'],
+            {'Lines': {'seen': 4}})
+
+    def test_output_flushed_on_error(self):
+        self.assertRaises(ValueError,
+                          self.run_mapper, self.MRFailingJob, 1024)
+
+        self.assertEqual(b''.join(self.writes),
+                         self.EXPECTED_OUTPUT[:-len(b'null\t"qux"\n')])
+
+
+class ReadInputTestCase(SandboxedTestCase):
+
+    def test_read_from_files_and_stdin(self):
+        paths = [os.path.join(self.tmp_dir, name)
+                 for name in ('input', 'input.gz', 'input.bz2')]
+
+        with open(paths[0], 'wb') as f:
+            f.write(b'foo\nbar')
+        with open(paths[1], 'wb') as f:
+            f.write(gzip_compress(b'baz\r\n') + gzip_compress(b'qux\n'))
+        with open(paths[2], 'wb') as f:
+            f.write(bz2.compress(b'quux\n'))
+
+        mr_job = MRBoringJob(['--mapper', paths[0], '-'] + paths[1:])
+        mr_job.sandbox(stdin=BytesIO(b'corge\n'))
+        mr_job.run_mapper()
+
+        self.assertEqual(mr_job.stdout.getvalue(),
+                         b'null\t"foo"\n' +
+                         b'null\t"bar"\n' +
+                         b'null\t"corge"\n' +
+                         b'null\t"baz"\n' +
+                         b'null\t"qux"\n' +
+                         b'null\t"quux"\n')
+
+
+class BatchTestCase(SandboxedTestCase):
+
+    class MRBatchWordCount(MRJob):
+        BATCH_SIZE = 2
+
+        def mapper_batch(self, pairs):
+            self.increment_counter('batches', 'mapper')
+
+            counts = Counter()
+            for _, line in pairs:
+                counts.update(line.split())
+
+            return counts.items()
+
+        def combiner_batch(self, word, value_chunks):
+            yield word, sum(sum(values) for values in value_chunks)
+
+        def reducer_batch(self, word, value_chunks):
+            total = 0
+
+            for values in value_chunks:
+                self.increment_counter('batches', 'reducer')
+                total += sum(values)
+
+            yield word, total
+
+    class MRValueChunks(MRJob):
+        BATCH_SIZE = 2
+
+        def reducer_batch(self, key, value_chunks):
+            yield key, list(value_chunks)
+
+    def test_batches(self):
+        self.assertEqual(list(_batches([], 2)), [])
+        self.assertEqual(list(_batches(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(_batches(iter(range(4)), 2)), [[0, 1], [2, 3]])
+
+    def test_steps(self):
+        self.assertEqual(
+            self.MRBatchWordCount()._steps_desc(),
+            [dict(type='streaming',
+                  mapper=dict(type='script'),
+                  combiner=dict(type='script'),
+                  reducer=dict(type='script'))])
+
+    def test_mapper_batch(self):
+        mr_job = self.MRBatchWordCount(['--mapper'])
+        mr_job.sandbox(stdin=BytesIO(b'a b\nb\nc\n'))
+        mr_job.run_mapper()
+
+        # two batches: a b, b and c
+        self.assertEqual(
+            sorted(mr_job.parse_output([mr_job.stdout.getvalue()])),
+            [('a', 1), ('b', 2), ('c', 1)])
+        self.assertEqual(
+            parse_mr_job_stderr(mr_job.stderr.getvalue())['counters'],
+            {'batches': {'mapper': 2}})
+
+    def test_reducer_batch_value_chunks(self):
+        mr_job = self.MRValueChunks(['--reducer'])
+        mr_job.sandbox(stdin=BytesIO(
+            b'"a"\t1\n"a"\t2\n"a"\t3\n"b"\t4\n'))
+        mr_job.run_reducer()
+
+        self.assertEqual(
+            list(mr_job.parse_output([mr_job.stdout.getvalue()])),
+            [('a', [[1, 2], [3]]), ('b', [[4]])])
+
+    def test_inline(self):
+        mr_job = self.MRBatchWordCount(['-r', 'inline'])
+        mr_job.sandbox(stdin=BytesIO(b'a b\nb c\nb\n'))
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            self.assertEqual(
+                sorted(mr_job.parse_output(runner.cat_output())),
+                [('a', 1), ('b', 3), ('c', 1)])
+
+    def test_cant_define_mapper_and_mapper_batch(self):
+
+        class MRBothMappers(self.MRBatchWordCount):
+
+            def mapper(self, key, value):
+                yield key, value
+
+        self.assertRaises(ValueError, MRBothMappers().steps)
+
+
+class MapperCombineTestCase(SandboxedTestCase):
+
+    class MRCombiningWordCount(MRJob):
+
+        def mapper(self, _, line):
+            for word in line.split():
+                yield word, 1
+
+        def mapper_combine(self, count1, count2):
+            return count1 + count2
+
+        def reducer(self, word, counts):
+            yield word, sum(counts)
+
+    INPUT = b'a b a\nc a b\nd\n'
+
+    def run_mapper(self, job_class, max_keys=None):
+        mr_job = job_class(['--mapper'])
+        if max_keys is not None:
+            mr_job.MAPPER_COMBINE_SIZE = max_keys
+        mr_job.sandbox(stdin=BytesIO(self.INPUT))
+        mr_job.run_mapper()
+
+        output = list(mr_job.parse_output([mr_job.stdout.getvalue()]))
+        counters = parse_mr_job_stderr(
+            mr_job.stderr.getvalue())['counters']
+
+        return output, counters
+
+    def test_combines_everything(self):
+        output, counters = self.run_mapper(self.MRCombiningWordCount)
+
+        self.assertEqual(sorted(output),
+                         [('a', 3), ('b', 2), ('c', 1), ('d', 1)])
+        self.assertEqual(counters,
+                         {'In-mapper combining': {'hits': 3,
+                                                  'early flushes': 0}})
+
+    def test_evicts_least_recently_used_key(self):
+        output, counters = self.run_mapper(self.MRCombiningWordCount,
+                                           max_keys=2)
+
+        # the second "a" makes "b" the least recently used key, so it gets
+        # flushed when we see "c". The third "a" means "c" gets flushed
+        # before "a"
+        self.assertEqual(output,
+                         [('b', 1), ('c', 1), ('a', 3), ('b', 1), ('d', 1)])
+        self.assertEqual(counters,
+                         {'In-mapper combining': {'hits': 2,
+                                                  'early flushes': 3}})
+
+    def test_unhashable_keys(self):
+
+        class MRListKeys(self.MRCombiningWordCount):
+
+            def mapper(self, _, line):
+                for word in line.split():
+                    yield [word], 1
+
+        output, counters = self.run_mapper(MRListKeys)
+
+        self.assertEqual(sorted(output),
+                         [(['a'], 3), (['b'], 2), (['c'], 1), (['d'], 1)])
+        self.assertEqual(counters['In-mapper combining']['hits'], 3)
+
+    def test_nested_unhashable_keys(self):
+
+        class MRDictKeys(self.MRCombiningWordCount):
+
+            def mapper(self, _, line):
+                for word in line.split():
+                    yield {'word': word, 'letters': list(word)}, 1
+
+        output, counters = self.run_mapper(MRDictKeys)
+
+        self.assertEqual(len(output), 4)
+        self.assertIn(({'word': 'a', 'letters': ['a']}, 3), output)
+        self.assertEqual(counters['In-mapper combining']['hits'], 3)
+
+    def test_lists_and_tuples_not_combined(self):
+
+        class MRListAndTupleKeys(self.MRCombiningWordCount):
+            # keep tuples as tuples
+            INTERNAL_PROTOCOL = PickleProtocol
+
+            def mapper(self, _, line):
+                for word in line.split():
+                    yield [word], 1
+                    yield (word,), 1
+
+        mr_job = MRListAndTupleKeys(['--mapper'])
+        mr_job.sandbox(stdin=BytesIO(b'a a\n'))
+        mr_job.run_mapper()
+
+        output = [PickleProtocol().read(line) for line in
+                  mr_job.stdout.getvalue().splitlines()]
+        self.assertEqual(sorted(output, key=repr),
+                         [(('a',), 2), (['a'], 2)])
+
+    def test_equal_keys_of_different_types_not_combined(self):
+
+        class MRMixedTypeKeys(self.MRCombiningWordCount):
+
+            def mapper(self, _, line):
+                yield 1, 1
+                yield True, 1
+                yield 1.0, 1
+                yield [1], 1
+                yield [True], 1
+                yield 1, 1
+
+        output, counters = self.run_mapper(MRMixedTypeKeys)
+
+        # use repr() because 1 == 1.0 == True
+        self.assertEqual(
+            sorted((repr(key), count) for key, count in output),
+            [('1', 6), ('1.0', 3), ('True', 3), ('[1]', 3), ('[True]', 3)])
+        self.assertEqual(counters['In-mapper combining']['hits'], 13)
+
+    def test_mapper_final_output_is_combined(self):
+
+        class MRCountWithFinal(self.MRCombiningWordCount):
+
+            def mapper_final(self):
+                yield 'a', 10
+
+        output, _ = self.run_mapper(MRCountWithFinal)
+        self.assertIn(('a', 13), output)
+
+    def test_inline(self):
+        mr_job = self.MRCombiningWordCount(['-r', 'inline'])
+        mr_job.sandbox(stdin=BytesIO(self.INPUT))
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            self.assertEqual(
+                sorted(mr_job.parse_output(runner.cat_output())),
+                [('a', 3), ('b', 2), ('c', 1), ('d', 1)])
+
+    def test_cant_combine_with_mapper_cmd(self):
+        self.assertRaises(ValueError, MRStep,
+                          mapper_cmd='cat', mapper_combine=max)
+
+
+class LazyValuesTestCase(TestCase):
+
+    class CountingJSONProtocol(StandardJSONProtocol):
+
+        def __init__(self):
+            super(LazyValuesTestCase.CountingJSONProtocol, self).__init__()
+            self.num_values_read = 0
+
+        def read_value(self, raw_value):
+            self.num_values_read += 1
+            return super(LazyValuesTestCase.CountingJSONProtocol,
+                         self).read_value(raw_value)
+
+    class ReadOverridingJSONProtocol(StandardJSONProtocol):
+
+        def read(self, line):
+            key, value = super(
+                LazyValuesTestCase.ReadOverridingJSONProtocol,
+                self).read(line)
+            return key, value * 10
+
+    class MRFirstValue(MRJob):
+
+        def reducer(self, key, values):
+            yield key, next(values)
+
+    INPUT = b'"a"\t1\n"a"\t2\n"a"\t3\n"b"\t4\n"b"\t5\n'
+
+    def run_reducer(self, protocol):
+        mr_job = self.MRFirstValue(['--reducer'])
+        mr_job.sandbox(stdin=BytesIO(self.INPUT))
+
+        with patch.object(mr_job, '_pick_protocol_instances',
+                          return_value=(protocol, StandardJSONProtocol())):
+            mr_job.run_reducer()
+
+        return sorted(mr_job.parse_output([mr_job.stdout.getvalue()]))
+
+    def test_only_decode_values_reducer_uses(self):
+        protocol = self.CountingJSONProtocol()
+
+        self.assertEqual(self.run_reducer(protocol), [('a', 1), ('b', 4)])
+        self.assertEqual(protocol.num_values_read, 2)
+
+    def test_skipped_values_are_not_decoded(self):
+        # a value this protocol would choke on
+        self.INPUT += b'"b"\t{@#$@#!^&*$%^\n'
+
+        self.assertEqual(self.run_reducer(self.CountingJSONProtocol()),
+                         [('a', 1), ('b', 4)])
+
+    def test_respect_overridden_read(self):
+        self.assertEqual(self.run_reducer(self.ReadOverridingJSONProtocol()),
+                         [('a', 10), ('b', 40)])
+
+
+class AutoJSONBackendTestCase(SandboxedTestCase):
+
+    class MRAutoJSONWordCount(MRJob):
+        INTERNAL_PROTOCOL = AutoJSONProtocol
+
+        def mapper(self, _, line):
+            for word in line.split():
+                yield word, 1
+
+        def reducer(self, word, counts):
+            yield word, sum(counts)
+
+    def test_steps_record_backend(self):
+        self.assertEqual(
+            self.MRAutoJSONWordCount()._steps_desc(),
+            [dict(type='streaming',
+                  mapper=dict(type='script'),
+                  reducer=dict(type='script'),
+                  json_backend=pick_json_backend())])
+
+    def test_no_backend_without_auto_json_protocol(self):
+        self.assertNotIn('json_backend', MRTwoStepJob()._steps_desc()[0])
+
+    def test_task_uses_backend_from_switch(self):
+        mr_job = self.MRAutoJSONWordCount(
+            ['--mapper', '--json-backend', 'json'])
+
+        read, write = mr_job._pick_protocol_instances(0, 'mapper')
+
+        self.assertEqual(write.backend, 'json')
+        self.assertEqual(mr_job._steps_desc()[0]['json_backend'], 'json')
+
+    def test_bad_backend_from_switch(self):
+        mr_job = self.MRAutoJSONWordCount(
+            ['--reducer', '--json-backend', 'yaml'])
+
+        self.assertRaises(ValueError, mr_job._pick_protocol_instances,
+                          0, 'reducer')
+
+    def test_runner_passes_backend_to_tasks(self):
+        mr_job = self.MRAutoJSONWordCount(['-r', 'inline'])
+        mr_job.sandbox(stdin=BytesIO(b'a b\nb\n'))
+
+        with mr_job.make_runner() as runner:
+            self.assertIn('--json-backend=%s' % pick_json_backend(),
+                          runner._args_for_task(0, 'reducer'))
+
+            runner.run()
+
+            self.assertEqual(
+                sorted(mr_job.parse_output(runner.cat_output())),
+                [('a', 1), ('b', 2)])
+
+
+class MarshalInternalProtocolTestCase(SandboxedTestCase):
+
+    class MRBinaryBigrams(MRJob):
+        INTERNAL_PROTOCOL = MarshalProtocol
+
+        def mapper(self, _, line):
+            data = line.encode('utf_8')
+            for i in range(len(data) - 1):
+                yield data[i:i + 2], 1
+
+        def reducer(self, bigram, counts):
+            yield bigram.decode('utf_8'), sum(counts)
+
+    def test_inline(self):
+        mr_job = self.MRBinaryBigrams(['-r', 'inline'])
+        mr_job.sandbox(stdin=BytesIO(b'a\tb\ra\t\n'))
+
+        with mr_job.make_runner() as runner:
+            runner.run()
+
+            self.assertEqual(
+                sorted(mr_job.parse_output(runner.cat_output())),
+                [('\tb', 1), ('\ra', 1), ('a\t', 2), ('b\r', 1)])
+
+
 class ProtocolErrorsTestCase(EmptyMrjobConfTestCase):
 
     class MRBoringReprAndJSONJob(MRBoringJob):
@@ -22,6 +22,7 @@ import stat
 import sys
 import tempfile
 from io import BytesIO
+from multiprocessing import Pool
 from os.path import dirname
 from os.path import exists
 from os.path import join
@@ -32,6 +33,8 @@ from unittest import skipIf
 import mrjob
 from mrjob.cat import decompress
 from mrjob.local import LocalMRJobRunner
+from mrjob.local import _invoke_task_in_subprocess
+from mrjob.local import _invoke_task_in_warm_worker
 from mrjob.step import StepFailedException
 from mrjob.util import cmd_line
 from mrjob.util import to_lines
@@ -495,6 +498,104 @@ class LocalBootstrapMrjobTestCase(TestCase):
                 self.assertFalse(script_mrjob_dir.startswith(local_tmp_dir))
 
 
+class NumCoresTestCase(SandboxedTestCase):
+
+    def setUp(self):
+        super(NumCoresTestCase, self).setUp()
+
+        self.pool = self.start(patch('mrjob.local.Pool', wraps=Pool))
+
+    def run_job(self, *args):
+        job = MRWordCount(['-r', 'local'] + list(args))
+        job.sandbox(stdin=BytesIO(b'one two\nthree\n'))
+
+        with job.make_runner() as runner:
+            runner.run()
+
+    def test_default(self):
+        self.run_job()
+
+        self.assertTrue(self.pool.called)
+        for args, kwargs in self.pool.call_args_list:
+            self.assertEqual(kwargs, dict(processes=None))
+
+    def test_num_cores(self):
+        self.run_job('--num-cores', '3')
+
+        self.assertTrue(self.pool.called)
+        for args, kwargs in self.pool.call_args_list:
+            self.assertEqual(kwargs, dict(processes=3))
+
+    def test_pool_reused_between_steps(self):
+        job = MRTwoStepJob(['-r', 'local'])
+        job.sandbox(stdin=BytesIO(b'one two\nthree\n'))
+
+        with job.make_runner() as runner:
+            runner.run()
+
+            self.assertEqual(self.pool.call_count, 1)
+            # pool is shut down once the job is done
+            self.assertIsNone(runner._pool)
+
+
+class WarmWorkersTestCase(SandboxedTestCase):
+
+    def test_word_count(self):
+        job = MRWordCount(['-r', 'local', '--warm-workers'])
+        job.sandbox(stdin=BytesIO(b'one two\nthree\n'))
+
+        with job.make_runner() as runner:
+            self.assertEqual(
+                runner._invoke_task_func('mapper', 0, 0).func,
+                _invoke_task_in_warm_worker)
+
+            runner.run()
+
+            self.assertEqual(
+                [count for _, count in
+                 job.parse_output(runner.cat_output())],
+                [3])
+
+    def test_off_by_default(self):
+        job = MRWordCount(['-r', 'local'])
+
+        with job.make_runner() as runner:
+            self.assertEqual(
+                runner._invoke_task_func('mapper', 0, 0).func,
+                _invoke_task_in_subprocess)
+
+    def test_setup_commands_need_subprocess(self):
+        job = MRWordCount(['-r', 'local', '--warm-workers',
+                           '--setup', 'true'])
+
+        with job.make_runner() as runner:
+            self.assertEqual(
+                runner._invoke_task_func('mapper', 0, 0).func,
+                _invoke_task_in_subprocess)
+
+    def test_command_steps_need_subprocess(self):
+        job = MRCmdJob(['-r', 'local', '--warm-workers',
+                        '--mapper-cmd', 'cat'])
+
+        with job.make_runner() as runner:
+            self.assertEqual(
+                runner._invoke_task_func('mapper', 0, 0).func,
+                _invoke_task_in_subprocess)
+
+    def test_traceback_written_to_task_stderr(self):
+        job = MRVerboseJob(['-r', 'local', '--warm-workers'])
+        job.sandbox(stdin=BytesIO(b'one two\nthree\n'))
+
+        with job.make_runner() as runner:
+            self.assertRaises(StepFailedException, runner.run)
+
+            stderr_path = runner._task_stderr_path('mapper', 0, 0)
+            with open(stderr_path, 'rb') as stderr:
+                self.assertIn(b'Exception: BOOM', stderr.read())
+
+            self.assertEqual(runner.counters()[0]['Foo']['Bar'], 10000)
+
+
 class LocalMRJobRunnerJobConfTestCase(InlineMRJobRunnerJobConfTestCase):
 
     RUNNER = 'local'
@@ -15,14 +15,19 @@
 # limitations under the License.
 
 """Make sure all of our protocols work as advertised."""
+import json
 import unittest
 from unittest import TestCase
 from unittest import skipIf
 
+from mrjob.protocol import AutoJSONProtocol
+from mrjob.protocol import AutoJSONValueProtocol
 from mrjob.protocol import BytesProtocol
 from mrjob.protocol import BytesValueProtocol
 from mrjob.protocol import JSONProtocol
 from mrjob.protocol import JSONValueProtocol
+from mrjob.protocol import MarshalProtocol
+from mrjob.protocol import MarshalValueProtocol
 from mrjob.protocol import PickleProtocol
 from mrjob.protocol import PickleValueProtocol
 from mrjob.protocol import RapidJSONProtocol
@@ -39,11 +44,18 @@ from mrjob.protocol import TextProtocol
 from mrjob.protocol import TextValueProtocol
 from mrjob.protocol import UltraJSONProtocol
 from mrjob.protocol import UltraJSONValueProtocol
+from mrjob.protocol import _escape_binary
+from mrjob.protocol import _json_backend_ok
+from mrjob.protocol import json_backend_conforms
+from mrjob.protocol import pick_json_backend
+from mrjob.protocol import _unescape_binary
 from mrjob.protocol import rapidjson
 from mrjob.protocol import simplejson
 from mrjob.protocol import ujson
 from mrjob.py2 import PY2
 
+from tests.py2 import patch
+
 
 class Point(object):
     """A simple class to test encoding of objects."""
@@ -105,6 +117,15 @@ class ProtocolTestCase(TestCase):
         self.assertEqual((key, value),
                          protocol.read(protocol.write(key, value) + b'\t'))
 
+    def assertReadKeyAndValueOK(self, protocol, key, value):
+        """Assert that read_key() and read_value() decode the given key
+        and value, just like read() does."""
+        key_out, raw_value = protocol.read_key(protocol.write(key, value))
+
+        self.assertEqual(key_out, key)
+        self.assertIsInstance(raw_value, bytes)
+        self.assertEqual(protocol.read_value(raw_value), value)
+
     def assertCantEncode(self, protocol, key, value):
         self.assertRaises(Exception, protocol.write, key, value)
 
@@ -131,6 +152,105 @@ class JSONProtocolAliasesTestCase(TestCase):
             self.assertEqual(JSONValueProtocol, StandardJSONValueProtocol)
 
 
+class PickJSONBackendTestCase(TestCase):
+
+    def setUp(self):
+        # clear cached results of json_backend_conforms()
+        self.start(patch.dict(_json_backend_ok, clear=True))
+
+    def start(self, patcher):
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_standard_json_conforms(self):
+        self.assertTrue(json_backend_conforms('json'))
+
+    def test_prefer_fastest_backend(self):
+        if ujson and json_backend_conforms('ujson'):
+            self.assertEqual(pick_json_backend(), 'ujson')
+        elif rapidjson and not PY2 and json_backend_conforms('rapidjson'):
+            self.assertEqual(pick_json_backend(), 'rapidjson')
+        elif simplejson and json_backend_conforms('simplejson'):
+            self.assertEqual(pick_json_backend(), 'simplejson')
+        else:
+            self.assertEqual(pick_json_backend(), 'json')
+
+    def test_skip_backends_that_dont_conform(self):
+        self.start(patch('mrjob.protocol.json_backend_conforms',
+                         side_effect=lambda name: name == 'json'))
+
+        self.assertEqual(pick_json_backend(), 'json')
+
+    def test_ints_that_become_floats_dont_conform(self):
+        self.start(patch.object(
+            StandardJSONProtocol, '_loads',
+            lambda self, value: json.loads(value.decode('utf_8'),
+                                           parse_int=float)))
+
+        self.assertFalse(json_backend_conforms('json'))
+
+    def test_exceptions_dont_conform(self):
+        self.start(patch.object(
+            StandardJSONValueProtocol, 'write', side_effect=OverflowError))
+
+        self.assertFalse(json_backend_conforms('json'))
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, json_backend_conforms, 'yaml')
+
+    def test_backend_not_installed(self):
+        self.start(patch('mrjob.protocol.ujson', None))
+
+        self.assertRaises(ValueError, json_backend_conforms, 'ujson')
+
+
+class AutoJSONProtocolTestCase(ProtocolTestCase):
+
+    def test_round_trip(self):
+        for k, v in JSON_KEYS_AND_VALUES:
+            self.assertRoundTripOK(AutoJSONProtocol(), k, v)
+
+    def test_read_key_and_value(self):
+        for k, v in JSON_KEYS_AND_VALUES:
+            self.assertReadKeyAndValueOK(AutoJSONProtocol(), k, v)
+
+    def test_default_backend(self):
+        self.assertEqual(AutoJSONProtocol().backend, pick_json_backend())
+
+    def test_explicit_backend(self):
+        protocol = AutoJSONProtocol(backend='json')
+
+        self.assertEqual(protocol.backend, 'json')
+        self.assertEqual(
+            protocol.write(['a', 1], {'foo': 'bar'}),
+            StandardJSONProtocol().write(['a', 1], {'foo': 'bar'}))
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, AutoJSONProtocol, backend='yaml')
+
+    def test_backend_not_installed(self):
+        with patch('mrjob.protocol.ujson', None):
+            self.assertRaises(ValueError, AutoJSONProtocol, backend='ujson')
+
+
+class AutoJSONValueProtocolTestCase(ProtocolTestCase):
+
+    def test_round_trip(self):
+        for _, v in JSON_KEYS_AND_VALUES:
+            self.assertRoundTripOK(AutoJSONValueProtocol(), None, v)
+
+    def test_explicit_backend(self):
+        protocol = AutoJSONValueProtocol(backend='json')
+
+        self.assertEqual(protocol.backend, 'json')
+        self.assertEqual(protocol.write(None, {'foo': 'bar'}),
+                         StandardJSONValueProtocol().write(
+                             None, {'foo': 'bar'}))
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, AutoJSONValueProtocol, backend='yaml')
+
+
 class StandardJSONProtocolTestCase(ProtocolTestCase):
 
     PROTOCOL = StandardJSONProtocol()
@@ -139,6 +259,14 @@ class StandardJSONProtocolTestCase(ProtocolTestCase):
         for k, v in JSON_KEYS_AND_VALUES:
             self.assertRoundTripOK(self.PROTOCOL, k, v)
 
+    def test_read_key_and_value(self):
+        for k, v in JSON_KEYS_AND_VALUES:
+            self.assertReadKeyAndValueOK(self.PROTOCOL, k, v)
+
+    def test_read_key_does_not_decode_value(self):
+        self.assertEqual(self.PROTOCOL.read_key(b'"a"\t{@#$@#!^&*$%^'),
+                         ('a', b'{@#$@#!^&*$%^'))
+
     def test_round_trip_with_trailing_tab(self):
         for k, v in JSON_KEYS_AND_VALUES:
             self.assertRoundTripWithTrailingTabOK(self.PROTOCOL, k, v)
@@ -316,6 +444,10 @@ class PickleProtocolTestCase(ProtocolTestCase):
         for k, v in PICKLE_KEYS_AND_VALUES:
             self.assertRoundTripOK(PickleProtocol(), k, v)
 
+    def test_read_key_and_value(self):
+        for k, v in PICKLE_KEYS_AND_VALUES:
+            self.assertReadKeyAndValueOK(PickleProtocol(), k, v)
+
     def test_round_trip_with_trailing_tab(self):
         for k, v in PICKLE_KEYS_AND_VALUES:
             self.assertRoundTripWithTrailingTabOK(PickleProtocol(), k, v)
@@ -343,6 +475,81 @@ class PickleValueProtocolTestCase(ProtocolTestCase):
     # no tests of what encoded data looks like; pickle is an opaque protocol
 
 
+# keys and values that marshal protocols should encode/decode properly
+MARSHAL_KEYS_AND_VALUES = REPR_KEYS_AND_VALUES + [
+    (b'\x01\x02\x03\x04\x05', b'\t\n\r\x01\x01\x03'),
+    (bytes(bytearray(range(256))), frozenset(['\r\n'])),
+]
+
+
+class MarshalProtocolTestCase(ProtocolTestCase):
+
+    def test_round_trip(self):
+        for k, v in MARSHAL_KEYS_AND_VALUES:
+            self.assertRoundTripOK(MarshalProtocol(), k, v)
+
+    def test_read_key_and_value(self):
+        for k, v in MARSHAL_KEYS_AND_VALUES:
+            self.assertReadKeyAndValueOK(MarshalProtocol(), k, v)
+
+    def test_round_trip_with_trailing_tab(self):
+        for k, v in MARSHAL_KEYS_AND_VALUES:
+            self.assertRoundTripWithTrailingTabOK(MarshalProtocol(), k, v)
+
+    def test_one_line_with_one_tab(self):
+        for k, v in MARSHAL_KEYS_AND_VALUES:
+            line = MarshalProtocol().write(k, v)
+
+            self.assertEqual(line.count(b'\t'), 1)
+            self.assertNotIn(b'\n', line)
+            self.assertNotIn(b'\r', line)
+
+    def test_same_key_same_encoding(self):
+        # marshal can encode objects with multiple references differently
+        key = 'a' * 10
+        self.assertEqual(MarshalProtocol().write(key, None),
+                         MarshalProtocol().write('a' * 10, None))
+        self.assertEqual(MarshalProtocol().write((key, key), None),
+                         MarshalProtocol().write(('a' * 10, 'a' * 10), None))
+
+    def test_bad_data(self):
+        self.assertCantDecode(MarshalProtocol(), b'\xff\t\xff')
+
+    def test_cant_encode_objects(self):
+        self.assertCantEncode(MarshalProtocol(), Point(2, 3), None)
+
+
+class MarshalValueProtocolTestCase(ProtocolTestCase):
+
+    def test_round_trip(self):
+        for _, v in MARSHAL_KEYS_AND_VALUES:
+            self.assertRoundTripOK(MarshalValueProtocol(), None, v)
+
+    def test_round_trip_with_trailing_tab(self):
+        for _, v in MARSHAL_KEYS_AND_VALUES:
+            self.assertRoundTripWithTrailingTabOK(
+                MarshalValueProtocol(), None, v)
+
+    def test_bad_data(self):
+        self.assertCantDecode(MarshalValueProtocol(), b'\xff')
+
+
+class EscapeBinaryTestCase(TestCase):
+
+    def test_round_trip(self):
+        for data in (b'', b'\x01', b'\x01\x02', b'\x01\x01\x03\t',
+                     b'\t\n\r', bytes(bytearray(range(256))) * 2):
+            escaped = _escape_binary(data)
+
+            self.assertNotIn(b'\t', escaped)
+            self.assertNotIn(b'\n', escaped)
+            self.assertNotIn(b'\r', escaped)
+            self.assertEqual(_unescape_binary(escaped), data)
+
+    def test_other_bytes_unchanged(self):
+        self.assertEqual(_escape_binary(b'foo\x00\xff'), b'foo\x00\xff')
+
+
 class RawProtocolAliasesTestCase(TestCase):
 
     def test_raw_protocol_aliases(self):
@@ -470,6 +677,10 @@ class ReprProtocolTestCase(ProtocolTestCase):
         for k, v in REPR_KEYS_AND_VALUES:
             self.assertRoundTripOK(ReprProtocol(), k, v)
 
+    def test_read_key_and_value(self):
+        for k, v in REPR_KEYS_AND_VALUES:
+            self.assertReadKeyAndValueOK(ReprProtocol(), k, v)
+
     def test_round_trip_with_trailing_tab(self):
         for k, v in REPR_KEYS_AND_VALUES:
             self.assertRoundTripWithTrailingTabOK(ReprProtocol(), k, v)
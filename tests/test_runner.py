@@ -22,6 +22,7 @@ import stat
 import sys
 import tarfile
 import tempfile
+import threading
 from subprocess import CalledProcessError
 from time import sleep
 from unittest import TestCase
@@ -36,6 +37,7 @@ from mrjob.emr import EMRJobRunner
 from mrjob.inline import InlineMRJobRunner
 from mrjob.py2 import StringIO
 from mrjob.runner import MRJobRunner
+from mrjob.runner import _cat_files_in_parallel
 from mrjob.tools.emr.audit_usage import _JOB_KEY_RE
 from mrjob.util import log_to_stream
 from mrjob.util import to_lines
@@ -275,6 +277,158 @@ class TestCatOutput(SandboxedTestCase):
         # should issue deprecation warning
         self.assertEqual(log.warning.call_count, 1)
 
+    def test_cat_output_threads(self):
+        for i in range(10):
+            self.makefile('part-%05d' % i, contents=b'%d\n' % i)
+
+        runner = InlineMRJobRunner(conf_paths=[], output_dir=self.tmp_dir,
+                                   cat_output_threads=3)
+
+        # files should still be separated by b''
+        self.assertEqual(
+            sorted(chunk for chunk in runner.cat_output() if chunk),
+            [b'%d\n' % i for i in range(10)])
+        self.assertEqual(list(runner.cat_output()).count(b''), 9)
+
+
+class CatFilesInParallelTestCase(TestCase):
+
+    def setUp(self):
+        super(CatFilesInParallelTestCase, self).setUp()
+
+        # map from path to list of chunks
+        self.path_to_chunks = {}
+
+        # how many chunks have been read from any file
+        self.num_chunks_read = 0
+
+    def cat_file(self, path):
+        for chunk in self.path_to_chunks[path]:
+            if isinstance(chunk, Exception):
+                raise chunk
+
+            self.num_chunks_read += 1
+            yield chunk
+
+    def test_empty(self):
+        self.assertEqual(
+            list(_cat_files_in_parallel(self.cat_file, [], 3, 1024)), [])
+
+    def test_yields_files_in_order(self):
+        paths = ['part-%05d' % i for i in range(10)]
+        for i, path in enumerate(paths):
+            # later files are shorter, so they tend to finish first
+            self.path_to_chunks[path] = [
+                b'%d-%d' % (i, j) for j in range(10 - i)]
+
+        expected = []
+        for i, path in enumerate(paths):
+            if i > 0:
+                expected.append(b'')
+            expected.extend(self.path_to_chunks[path])
+
+        self.assertEqual(
+            list(_cat_files_in_parallel(self.cat_file, paths, 4, 1024)),
+            expected)
+
+    def test_empty_files(self):
+        self.path_to_chunks = dict(a=[], b=[b'b'], c=[])
+
+        self.assertEqual(
+            list(_cat_files_in_parallel(
+                self.cat_file, ['a', 'b', 'c'], 2, 1024)),
+            [b'', b'b', b''])
+
+    def test_buffer_size(self):
+        paths = ['a', 'b', 'c']
+        for path in paths:
+            self.path_to_chunks[path] = [b'x'] * 100
+
+        num_chunks_yielded = 0
+        max_read_ahead = 0
+
+        for chunk in _cat_files_in_parallel(self.cat_file, paths, 3, 5):
+            num_chunks_yielded += len(chunk)
+            max_read_ahead = max(max_read_ahead,
+                                 self.num_chunks_read - num_chunks_yielded)
+
+        self.assertEqual(num_chunks_yielded, 300)
+
+        # 5 chunks in the buffer, plus one chunk read but not yet
+        # buffered by each thread, plus one more for the current file
+        self.assertLessEqual(max_read_ahead, 5 + 3 + 1)
+
+    def test_nested_calls_run_in_calling_thread(self):
+        self.path_to_chunks = dict(a1=[b'a1'], a2=[b'a2'],
+                                   b1=[b'b1'], b2=[b'b2'])
+
+        # map from outer path to threads inner files were read in
+        path_to_threads = dict(a=set(), b=set())
+
+        def cat_parts(path):
+            def cat_part(part_path):
+                path_to_threads[path].add(threading.current_thread())
+                return self.cat_file(part_path)
+
+            for chunk in _cat_files_in_parallel(
+                    cat_part, [path + '1', path + '2'], 3, 1024):
+                yield chunk
+
+        self.assertEqual(
+            list(_cat_files_in_parallel(cat_parts, ['a', 'b'], 2, 1024)),
+            [b'a1', b'', b'a2', b'', b'b1', b'', b'b2'])
+
+        # each file's parts were read by the thread reading that file
+        self.assertEqual(len(path_to_threads['a']), 1)
+        self.assertEqual(len(path_to_threads['b']), 1)
+        self.assertNotIn(threading.current_thread(),
+                         path_to_threads['a'] | path_to_threads['b'])
+
+    def test_chunk_bigger_than_buffer_size(self):
+        self.path_to_chunks = dict(a=[b'a' * 100], b=[b'b' * 100])
+
+        self.assertEqual(
+            list(_cat_files_in_parallel(self.cat_file, ['a', 'b'], 2, 10)),
+            [b'a' * 100, b'', b'b' * 100])
+
+    def test_error_raised_in_order(self):
+        self.path_to_chunks = dict(
+            a=[b'a1', b'a2'],
+            b=[b'b1', IOError('b is broken')],
+            c=[b'c1'],
+        )
+
+        chunks = []
+
+        def cat_output():
+            for chunk in _cat_files_in_parallel(
+                    self.cat_file, ['a', 'b', 'c'], 3, 1024):
+                chunks.append(chunk)
+
+        self.assertRaises(IOError, cat_output)
+
+        # should yield everything before the error
+        self.assertEqual(chunks, [b'a1', b'a2', b'', b'b1'])
+
+    def test_stop_early(self):
+        paths = ['part-%05d' % i for i in range(5)]
+        for path in paths:
+            self.path_to_chunks[path] = [b'x'] * 100
+
+        num_threads = threading.active_count()
+
+        chunks = _cat_files_in_parallel(self.cat_file, paths, 3, 10)
+        self.assertEqual(next(chunks), b'x')
+        chunks.close()
+
+        # background threads should quit on their own
+        for _ in range(100):
+            if threading.active_count() <= num_threads:
+                break
+            sleep(0.05)
+
+        self.assertLessEqual(threading.active_count(), num_threads)
+
 
 @skip('_invoke_sort() is no longer a runner method')
 class TestInvokeSort(TestCase):
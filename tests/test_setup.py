@@ -13,6 +13,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
 import os
 from unittest import TestCase
 
@@ -23,6 +24,7 @@ from mrjob.setup import parse_legacy_hash_path
 from mrjob.setup import parse_setup_cmd
 
 from tests.py2 import patch
+from tests.sandbox import SandboxedTestCase
 
 
 class ParseSetupCmdTestCase(TestCase):
@@ -439,6 +441,66 @@ class UploadDirManagerTestCase(TestCase):
                           '._foo': 'hdfs:///foo'})
 
 
+class ContentAddressedUploadDirManagerTestCase(SandboxedTestCase):
+
+    def md5(self, data):
+        return hashlib.md5(data).hexdigest()
+
+    def test_simple(self):
+        path = self.makefile('bar.py', b'bar')
+
+        sd = UploadDirManager('s3://bucket/cache/', content_addressed=True)
+        sd.add(path)
+
+        self.assertEqual(
+            sd.path_to_uri(),
+            {path: 's3://bucket/cache/%s/bar.py' % self.md5(b'bar')})
+
+    def test_same_contents_same_uri(self):
+        path1 = self.makefile('bar.py', b'bar')
+        path2 = self.makefile('foo/bar.py', b'bar')
+
+        sd = UploadDirManager('s3://bucket/cache/', content_addressed=True)
+        sd.add(path1)
+        sd.add(path2)
+
+        self.assertEqual(sd.uri(path1), sd.uri(path2))
+
+    def test_different_contents_no_name_collision(self):
+        path1 = self.makefile('bar.py', b'bar')
+        path2 = self.makefile('foo/bar.py', b'baz')
+
+        sd = UploadDirManager('s3://bucket/cache/', content_addressed=True)
+        sd.add(path1)
+        sd.add(path2)
+
+        self.assertEqual(
+            sd.path_to_uri(),
+            {path1: 's3://bucket/cache/%s/bar.py' % self.md5(b'bar'),
+             path2: 's3://bucket/cache/%s/bar.py' % self.md5(b'baz')})
+
+    def test_unhide_files(self):
+        path = self.makefile('_bar.txt', b'bar')
+
+        sd = UploadDirManager('hdfs:///', content_addressed=True)
+        sd.add(path)
+
+        self.assertEqual(sd.uri(path),
+                         'hdfs:///%s/bar.txt' % self.md5(b'bar'))
+
+    def test_uris_not_hashed(self):
+        sd = UploadDirManager('hdfs:///', content_addressed=True)
+
+        self.assertEqual(sd.add('s3://bucket/foo.py'), 's3://bucket/foo.py')
+        self.assertEqual(sd.path_to_uri(), {})
+
+    def test_file_must_exist(self):
+        sd = UploadDirManager('hdfs:///', content_addressed=True)
+
+        self.assertRaises(IOError, sd.add,
+                          os.path.join(self.tmp_dir, 'nonexistent.py'))
+
+
 class WorkingDirManagerTestCase(TestCase):
 
     def test_empty(self):
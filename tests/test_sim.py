@@ -0,0 +1,508 @@
+# Copyright 2017 Yelp
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests of helper functions in mrjob.sim"""
+import bz2
+import gzip
+import os
+from os.path import join
+from unittest import TestCase
+from unittest import skipIf
+
+from mrjob.sim import _CompressedFile
+from mrjob.sim import _LineSorter
+from mrjob.sim import _format_skew_report
+from mrjob.sim import _hash_partition
+from mrjob.sim import _key_field_based_partition
+from mrjob.sim import _open_intermediate
+from mrjob.sim import _parse_key_specs
+from mrjob.sim import _partition_lines
+from mrjob.sim import _reducer_input_stats
+from mrjob.sim import _SplitReader
+from mrjob.sim import _sort_lines
+from mrjob.sim import _streaming_key
+from mrjob.sim import lz4
+
+from tests.compress import gzip_compress
+from tests.sandbox import SandboxedTestCase
+
+
+class SortLinesTestCase(SandboxedTestCase):
+
+    LINES = [
+        b'c\t1\n',
+        b'a\t3\n',
+        b'b\t2\n',
+        b'a\t1\n',
+        b'c\t0\n',
+        b'a\t2\n',
+    ]
+
+    def setUp(self):
+        super(SortLinesTestCase, self).setUp()
+
+        self.input_paths = [
+            self.makefile('input-1', b''.join(self.LINES[:4])),
+            self.makefile('input-2', b''.join(self.LINES[4:])),
+        ]
+        self.output_path = join(self.tmp_dir, 'output')
+        self.sort_tmp_dir = self.makedirs('sort-tmp')
+
+    def sorted_lines(self, **kwargs):
+        _sort_lines(self.input_paths, self.output_path,
+                    tmp_dir=self.sort_tmp_dir, **kwargs)
+
+        with open(self.output_path, 'rb') as output:
+            return list(output)
+
+    def test_sort_by_key_in_memory(self):
+        self.assertEqual(
+            self.sorted_lines(),
+            [b'a\t3\n', b'a\t1\n', b'a\t2\n',
+             b'b\t2\n',
+             b'c\t1\n', b'c\t0\n'])
+
+    def test_sort_values_in_memory(self):
+        self.assertEqual(self.sorted_lines(sort_values=True),
+                         sorted(self.LINES))
+
+    def test_sort_by_key_in_chunks(self):
+        # each chunk is two lines; lines with the same key should still
+        # appear in the order they were read
+        self.assertEqual(
+            self.sorted_lines(buffer_size=8),
+            [b'a\t3\n', b'a\t1\n', b'a\t2\n',
+             b'b\t2\n',
+             b'c\t1\n', b'c\t0\n'])
+
+    def test_sort_values_in_chunks(self):
+        self.assertEqual(self.sorted_lines(buffer_size=1, sort_values=True),
+                         sorted(self.LINES))
+
+    def test_chunks_are_cleaned_up(self):
+        self.sorted_lines(buffer_size=8)
+
+        self.assertEqual(os.listdir(self.sort_tmp_dir), [])
+
+    def test_no_input(self):
+        self.input_paths = []
+
+        self.assertEqual(self.sorted_lines(buffer_size=8), [])
+
+    def test_compressed(self):
+        self.input_paths = [
+            self.makefile('input-1.gz', gzip_compress(
+                b''.join(self.LINES[:4]))),
+            self.makefile('input-2.gz', gzip_compress(
+                b''.join(self.LINES[4:]))),
+        ]
+
+        _sort_lines(self.input_paths, self.output_path, buffer_size=8,
+                    tmp_dir=self.sort_tmp_dir, codec='gzip')
+
+        with gzip.GzipFile(self.output_path, 'rb') as output:
+            self.assertEqual(
+                list(output),
+                [b'a\t3\n', b'a\t1\n', b'a\t2\n',
+                 b'b\t2\n',
+                 b'c\t1\n', b'c\t0\n'])
+
+        self.assertEqual(os.listdir(self.sort_tmp_dir), [])
+
+
+class LineSorterTestCase(SandboxedTestCase):
+
+    def test_write_arbitrary_chunks(self):
+        with _LineSorter() as sorter:
+            sorter.write(b'b\t1')
+            sorter.write(b'\n')
+            sorter.write(b'a\t2\nc\t3\na')
+            sorter.write(b'\t4')
+
+            self.assertEqual(list(sorter),
+                             [b'a\t2\n', b'a\t4', b'b\t1\n', b'c\t3\n'])
+
+    def test_spill_to_disk(self):
+        sort_tmp_dir = self.makedirs('sort-tmp')
+
+        with _LineSorter(buffer_size=8, tmp_dir=sort_tmp_dir) as sorter:
+            for i in range(10):
+                sorter.write(('%d\t%d\n' % (i % 3, i)).encode('ascii'))
+
+            self.assertEqual(len(os.listdir(sort_tmp_dir)), 1)
+
+            self.assertEqual(
+                [int(line.split(b'\t')[1]) for line in sorter],
+                [0, 3, 6, 9, 1, 4, 7, 2, 5, 8])
+
+        self.assertEqual(os.listdir(sort_tmp_dir), [])
+
+    def test_compressed_chunks(self):
+        sort_tmp_dir = self.makedirs('sort-tmp')
+
+        with _LineSorter(buffer_size=8, tmp_dir=sort_tmp_dir,
+                         codec='bz2') as sorter:
+            for i in range(10):
+                sorter.write(('%d\t%d\n' % (i % 3, i)).encode('ascii'))
+
+            chunk_dir = join(sort_tmp_dir, os.listdir(sort_tmp_dir)[0])
+            for chunk_name in os.listdir(chunk_dir):
+                with open(join(chunk_dir, chunk_name), 'rb') as chunk:
+                    self.assertEqual(chunk.read(3), b'BZh')
+
+            self.assertEqual(
+                [int(line.split(b'\t')[1]) for line in sorter],
+                [0, 3, 6, 9, 1, 4, 7, 2, 5, 8])
+
+
+class CompressedFileTestCase(SandboxedTestCase):
+
+    LINES = [b'%d\tfoo\n' % i for i in range(1000)]
+
+    def assert_round_trip(self, codec):
+        path = join(self.tmp_dir, 'file')
+
+        with _CompressedFile(path, 'wb', codec) as f:
+            f.write(self.LINES[0])
+            f.writelines(self.LINES[1:])
+
+        with open(path, 'rb') as f:
+            self.assertLess(len(f.read()), len(b''.join(self.LINES)))
+
+        with _CompressedFile(path, 'rb', codec) as f:
+            self.assertEqual(f.readline(), self.LINES[0])
+            self.assertEqual(list(f), self.LINES[1:])
+
+        with _CompressedFile(path, 'rb', codec) as f:
+            self.assertEqual(f.read(), b''.join(self.LINES))
+
+    def test_gzip(self):
+        self.assert_round_trip('gzip')
+
+        with gzip.GzipFile(join(self.tmp_dir, 'file')) as f:
+            self.assertEqual(f.read(), b''.join(self.LINES))
+
+    def test_bz2(self):
+        self.assert_round_trip('bz2')
+
+        with bz2.BZ2File(join(self.tmp_dir, 'file')) as f:
+            self.assertEqual(f.read(), b''.join(self.LINES))
+
+    @skipIf(lz4 is None, 'lz4 module not installed')
+    def test_lz4(self):
+        self.assert_round_trip('lz4')
+
+    def test_unknown_codec(self):
+        self.assertRaises(ValueError, _CompressedFile,
+                          join(self.tmp_dir, 'file'), 'wb', 'snappy')
+
+    def test_no_fileno(self):
+        # so that the local runner pipes data to tasks, rather than
+        # handing them the compressed file
+        with _CompressedFile(join(self.tmp_dir, 'file'), 'wb') as f:
+            self.assertFalse(hasattr(f, 'fileno'))
+
+    def test_open_intermediate_without_codec(self):
+        path = self.makefile('file', b'foo\n')
+
+        with _open_intermediate(path) as f:
+            self.assertTrue(hasattr(f, 'fileno'))
+            self.assertEqual(list(f), [b'foo\n'])
+
+
+class PartitionLinesTestCase(SandboxedTestCase):
+
+    def setUp(self):
+        super(PartitionLinesTestCase, self).setUp()
+
+        self.input_path = self.makefile(
+            'input', ''.join('%d\t%d\n' % (i % 7, i) for i in range(100)))
+        self.output_paths = self.abs_paths('p0', 'p1', 'p2')
+
+    def read_partitions(self):
+        partitions = []
+        for output_path in self.output_paths:
+            with open(output_path, 'rb') as output:
+                partitions.append(list(output))
+
+        return partitions
+
+    def test_no_lines_lost(self):
+        _partition_lines(self.input_path, self.output_paths)
+
+        with open(self.input_path, 'rb') as input:
+            input_lines = list(input)
+
+        self.assertEqual(
+            sorted(line for p in self.read_partitions() for line in p),
+            sorted(input_lines))
+
+    def test_each_key_in_one_partition(self):
+        _partition_lines(self.input_path, self.output_paths)
+
+        key_to_partition = {}
+        for partition_num, lines in enumerate(self.read_partitions()):
+            for line in lines:
+                key = line.split(b'\t')[0]
+                self.assertEqual(
+                    key_to_partition.setdefault(key, partition_num),
+                    partition_num)
+
+    def test_order_preserved_within_partition(self):
+        _partition_lines(self.input_path, self.output_paths)
+
+        for lines in self.read_partitions():
+            values = [int(line.split(b'\t')[1]) for line in lines]
+            self.assertEqual(values, sorted(values))
+
+    def test_deterministic(self):
+        _partition_lines(self.input_path, self.output_paths)
+        first_time = self.read_partitions()
+
+        _partition_lines(self.input_path, self.output_paths)
+
+        self.assertEqual(self.read_partitions(), first_time)
+
+    def test_custom_partition_func(self):
+        _partition_lines(self.input_path, self.output_paths,
+                         get_partition=lambda key, n: int(key) % n)
+
+        for partition_num, lines in enumerate(self.read_partitions()):
+            for line in lines:
+                self.assertEqual(int(line.split(b'\t')[0]) % 3,
+                                 partition_num)
+
+    def test_compressed(self):
+        with open(self.input_path, 'rb') as input:
+            input_lines = list(input)
+
+        with _open_intermediate(self.input_path, 'wb', 'gzip') as input:
+            input.writelines(input_lines)
+
+        _partition_lines(self.input_path, self.output_paths, codec='gzip')
+
+        output_lines = []
+        for output_path in self.output_paths:
+            with gzip.GzipFile(output_path, 'rb') as output:
+                output_lines.extend(output)
+
+        self.assertEqual(sorted(output_lines), sorted(input_lines))
+
+
+# max value of a Java int, so that partition number == hash code
+_MAX_INT = 2 ** 31 - 1
+
+
+class StreamingKeyTestCase(TestCase):
+
+    def test_first_field(self):
+        self.assertEqual(_streaming_key(b'a\tb\tc\n'), b'a')
+
+    def test_no_tab(self):
+        self.assertEqual(_streaming_key(b'abc\r\n'), b'abc')
+
+    def test_multiple_fields(self):
+        self.assertEqual(_streaming_key(b'a\tb\tc\n', num_fields=2),
+                         b'a\tb')
+        self.assertEqual(_streaming_key(b'a\tb\n', num_fields=3),
+                         b'a\tb')
+
+    def test_custom_separator(self):
+        self.assertEqual(
+            _streaming_key(b'a,b,c\n', num_fields=2, separator=b','),
+            b'a,b')
+
+
+class HashPartitionTestCase(TestCase):
+
+    def test_same_as_text_hash_code(self):
+        # new Text("foo").hashCode()
+        self.assertEqual(_hash_partition(b'foo', _MAX_INT), 131365)
+
+    def test_bytes_are_signed(self):
+        # 31 * 1 + (byte) 0xff
+        self.assertEqual(_hash_partition(b'\xff', _MAX_INT), 30)
+
+    def test_hash_is_never_negative(self):
+        for i in range(1000):
+            key = ('%d' % (i * 7919)).encode('ascii') * 5
+            self.assertTrue(0 <= _hash_partition(key, 7) < 7)
+
+
+class KeyFieldBasedPartitionTestCase(TestCase):
+
+    def test_no_key_specs_uses_string_hash_code(self):
+        # "hello".hashCode()
+        self.assertEqual(
+            _key_field_based_partition(b'hello', _MAX_INT), 99162322)
+        # famous collision
+        self.assertEqual(_key_field_based_partition(b'Aa', _MAX_INT),
+                         _key_field_based_partition(b'BB', _MAX_INT))
+
+    def test_first_field(self):
+        key_specs = _parse_key_specs('-k1,1')
+
+        self.assertEqual(
+            _key_field_based_partition(b'a\tb', _MAX_INT, key_specs),
+            ord('a'))
+        self.assertEqual(
+            _key_field_based_partition(b'abc\tdef', 7, key_specs),
+            _key_field_based_partition(b'abc\tghi', 7, key_specs))
+
+    def test_second_field_to_end(self):
+        key_specs = _parse_key_specs('-k2')
+
+        self.assertEqual(
+            _key_field_based_partition(b'a\tb\tc', _MAX_INT, key_specs),
+            _key_field_based_partition(b'x\tb\tc', _MAX_INT, key_specs))
+        self.assertNotEqual(
+            _key_field_based_partition(b'a\tb\tc', _MAX_INT, key_specs),
+            _key_field_based_partition(b'a\tb\td', _MAX_INT, key_specs))
+
+    def test_chars_within_fields(self):
+        key_specs = _parse_key_specs('-k1.2,1.3')
+
+        # only "bc" matters
+        self.assertEqual(
+            _key_field_based_partition(b'abcd\te', _MAX_INT, key_specs),
+            31 * ord('b') + ord('c'))
+
+    def test_missing_field(self):
+        key_specs = _parse_key_specs('-k3,3')
+
+        self.assertEqual(
+            _key_field_based_partition(b'a\tb', _MAX_INT, key_specs), 0)
+
+    def test_custom_separator(self):
+        key_specs = _parse_key_specs('-k2,2')
+
+        self.assertEqual(
+            _key_field_based_partition(b'a,b,c', _MAX_INT, key_specs,
+                                       separator=b','),
+            ord('b'))
+
+
+class ParseKeySpecsTestCase(TestCase):
+
+    def test_empty(self):
+        self.assertEqual(_parse_key_specs(''), [])
+
+    def test_key_specs(self):
+        self.assertEqual(
+            _parse_key_specs('-k1,1 -k2.3nr,4.5 -k 6'),
+            [(1, 1, 1, 0), (2, 3, 4, 5), (6, 1, 0, 0)])
+
+    def test_ignore_other_options(self):
+        self.assertEqual(_parse_key_specs('-n -r -k1,1'), [(1, 1, 1, 0)])
+
+
+class SplitReaderTestCase(SandboxedTestCase):
+
+    LINES = [b'a\n', b'bb\n', b'\n', b'cccc\n', b'dd\n', b'e']
+
+    def setUp(self):
+        super(SplitReaderTestCase, self).setUp()
+
+        self.path = self.makefile('input', b''.join(self.LINES))
+        self.size = os.stat(self.path).st_size
+
+    def read_splits(self, split_size):
+        splits = []
+
+        for start in range(0, self.size, split_size):
+            length = min(split_size, self.size - start)
+            with _SplitReader(self.path, start, length) as reader:
+                splits.append(list(reader))
+
+        return splits
+
+    def test_whole_file(self):
+        self.assertEqual(self.read_splits(self.size), [self.LINES])
+
+    def test_every_line_read_exactly_once(self):
+        for split_size in range(1, self.size + 1):
+            splits = self.read_splits(split_size)
+
+            self.assertEqual(
+                [line for split in splits for line in split],
+                self.LINES)
+
+    def test_line_in_progress_belongs_to_previous_split(self):
+        # bytes 0-3 are "a\nbb"; "bb\n" starts in the first split
+        self.assertEqual(
+            self.read_splits(4)[:2],
+            [[b'a\n', b'bb\n'], [b'\n', b'cccc\n']])
+
+    def test_empty_range(self):
+        with _SplitReader(self.path, 0, 0) as reader:
+            self.assertEqual(list(reader), [])
+            self.assertEqual(reader.read(), b'')
+
+    def test_read(self):
+        with _SplitReader(self.path, 1, 6) as reader:
+            self.assertEqual(reader.read(3), b'bb\n')
+            self.assertEqual(reader.read(), b'\ncccc\n')
+            self.assertEqual(reader.read(), b'')
+
+
+class ReducerInputStatsTestCase(SandboxedTestCase):
+
+    def test_stats(self):
+        input_path = self.makefile(
+            'input', b'a\t1\na\t2\nb\t333\nc\t4\nc\t5\nc\t6\n')
+
+        self.assertEqual(
+            _reducer_input_stats(input_path, num_top_keys=2),
+            dict(records=6, bytes=26, top_keys=[
+                dict(key='c', records=3, bytes=12),
+                dict(key='a', records=2, bytes=8),
+            ]))
+
+    def test_compressed(self):
+        input_path = self.makefile('input', gzip_compress(
+            b'a\t1\na\t2\nb\t333\nc\t4\nc\t5\nc\t6\n'))
+
+        self.assertEqual(
+            _reducer_input_stats(input_path, num_top_keys=1, codec='gzip'),
+            dict(records=6, bytes=26, top_keys=[
+                dict(key='c', records=3, bytes=12),
+            ]))
+
+    def test_empty(self):
+        input_path = self.makefile('input', b'')
+
+        self.assertEqual(
+            _reducer_input_stats(input_path, num_top_keys=2),
+            dict(records=0, bytes=0, top_keys=[]))
+
+
+class FormatSkewReportTestCase(TestCase):
+
+    def test_format(self):
+        report = dict(
+            top_keys=[dict(key='"a"', records=30, bytes=150)],
+            reducer_input=[dict(records=30, bytes=150),
+                           dict(records=2, bytes=10),
+                           dict(records=0, bytes=0)],
+            task_times=dict(mapper=[0.5, 0.25], reducer=[1, 2, 3]),
+        )
+
+        self.assertEqual(
+            _format_skew_report(report),
+            'Skew report:\n'
+            '\tHeaviest keys (records, bytes):\n'
+            '\t\t"a"\t30\t150\n'
+            '\tReducer input records: min=0 median=2 max=30\n'
+            '\tReducer input bytes: min=0 median=10 max=150\n'
+            '\tMapper wall time (seconds): min=0.25 median=0.50 max=0.50\n'
+            '\tReducer wall time (seconds): min=1.00 median=2.00 max=3.00')
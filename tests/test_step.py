@@ -207,6 +207,17 @@ class MRStepInitTestCase(TestCase):
     def test_explicit_reducer_cmd(self):
         self._test_explicit(reducer_cmd='cat', r=True)
 
+    # batch
+
+    def test_explicit_mapper_batch(self):
+        self._test_explicit(mapper_batch=identity_mapper, m=True)
+
+    def test_explicit_combiner_batch(self):
+        self._test_explicit(combiner_batch=identity_reducer, c=True)
+
+    def test_explicit_reducer_batch(self):
+        self._test_explicit(reducer_batch=identity_reducer, r=True)
+
     # pre-filter
 
     def test_explicit_mapper_pre_filter(self):
@@ -232,6 +243,19 @@ class MRStepInitTestCase(TestCase):
     def test_conflict_reducer(self):
         self._test_conflict(reducer_cmd='cat', reducer=identity_reducer)
 
+    def test_conflict_mapper_batch(self):
+        self._test_conflict(mapper_batch=identity_mapper,
+                            mapper=identity_mapper)
+        self._test_conflict(mapper_batch=identity_mapper, mapper_cmd='cat')
+
+    def test_conflict_combiner_batch(self):
+        self._test_conflict(combiner_batch=identity_reducer,
+                            combiner=identity_reducer)
+
+    def test_conflict_reducer_batch(self):
+        self._test_conflict(reducer_batch=identity_reducer,
+                            reducer=identity_reducer)
+
 
 class MRStepGetItemTestCase(TestCase):
 